@@ -1,19 +1,29 @@
+import argparse
 import socket
 import threading
 
 import pygame
 
+from models.AreaCache import AreaCache
 from models.Player import Player
 from systems.AudioSystem import AudioSystem
 from systems.ClientReceiverSystem import ClientReceiverSystem
+from systems.ClientSenderSystem import ClientSenderSystem
 from systems.DrawSystem import DrawSystem
 from systems.InputSystem import InputSystem, Control
 from systems.InteractableSystem import InteractableSystem
 from systems.InventorySystem import InventorySystem
+from systems.PredictionSystem import PredictionSystem
 
 
 class GameClient:
-    def __init__(self):
+    def __init__(self, interpolate: bool = True, predict: bool = True, disk_cache: bool = False):
+        """
+        :param interpolate: Draw other entities slightly in the past, moving smoothly between snapshots, instead of
+                            jumping to where each new snapshot has them.
+        :param predict: Move this client's player as soon as keys are pressed, instead of when the server says so.
+        :param disk_cache: Keep areas in the user's cache directory across restarts. Each takes about 50 MB.
+        """
         pygame.init()
         self.host = '127.0.0.1'
         self.port = 8888
@@ -23,12 +33,19 @@ class GameClient:
         self.clock = pygame.time.Clock()
 
         self.server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.sender = ClientSenderSystem(self.server)
         self.interactable_system = InteractableSystem()
-        self.input_system = InputSystem(self.server, self.interactable_system)
-        self.draw_system = DrawSystem(self.clock, self.input_system, self.interactable_system)
+        self.input_system = InputSystem(self.sender, self.interactable_system)
         self.audio_system = AudioSystem()
-        self.inventory_system = InventorySystem(self.input_system, self.interactable_system, self.server)
-        self.receiver = ClientReceiverSystem(self.server)
+        self.inventory_system = InventorySystem(self.input_system, self.interactable_system, self.sender)
+        self.area_cache = AreaCache(max_areas=4, directory=AreaCache.user_directory() if disk_cache else None,
+                                    max_disk_areas=4)
+        self.receiver = ClientReceiverSystem(self.server, self.sender, self.area_cache)
+        self.draw_system = DrawSystem(self.clock, self.input_system, self.interactable_system,
+                                      self.receiver.history if interpolate else None)
+        self.prediction_system = PredictionSystem(self.sender, self.receiver.history) if predict else None
+        self.input_system.prediction_system = self.prediction_system
+        self.receiver.prediction_system = self.prediction_system
 
         self.input_system.subscribe(Control.QUIT, self.stop)
 
@@ -43,7 +60,7 @@ class GameClient:
     def client_thread(self):
         self.server.connect((self.host, self.port))
         print('Connected to server.')
-        self.server.sendall('connect\n'.encode())
+        self.sender.connect()
         try:
             while self.running:
                 self.receiver.receive_updates()
@@ -65,13 +82,20 @@ class GameClient:
                         self.inventory_system.player = player
 
             self.input_system.handle_events()
+            if self.prediction_system:
+                self.prediction_system.update(self.receiver.area, self.player)
             self.draw_system.draw(self.receiver.area)
             self.audio_system.play()
             self.clock.tick(140)
 
+        self.area_cache.flush()
         pygame.quit()
         self.server.close()
 
 
 if __name__ == '__main__':
-    GameClient().run()
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--disk-cache', action='store_true',
+                        help=f'Keep areas in {AreaCache.user_directory()} across restarts, about 50 MB each.')
+    args = parser.parse_args()
+    GameClient(disk_cache=args.disk_cache).run()
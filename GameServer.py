@@ -1,14 +1,25 @@
+import argparse
 import pygame
+import signal
 import socket
 import threading
+import time
+from collections import deque
 
+from models.Area import Area
 from models.Client import Client
+from models.CollisionBackend import COLLISION_BACKENDS
+from systems.AreaPoolSystem import AreaPoolSystem
 from systems.AreaSystem import AreaSystem
 from systems.DamageSystem import DamageSystem
+from systems.InterestSystem import InterestSystem
 from systems.LootSystem import LootSystem
 from systems.ServerBroadcastSystem import ServerBroadcastSystem
 from systems.MovementSystem import MovementSystem
+from systems.ProfilerSystem import ProfilerSystem
 from systems.ServerReceiverSystem import ServerReceiverSystem
+from systems.ServerSelectorSystem import ServerSelectorSystem
+from systems.ShardSystem import ShardSystem
 from systems.SkillSystem import SkillSystem
 
 
@@ -16,37 +27,117 @@ class GameServer:
     """
     Manager of all server side systems and threads. The entry point for the game server.
     """
+    # Movement speeds and projectile lifetimes are per simulation step, while attack speed is per millisecond of
+    # simulated time, so the simulation rate is fixed. Only how often snapshots are sent can be configured.
+    SIM_RATE = 60
 
-    def __init__(self):
-        pygame.init()
+    def __init__(self, io_mode: str = 'selectors', area_pool_size: int = 2, area_pool_workers: int = 1,
+                 send_rate: int = 60, profile_path: str | None = None, headless: bool = False,
+                 collision: str = 'tiles', interest_radius: int | None = None, interest_margin: int = 100,
+                 shards: int = 0, max_outbound: int = 1 << 20, lag_timeout: float = 5.0):
+        """
+        :param io_mode: 'selectors' services all sockets from the game thread with non-blocking I/O,
+                        'threads' starts a blocking receiver thread per client.
+        :param area_pool_size: Number of areas to generate ahead of time, 0 generates them when needed.
+        :param area_pool_workers: Number of processes generating areas ahead of time.
+        :param send_rate: Snapshots sent to clients per second.
+        :param profile_path: Where to export the tick profile when the server stops, if anywhere.
+        :param headless: Leaves pygame uninitialized, so no display or SDL video is needed. Stops on SIGINT or SIGTERM.
+        :param collision: 'tiles' tests walls against the tile grid, 'mask' overlaps pixel masks of the walls.
+        :param interest_radius: Only send clients the entities within this many pixels of their player, if given.
+        :param interest_margin: Pixels a player can move before the entities it is sent are looked up again. Entities are
+                                sent this much past the interest radius, so none are missed in the meantime.
+        :param shards: Number of worker processes to simulate the areas on, 0 simulates them on the game thread.
+                       Needs the 'selectors' I/O mode, and can't be combined with an interest radius.
+        :param max_outbound: Clients with more bytes than this waiting to be sent, besides the newest snapshot, are
+                             disconnected.
+        :param lag_timeout: Clients that have not started receiving a snapshot for this many seconds, while newer ones
+                            replaced it, are disconnected.
+        """
+        self.started = time.perf_counter()
+        self.headless = headless
+        if not headless:
+            pygame.init()
 
         self.server_id = 1
         self.host = '127.0.0.1'
         self.port = 8888
+        self.io_mode = io_mode
+        self.sim_rate = GameServer.SIM_RATE
+        self.send_rate = send_rate
+        self.max_catch_up_steps = 5  # More than this in one go and the simulation drops time instead
+        self.simulation_time = 0.0  # Milliseconds of simulated time
+        self.clock = time.perf_counter  # Seconds, replaceable to control time in tests
+        self.previous = 0.0  # When the simulation was last advanced
+        self.accumulator = 0.0  # Seconds due to be simulated
+        self.profile_path = profile_path
+        self.max_outbound = max_outbound
+        self.max_dropped_snapshots = int(lag_timeout * send_rate)
         self.running = False
         self.clients: dict[socket.socket, Client] = {}
+        # Client threads queue their clients here, only the game thread changes the clients
+        self.arrivals: deque[Client] = deque()
+        self.departures: deque[Client] = deque()
 
-        self.area_system = AreaSystem()
+        Area.collision_backend = COLLISION_BACKENDS[collision]
+        self.area_pool = AreaPoolSystem(area_pool_size, max_workers=area_pool_workers)
+        self.area_system = AreaSystem(self.area_pool)
         self.loot_system = LootSystem(self.area_system, self.server_id)
         self.movement_system = MovementSystem(self.area_system)
         self.skill_system = SkillSystem(self.area_system)
         self.damage_system = DamageSystem(self.area_system, self.loot_system)
-        self.broadcaster = ServerBroadcastSystem(self.clients, self.area_system)
-        self.receiver = ServerReceiverSystem(self.clients, self.movement_system, self.skill_system, self.area_system)
+        interest_system = InterestSystem(interest_radius, interest_margin) if interest_radius is not None else None
+        self.shard_system = None
+        if shards:
+            if io_mode != 'selectors':
+                raise ValueError('Sharding needs the selectors I/O mode')
+            if interest_system is not None:
+                raise ValueError('Sharding can not be combined with an interest radius')
+            self.shard_system = ShardSystem(shards, self.server_id, self.sim_rate, send_rate, collision)
+        self.broadcaster = ServerBroadcastSystem(self.clients, self.shard_system or self.area_system, interest_system)
+        self.receiver = ServerReceiverSystem(self.clients, self.movement_system, self.skill_system, self.area_system,
+                                             self.sim_rate)
+        self.receiver.broadcaster = self.broadcaster
+        self.receiver.shard_system = self.shard_system
+        self.profiler = ProfilerSystem(1 / self.sim_rate)
+        self.selector_system = None
+        if io_mode == 'selectors':
+            self.selector_system = ServerSelectorSystem(self.clients, self.receiver, self.host, self.port)
+        elif io_mode != 'threads':
+            raise ValueError(f'Unknown I/O mode: {io_mode}')
 
     def run(self):
         self.running = True
-        threading.Thread(target=self.server_thread, daemon=True).start()
+        if self.headless:
+            # Without pygame there is no QUIT event, so stop on signals directly
+            signal.signal(signal.SIGINT, self.stop)
+            signal.signal(signal.SIGTERM, self.stop)
+        if self.shard_system:
+            self.shard_system.start()
+        else:
+            self.area_pool.start()
+        if self.selector_system:
+            self.selector_system.start()
+        else:
+            threading.Thread(target=self.server_thread, daemon=True).start()
+
+        print(f'Started in {(time.perf_counter() - self.started) * 1000:.0f} ms '
+              f'({time.process_time() * 1000:.0f} ms CPU including imports), '
+              f'peak RSS {ProfilerSystem.format_peak_rss()}')
         self.game_thread()
 
+    def stop(self, *_) -> None:
+        self.running = False
+
     def client_thread(self, connection: socket.socket, address: str) -> None:
         """
         Listens for client updates until the client disconnects.
         """
         print(f'Client {address} connected.')
 
-        client = Client(connection)
-        self.clients[connection] = client
+        client = Client(connection, buffered=True)
+        self.arrivals.append(client)
+        threading.Thread(target=self.client_writer_thread, args=(client,), daemon=True).start()
 
         try:
             while self.running:
@@ -54,10 +145,35 @@ class GameServer:
         except ConnectionResetError as e:
             print(e)
         finally:
+            self.departures.append(client)
+
+    def client_writer_thread(self, client: Client) -> None:
+        """
+        Writes what the game thread queues for the client, so a slow client only holds up its own threads.
+        """
+        try:
+            while self.running and client.connection.fileno() != -1:
+                data = client.take_outbound(timeout=0.5)
+                if data:
+                    client.connection.sendall(data)
+                    client.consume(len(data))
+        except OSError:
+            pass  # The client thread finds out that the connection is gone and queues the departure
+
+    def apply_connections(self) -> None:
+        """
+        Adds the clients that client threads accepted and removes those that disconnected since the last tick.
+        """
+        while self.arrivals:
+            client = self.arrivals.popleft()
+            self.clients[client.connection] = client
+        while self.departures:
+            client = self.departures.popleft()
             if client.player:
                 client.player.kill()
-            del self.clients[connection]
-            connection.close()
+            self.clients.pop(client.connection, None)
+            self.receiver.forget(client)
+            client.connection.close()
 
     def server_thread(self) -> None:
         """
@@ -75,28 +191,169 @@ class GameServer:
     def game_thread(self) -> None:
         """
         Runs the game loop until the game is closed.
+        The simulation advances in fixed steps of 1 / sim_rate seconds, catching up when the loop falls behind, while
+        snapshots are sent on their own send_rate schedule.
         """
-        pygame.display.set_caption('Server')
-        clock = pygame.time.Clock()
+        if not self.headless:
+            pygame.display.set_caption('Server')
+        sim_step = 1 / self.sim_rate
+        send_interval = 1 / self.send_rate
+        self.previous = self.clock()
+        next_send = self.previous
+        self.accumulator = 0.0
 
         while self.running:
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    self.running = False
+            self.profiler.start_tick()
+            if not self.headless:
+                for event in pygame.event.get():
+                    if event.type == pygame.QUIT:
+                        self.running = False
+
+            # Commands read since the last tick are applied here in one batch, on this thread only
+            with self.profiler.measure('receive'):
+                if self.selector_system:
+                    self.selector_system.poll()
+                else:
+                    self.apply_connections()
+                self.receiver.process_pending()
+
+            now = self.advance()
+
+            if now >= next_send:
+                with self.profiler.measure('broadcast'):
+                    self.broadcaster.send_updates()
+                self.drop_laggards()
+                next_send = max(next_send + send_interval, now)
+
+            if self.selector_system:
+                with self.profiler.measure('send'):
+                    self.selector_system.flush()
+            self.profiler.end_tick()
 
-            clients = list(self.clients.values())
+            # Wait until the next simulation step or send is due
+            deadline = min(now + sim_step - self.accumulator, next_send)
+            if self.selector_system:
+                # Service sockets instead of sleeping
+                self.selector_system.run_until(deadline)
+            else:
+                time.sleep(max(0.0, deadline - self.clock()))
 
+        if self.selector_system:
+            self.selector_system.stop()
+        self.area_pool.stop()
+        if self.shard_system:
+            self.shard_system.stop()
+        print(self.profiler.report())
+        if self.profile_path:
+            self.profiler.export(self.profile_path)
+        if not self.headless:
+            pygame.quit()
+
+    def advance(self) -> float:
+        """
+        Simulates the steps that have come due since the last call.
+
+        :return: The time on the clock.
+        """
+        sim_step = 1 / self.sim_rate
+        now = self.clock()
+        self.accumulator += now - self.previous
+        self.previous = now
+        steps = 0
+        while self.accumulator >= sim_step:
+            if steps == self.max_catch_up_steps:
+                # Too far behind to catch up, drop the time rather than fall further behind
+                self.profiler.dropped_steps += int(self.accumulator / sim_step)
+                self.accumulator = 0.0
+                break
+            self.simulate()
+            self.accumulator -= sim_step
+            steps += 1
+        return now
+
+    def drop_laggards(self) -> None:
+        """
+        Records the outbound queue depth of every client, and disconnects those that can't keep up with what they are
+        sent. Snapshots waiting for a client are replaced by newer ones, so its queue only keeps growing when there is
+        a backlog of other messages.
+        """
+        depths = {}
+        for client in list(self.clients.values()):
+            depths[client.client_id] = client.queued_bytes()
+            backlog = len(client.outbound)
+            if backlog <= self.max_outbound and client.dropped_snapshots <= self.max_dropped_snapshots:
+                continue
+
+            print(f'Disconnecting client {client.client_id}, {backlog} bytes and {client.dropped_snapshots} '
+                  f'snapshots behind.')
+            self.profiler.laggards += 1
+            if self.selector_system:
+                self.selector_system.disconnect(client)
+                continue
+            # The client thread sees the connection close and queues the departure, which cleans up the rest
+            if client.player:
+                client.player.kill()
+            del self.clients[client.connection]
+            try:
+                client.connection.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        self.profiler.record_queue_depths(depths)
+
+    def simulate(self) -> None:
+        """
+        Advances the game by one simulation step.
+        """
+        clients = list(self.clients.values())
+        if self.shard_system:
+            # The shards simulate on their own, this only takes in what they sent
+            with self.profiler.measure('shards'):
+                self.shard_system.run_once(clients)
+            return
+
+        with self.profiler.measure('area'):
             self.area_system.run_once(clients)
+        with self.profiler.measure('movement'):
             self.movement_system.move()
-            self.skill_system.use_skills()
+        with self.profiler.measure('skills'):
+            self.skill_system.use_skills(int(self.simulation_time))
+        with self.profiler.measure('damage'):
             self.damage_system.apply_damage()
+        with self.profiler.measure('loot'):
             self.loot_system.check_collisions()
-            self.broadcaster.send_updates()
-
-            clock.tick(60)
 
-        pygame.quit()
+        self.simulation_time += 1000 / self.sim_rate
 
 
 if __name__ == '__main__':
-    GameServer().run()
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--io', choices=['selectors', 'threads'], default='selectors',
+                        help='Socket I/O model for client connections.')
+    parser.add_argument('--area-pool-size', type=int, default=2,
+                        help='Number of areas to generate ahead of time, 0 generates them when needed.')
+    parser.add_argument('--area-pool-workers', type=int, default=1,
+                        help='Number of processes generating areas ahead of time.')
+    parser.add_argument('--send-rate', type=int, default=60,
+                        help=f'Snapshots sent to clients per second, the simulation runs at {GameServer.SIM_RATE}.')
+    parser.add_argument('--profile', metavar='PATH',
+                        help='Export per system tick timings as JSON to this path when the server stops.')
+    parser.add_argument('--headless', action='store_true',
+                        help='Run without initializing pygame, for machines without a display.')
+    parser.add_argument('--collision', choices=list(COLLISION_BACKENDS), default='tiles',
+                        help='How movement tests for walls.')
+    parser.add_argument('--interest-radius', type=int,
+                        help='Only send clients the entities within this many pixels of their player.')
+    parser.add_argument('--interest-margin', type=int, default=100,
+                        help='Pixels a player can move before the entities it is sent are looked up again.')
+    parser.add_argument('--shards', type=int, default=0,
+                        help='Number of worker processes to simulate the areas on, 0 simulates them in this process.')
+    parser.add_argument('--max-outbound', type=int, default=1 << 20,
+                        help='Bytes waiting to be sent to a client, besides the newest snapshot, before it is dropped.')
+    parser.add_argument('--lag-timeout', type=float, default=5.0,
+                        help='Seconds a client may go without starting to receive a snapshot before it is dropped.')
+    args = parser.parse_args()
+    GameServer(io_mode=args.io, area_pool_size=args.area_pool_size, area_pool_workers=args.area_pool_workers,
+               send_rate=args.send_rate, profile_path=args.profile,
+               headless=args.headless, collision=args.collision, interest_radius=args.interest_radius,
+               interest_margin=args.interest_margin, shards=args.shards, max_outbound=args.max_outbound,
+               lag_timeout=args.lag_timeout).run()
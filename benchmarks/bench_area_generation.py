@@ -0,0 +1,47 @@
+"""
+Times the steps of generating an area's map at increasing grid sizes.
+
+Run from the repository root: python -m benchmarks.bench_area_generation
+"""
+import random
+import time
+
+from models.Area import Area, TileType
+
+
+def timed(function, repeats: int = 3) -> tuple[float, object]:
+    start = time.perf_counter()
+    for _ in range(repeats):
+        result = function()
+    return (time.perf_counter() - start) / repeats, result
+
+
+def all_pairs_most_distant(tiles: list[list[TileType]]) -> tuple[tuple[int, int], tuple[int, int]]:
+    def distance_squared(a: tuple[int, int], b: tuple[int, int]) -> int:
+        return (a[0] - b[0]) ** 2 + (a[1] - b[1]) ** 2
+
+    empty_tiles = [(i, j) for i, row in enumerate(tiles) for j, tile in enumerate(row) if tile == TileType.EMPTY]
+    return max(((a, b) for a in empty_tiles for b in empty_tiles if a < b), key=lambda x: distance_squared(*x))
+
+
+def main():
+    area = Area(1)
+    for size in (40, 80, 160, 320):
+        area.map_grid_size = size
+        area.random = random.Random(1)
+
+        generate_time, tiles = timed(area.generate_tiles)
+        largest_empty = Area.find_largest_empty(tiles)
+        distant_time, _ = timed(lambda: Area.most_distant_tiles(largest_empty))
+        line = (f'{size:4d}x{size:<4d} generate_tiles {generate_time * 1e3:8.2f} ms, '
+                f'most_distant_tiles {distant_time * 1e3:8.2f} ms')
+
+        # Comparing every pair grows quadratically with the number of empty tiles, so only time it on small maps
+        if size <= 80:
+            all_pairs_time, _ = timed(lambda: all_pairs_most_distant(largest_empty), 1)
+            line += f' (all pairs {all_pairs_time * 1e3:9.2f} ms)'
+        print(line)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+"""
+Measures ServerBroadcastSystem.send_updates with many players in one area, counting how many snapshot encodes happen
+per tick.
+
+Run from the repository root: python -m benchmarks.bench_broadcast
+"""
+import random
+import time
+
+from models.Area import Area
+from models.Client import Client
+from models.Player import Player
+from systems.AreaSystem import AreaSystem
+from systems.ServerBroadcastSystem import ServerBroadcastSystem
+from models.WireProtocol import BINARY_PROTOCOL_VERSION
+
+
+class RecordingClient(Client):
+    def __init__(self):
+        super().__init__(None)
+        self.client_id = random.getrandbits(32)
+        self.protocol_version = BINARY_PROTOCOL_VERSION
+        self.bytes_sent = 0
+
+    def write(self, data: bytes) -> None:
+        self.bytes_sent += len(data)
+
+
+def main():
+    random.seed(1)
+    ticks = 300
+    for num_players in (2, 10, 50):
+        area_system = AreaSystem()
+        area = Area(1)
+        area_system.areas.append(area)
+        clients = {}
+        for i in range(num_players):
+            client = RecordingClient()
+            clients[i] = client
+            client.player = Player(client.client_id, area.get_spawn())
+            area.players.add(client.player)
+        broadcaster = ServerBroadcastSystem(clients, area_system)
+
+        start = time.perf_counter()
+        for _ in range(ticks):
+            for player in area.players:
+                player.move_relative(random.choice((-3, 3)), 0)
+            broadcaster.send_updates()
+            # Every client acknowledges the newest snapshot before the next tick
+            for client in clients.values():
+                broadcaster.acknowledge(client, broadcaster.prev_update[client].number)
+        elapsed = time.perf_counter() - start
+
+        print(f'{num_players:3d} players: {elapsed / ticks * 1e3:7.3f} ms/tick, '
+              f'{broadcaster.encode_count / ticks:5.2f} encodes/tick')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""
+Times MovementSystem moving hundreds of players around an area with each collision backend, along with the wall tests
+on their own and what building each backend costs.
+
+Run from the repository root: python -m benchmarks.bench_collision_backend
+"""
+import random
+import time
+
+from models.Area import Area, TileType
+from models.CollisionBackend import COLLISION_BACKENDS
+from models.Direction import Direction
+from models.Player import Player
+from systems.AreaSystem import AreaSystem
+from systems.MovementSystem import MovementSystem
+
+DIRECTIONS = [Direction.UP, Direction.DOWN, Direction.LEFT, Direction.RIGHT, Direction.UP | Direction.LEFT,
+              Direction.UP | Direction.RIGHT, Direction.DOWN | Direction.LEFT, Direction.DOWN | Direction.RIGHT]
+
+
+def run(backend_name: str, num_players: int, ticks: int) -> tuple[float, float, list[tuple[int, int]]]:
+    rng = random.Random(1)
+    area = Area(1)
+    area.collision_backend = COLLISION_BACKENDS[backend_name]
+    start = time.perf_counter()
+    area.collision
+    build_time = time.perf_counter() - start
+
+    area_system = AreaSystem()
+    area_system.areas.append(area)
+    movement_system = MovementSystem(area_system)
+    empty = [(i, j) for i, row in enumerate(area.tiles) for j, tile in enumerate(row) if tile == TileType.EMPTY]
+    players = []
+    for _ in range(num_players):
+        i, j = rng.choice(empty)
+        player = Player(None, (i * area.scale + rng.randrange(area.scale - 40), j * area.scale + rng.randrange(10)))
+        area.players.add(player)
+        movement_system.start_moving(player, rng.choice(DIRECTIONS))
+        players.append(player)
+
+    start = time.perf_counter()
+    for _ in range(ticks):
+        movement_system.move()
+    move_time = (time.perf_counter() - start) / ticks
+    return move_time, build_time, [player.get_pixel_location() for player in players]
+
+
+def time_wall_tests(area: Area) -> dict[str, float]:
+    rng = random.Random(2)
+    rects = [(rng.randrange(-50, area.map_render_size), rng.randrange(-50, area.map_render_size), 40, 40)
+             for _ in range(100000)]
+    results = {}
+    for name, backend in COLLISION_BACKENDS.items():
+        rect_hits_wall = backend(area).rect_hits_wall
+        start = time.perf_counter()
+        for rect in rects:
+            rect_hits_wall(*rect)
+        results[name] = (time.perf_counter() - start) / len(rects)
+    return results
+
+
+def main():
+    wall_tests = time_wall_tests(Area(1))
+    print('one wall test: ' + ', '.join(f'{name} {seconds * 1e9:6.0f} ns' for name, seconds in wall_tests.items()))
+
+    ticks = 30
+    for num_players in (100, 300, 1000):
+        results = {name: run(name, num_players, ticks) for name in COLLISION_BACKENDS}
+        assert results['tiles'][2] == results['mask'][2]
+        print(f'{num_players:5d} players: ' + ', '.join(
+            f'{name} {move_time * 1e3:6.2f} ms/tick (built in {build_time * 1e3:5.2f} ms)'
+            for name, (move_time, build_time, _) in results.items()) +
+              f', tiles {results["mask"][0] / results["tiles"][0]:4.1f}x faster')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""
+Measures the bytes sent per tick and the time ServerBroadcastSystem.send_updates takes, sending every client its whole
+area against sending only the entities within an interest radius of its player.
+
+Run from the repository root: python -m benchmarks.bench_interest
+"""
+import random
+import time
+
+from pygame import Vector2
+
+from benchmarks.bench_broadcast import RecordingClient
+from models.Area import Area, TileType
+from models.Enemy import NormalEnemy
+from models.Player import Player
+from models.Projectile import Projectile
+from systems.AreaSystem import AreaSystem
+from systems.InterestSystem import InterestSystem
+from systems.ServerBroadcastSystem import ServerBroadcastSystem
+
+
+def make_area(num_players: int) -> tuple[Area, dict[int, RecordingClient]]:
+    random.seed(1)
+    area = Area(1)
+    empty = [(i * area.scale, j * area.scale) for i, row in enumerate(area.tiles) for j, tile in enumerate(row)
+             if tile == TileType.EMPTY]
+    clients = {}
+    for i in range(num_players):
+        client = RecordingClient()
+        client.player = Player(client.client_id, random.choice(empty))
+        area.players.add(client.player)
+        clients[i] = client
+    for _ in range(200):
+        area.enemies.add(NormalEnemy(random.choice(empty), 100))
+    for _ in range(2000):
+        velocity = Vector2()
+        velocity.from_polar((5, random.uniform(0, 360)))
+        area.projectiles.add(Projectile(random.choice(empty), 100000, velocity))
+    return area, clients
+
+
+def run(num_players: int, interest_radius: int | None, ticks: int) -> tuple[float, float]:
+    area, clients = make_area(num_players)
+    area_system = AreaSystem()
+    area_system.areas.append(area)
+    interest_system = InterestSystem(interest_radius) if interest_radius is not None else None
+    broadcaster = ServerBroadcastSystem(clients, area_system, interest_system)
+
+    elapsed = 0.0
+    for tick in range(ticks + 1):
+        for player in area.players:
+            player.move_relative(random.choice((-3, 3)), random.choice((-3, 3)))
+        area.projectiles.move(area)
+        if tick == 1:
+            # The first tick sends everything whole, only count the deltas after it
+            for client in clients.values():
+                client.bytes_sent = 0
+            elapsed = 0.0
+        start = time.perf_counter()
+        broadcaster.send_updates()
+        elapsed += time.perf_counter() - start
+        for client in clients.values():
+            broadcaster.acknowledge(client, broadcaster.prev_update[client].number)
+    return sum(client.bytes_sent for client in clients.values()) / ticks, elapsed / ticks
+
+
+def main():
+    ticks = 60
+    for num_players in (2, 10, 50):
+        results = {radius: run(num_players, radius, ticks) for radius in (None, 700, 400)}
+        whole_bytes, whole_time = results[None]
+        print(f'{num_players:3d} players: whole area {whole_bytes / 1024:7.1f} KB/tick {whole_time * 1e3:6.2f} ms, ' +
+              ', '.join(f'radius {radius} {sent / 1024:7.1f} KB/tick {seconds * 1e3:6.2f} ms '
+                        f'({whole_bytes / sent:4.1f}x less)' for radius, (sent, seconds) in results.items() if radius))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,43 @@
+"""
+Times filling a stash sized LootContainer with loot, looking every piece up again and emptying it, one piece at a time.
+
+Run from the repository root: python -m benchmarks.bench_loot_container
+"""
+import random
+import time
+
+from models.Loot import Loot, LootType
+from models.LootContainer import LootContainer
+
+
+def run(width: int, height: int, sizes: list[tuple[int, int]]) -> tuple[float, float, float, int]:
+    container = LootContainer(width, height)
+    loots = [Loot(1, loot_id, (0, 0), w, h, LootType.BODY) for loot_id, (w, h) in enumerate(sizes)]
+
+    start = time.perf_counter()
+    added = [loot for loot in loots if container.try_add_loot(loot)]
+    add_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for loot in added:
+        container.get_container_position(loot)
+    find_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for loot in added:
+        container.remove(loot)
+    remove_time = time.perf_counter() - start
+    return add_time, find_time, remove_time, len(added)
+
+
+def main():
+    rng = random.Random(1)
+    for width, height, max_size in ((10, 6, 2), (30, 30, 3), (99, 99, 1)):
+        sizes = [(rng.randint(1, max_size), rng.randint(1, max_size)) for _ in range(width * height)]
+        add_time, find_time, remove_time, added = run(width, height, sizes)
+        print(f'{width:2d}x{height:<2d} container, {added:5d} loot: add {add_time * 1e3:8.2f} ms, '
+              f'find {find_time * 1e3:6.2f} ms, remove {remove_time * 1e3:6.2f} ms')
+
+
+if __name__ == '__main__':
+    main()
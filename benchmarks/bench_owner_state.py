@@ -0,0 +1,96 @@
+"""
+Measures the bytes sent to all clients in one area per tick, when every client receives every player's containers and
+gear against when only the owner does and everyone else gets an equipment summary.
+
+Every tick all players move and one of them picks up or drops a piece of loot. The previous format is measured with
+the text protocol, since only text can still carry it.
+
+Run from the repository root: python -m benchmarks.bench_owner_state
+"""
+import json
+import random
+
+from benchmarks.bench_wire_protocol import make_area, make_loot
+from models.Area import Area
+from models.Snapshot import Snapshot
+from models.WireProtocol import WireProtocol
+from systems.ServerBroadcastSystem import ServerBroadcastSystem
+
+
+def shared_broadcast(area: Area) -> dict:
+    # What every client was sent before: each player's public state merged with their private state
+    update = area.to_broadcast()
+    for entry, player in zip(update['players'], area.players):
+        entry.update(player.owner_broadcast())
+    return update
+
+
+def change_one_player(area: Area, tick: int) -> None:
+    players = list(area.players)
+    for player in players:
+        player.move_relative(3, 0)
+    player = players[tick % len(players)]
+    if tick // len(players) % 2 == 0:
+        player.inventory.remove(next(iter(player.inventory.loot.values())))
+    else:
+        player.inventory.try_add_loot(make_loot(100000 + tick))
+
+
+class CountingClient:
+    def __init__(self, player):
+        self.player = player
+        self.protocol_version = 1
+        self.sent = 0
+
+    def send(self, data: bytes) -> None:
+        self.sent += len(data)
+
+
+def main():
+    ticks = 20
+    for num_players in (2, 10, 50):
+        area = make_area(num_players=num_players, num_projectiles=0, num_ground_loot=0)
+        random.seed(2)
+
+        shared = Snapshot.from_broadcast(0, shared_broadcast(area))
+        public = Snapshot.from_broadcast(0, area.to_broadcast())
+        join_shared = len(json.dumps(shared.delta_from(None))) + 1
+        join_public = len(json.dumps(public.delta_from(None))) + 1
+
+        # Bring the owner state of every client up to date before counting
+        owner_system = ServerBroadcastSystem({}, None)
+        json_clients = [CountingClient(player) for player in area.players]
+        binary_clients = [CountingClient(player) for player in area.players]
+        for client in binary_clients:
+            client.protocol_version = 2
+        for client in json_clients + binary_clients:
+            owner_system.send_owner_state(client)
+        join_owner = json_clients[0].sent
+        for client in json_clients + binary_clients:
+            client.sent = 0
+
+        shared_bytes = public_json_bytes = public_binary_bytes = 0
+        for tick in range(1, ticks + 1):
+            change_one_player(area, tick)
+            new_shared = Snapshot.from_broadcast(tick, shared_broadcast(area))
+            new_public = Snapshot.from_broadcast(tick, area.to_broadcast())
+            shared_bytes += num_players * (len(json.dumps(new_shared.delta_from(shared))) + 1)
+            public_json_bytes += num_players * (len(json.dumps(new_public.delta_from(public))) + 1)
+            public_binary_bytes += num_players * len(WireProtocol.encode_snapshot(new_public, public))
+            for client in json_clients + binary_clients:
+                owner_system.send_owner_state(client)
+            shared, public = new_shared, new_public
+
+        owner_json = sum(client.sent for client in json_clients)
+        owner_binary = sum(client.sent for client in binary_clients)
+        shared_tick = shared_bytes / ticks
+        json_tick = (public_json_bytes + owner_json) / ticks
+        binary_tick = (public_binary_bytes + owner_binary) / ticks
+        print(f'{num_players:3d} players: everything to everyone {shared_tick:10.0f} B/tick (json), '
+              f'owner only {json_tick:8.0f} B/tick (json, {shared_tick / json_tick:5.1f}x less), '
+              f'{binary_tick:7.0f} B/tick (binary); '
+              f'joining {join_shared} B before, {join_public + join_owner} B after (json)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""
+Times one simulation tick of projectiles (movement, aging and finding enemy hits) with projectiles stored in a
+ProjectilePool, against the same work done one sprite at a time.
+
+Run from the repository root: python -m benchmarks.bench_projectile_pool
+"""
+import random
+import time
+
+from pygame import Vector2
+
+from models.Area import Area, TileType
+from models.Enemy import NormalEnemy
+from models.Projectile import Projectile
+from models.ProjectilePool import ProjectilePool
+from models.SpatialGroup import SpatialGroup
+from systems.AreaSystem import AreaSystem
+from systems.MovementSystem import MovementSystem
+
+
+def make_projectiles(area: Area, count: int) -> list[Projectile]:
+    empty = [(i, j) for i, row in enumerate(area.tiles) for j, tile in enumerate(row) if tile == TileType.EMPTY]
+    projectiles = []
+    for _ in range(count):
+        i, j = random.choice(empty)
+        velocity = Vector2()
+        velocity.from_polar((5, random.uniform(0, 360)))
+        spawn = i * area.scale + random.randrange(area.scale - 10), j * area.scale + random.randrange(area.scale - 10)
+        projectiles.append(Projectile(spawn, 10000, velocity, 10, 10, 1))
+    return projectiles
+
+
+def pool_tick(area: Area, pool: ProjectilePool, enemies: list[NormalEnemy]) -> int:
+    pool.move(area)
+    pool.age()
+    return len(pool.collide(enemies))
+
+
+def sprite_tick(area: Area, projectiles: SpatialGroup, enemies: list[NormalEnemy],
+                movement_system: MovementSystem) -> int:
+    for projectile in projectiles:
+        velocity = movement_system.try_get_actual_velocity(projectile, area)
+        if velocity is not None and velocity != (0, 0):
+            projectile.move_relative(*velocity)
+    for projectile in projectiles:
+        projectile.age()
+    hits = 0
+    for enemy in enemies:
+        enemy_rect = enemy.get_rect()
+        for projectile in projectiles.query(enemy_rect):
+            if enemy_rect.colliderect(projectile.get_rect()):
+                hits += 1
+    return hits
+
+
+def main():
+    random.seed(1)
+    ticks = 20
+    movement_system = MovementSystem(AreaSystem())
+    for num_projectiles in (1000, 10000):
+        area = Area(1)
+        size = area.map_render_size
+        enemies = [NormalEnemy((random.randrange(size), random.randrange(size)), 10 ** 9) for _ in range(500)]
+        projectiles = make_projectiles(area, num_projectiles)
+
+        pool = ProjectilePool()
+        pool.add(projectiles)
+        start = time.perf_counter()
+        for _ in range(ticks):
+            pool_tick(area, pool, enemies)
+        pool_time = (time.perf_counter() - start) / ticks
+
+        group = SpatialGroup(area.scale, projectiles)
+        start = time.perf_counter()
+        for _ in range(ticks):
+            sprite_tick(area, group, enemies, movement_system)
+        sprite_time = (time.perf_counter() - start) / ticks
+
+        print(f'{num_projectiles:6d} projectiles, 500 enemies: sprites {sprite_time * 1e3:8.2f} ms/tick, '
+              f'pool {pool_time * 1e3:6.2f} ms/tick ({sprite_time / pool_time:5.1f}x), '
+              f'{len(pool)} left after {ticks} ticks')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+"""
+Compares receiving 100 KB snapshots by reading 1024 bytes at a time into a bytes buffer that is split after every
+message, as the receivers used to, with MessageFramer's recv_into reads and offsets. Both text lines and binary frames
+are measured, arriving one at a time and in batches of 20.
+
+The socket is stood in for by an object that hands out the prepared stream, so only the receiving side is measured.
+
+Run from the repository root: python -m benchmarks.bench_receive_buffer
+"""
+import timeit
+
+from models.MessageFramer import MessageFramer
+from models.WireProtocol import MessageType, WireProtocol
+
+
+class StreamConnection:
+    """
+    Returns a prepared byte stream in reads of at most the requested size, counting the reads.
+    """
+
+    def __init__(self, stream: bytes):
+        self.stream = memoryview(stream)
+        self.position = 0
+        self.reads = 0
+
+    def recv(self, size: int) -> bytes:
+        self.reads += 1
+        data = bytes(self.stream[self.position:self.position + size])
+        self.position += len(data)
+        return data
+
+    def recv_into(self, buffer: memoryview) -> int:
+        self.reads += 1
+        size = min(len(buffer), len(self.stream) - self.position)
+        buffer[:size] = self.stream[self.position:self.position + size]
+        self.position += size
+        return size
+
+
+def receive_split(connection: StreamConnection, binary: bool) -> int:
+    """
+    The receivers before MessageFramer.
+    """
+    buffer = b''
+    messages = 0
+    while True:
+        data = connection.recv(1024)
+        if not data:
+            return messages
+        buffer += data
+        while True:
+            if binary:
+                frame = WireProtocol.read_frame(buffer)
+                if frame is None:
+                    break
+                buffer = buffer[frame[2]:]
+            else:
+                if b'\n' not in buffer:
+                    break
+                line, buffer = buffer.split(b'\n', 1)
+            messages += 1
+
+
+def receive_framer(connection: StreamConnection, binary: bool) -> int:
+    framer = MessageFramer()
+    messages = 0
+    while framer.recv_into(connection):
+        while True:
+            message = framer.next_frame() if binary else framer.next_line()
+            if message is None:
+                break
+            messages += 1
+    return messages
+
+
+def main():
+    snapshot_size = 100 * 1024
+    text = b'{' + b'x' * (snapshot_size - 3) + b'}\n'
+    binary = WireProtocol.frame(MessageType.SNAPSHOT, b'x' * (snapshot_size - WireProtocol.HEADER.size))
+
+    for batch in (1, 20):
+        for name, message, is_binary in (('text', text, False), ('binary', binary, True)):
+            stream = message * batch
+            for receive in (receive_split, receive_framer):
+                connection = StreamConnection(stream)
+                assert receive(connection, is_binary) == batch
+                reads = connection.reads
+
+                number = max(1, 200 // batch)
+                seconds = timeit.timeit(lambda: receive(StreamConnection(stream), is_binary), number=number)
+                ms_per_snapshot = seconds / (number * batch) * 1000
+                print(f'{name:>6}, {batch:2d} per batch, {receive.__name__:>14}: {ms_per_snapshot:7.3f} ms '
+                      f'per snapshot, {reads / batch:5.0f} reads per snapshot')
+
+
+if __name__ == '__main__':
+    main()
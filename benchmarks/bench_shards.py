@@ -0,0 +1,69 @@
+"""
+Load test for area sharding: simulates the same number of players per shard with 1, 2 and 4 shards, and measures how
+many simulation steps each shard manages per second. While every shard keeps up with the 60 steps per second the
+players need, total players scale with the number of shards, up to the number of cores.
+
+Every player is in one of its shard's areas, moving and attacking the whole time.
+
+Run from the repository root: python -m benchmarks.bench_shards [players per shard] [seconds]
+"""
+import os
+import sys
+import time
+
+from models.Client import Client
+from models.Direction import Direction
+from models.WireProtocol import MessageType
+from systems.ShardSystem import ShardPlayer, ShardSystem
+
+
+def run(shard_count: int, players_per_shard: int, seconds: float, sim_rate: int = 60) -> list[float]:
+    """
+    :return: Simulation steps per second of each shard.
+    """
+    shard_system = ShardSystem(shard_count, 1, sim_rate, 20, 'tiles', seed=1)
+    shard_system.start()
+    try:
+        client_id = 0
+        for shard in range(shard_count):
+            area = shard_system.create_area(shard)
+            shard_system.chain.append(area)
+            for _ in range(players_per_shard):
+                client_id += 1
+                client = Client(None)
+                client.client_id = client_id
+                client.player = shard_system.players[client_id] = ShardPlayer(shard_system, client_id)
+                shard_system.enter(client.player, area, None)
+                direction = (Direction.LEFT, Direction.RIGHT, Direction.UP, Direction.DOWN)[client_id % 4]
+                shard_system.route(client, MessageType.MOVE, (direction.value,))
+                shard_system.route(client, MessageType.ATTACK, (client_id * 37 % 360, 100.0))
+
+        # Let every shard generate its area and settle before measuring
+        time.sleep(2)
+        shard_system.run_once([])
+        start_steps = [steps for steps, _ in shard_system.steps]
+        start = time.perf_counter()
+        while time.perf_counter() - start < seconds:
+            shard_system.run_once([])
+            time.sleep(0.005)
+        shard_system.run_once([])
+        elapsed = time.perf_counter() - start
+        return [(steps - start_steps[shard]) / elapsed for shard, (steps, _) in enumerate(shard_system.steps)]
+    finally:
+        shard_system.stop()
+
+
+def main():
+    players_per_shard = int(sys.argv[1]) if len(sys.argv) > 1 else 600
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 5.0
+    print(f'{os.cpu_count()} cores, {players_per_shard} players per shard')
+    for shard_count in (1, 2, 4):
+        rates = run(shard_count, players_per_shard, seconds)
+        total_players = shard_count * players_per_shard
+        player_steps = sum(rates) * players_per_shard
+        print(f'{shard_count} shards, {total_players:4d} players: '
+              f'{min(rates):5.1f}-{max(rates):5.1f} steps/s per shard, {player_steps:8.0f} player steps/s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""
+Compares finding projectile/enemy collisions by testing every pair against querying the area's spatial grid, and
+measures what keeping the grid up to date costs when every projectile moves once.
+
+Run from the repository root: python -m benchmarks.bench_spatial_hash
+"""
+import random
+import time
+
+from pygame import Vector2
+
+from models.Area import Area
+from models.Enemy import NormalEnemy
+from models.Projectile import Projectile
+from models.SpatialGroup import SpatialGroup
+
+
+def populate(area: Area, num_projectiles: int, num_enemies: int) -> SpatialGroup:
+    # Areas keep their projectiles in a ProjectilePool, so the projectiles get a grid of their own here
+    projectiles = SpatialGroup(area.scale)
+    size = area.map_render_size
+    for _ in range(num_enemies):
+        area.enemies.add(NormalEnemy((random.randrange(size), random.randrange(size)), 100))
+    for _ in range(num_projectiles):
+        projectiles.add(Projectile((random.randrange(size), random.randrange(size)), 100, Vector2(3, 0)))
+    return projectiles
+
+
+def brute_force(area: Area, projectiles: SpatialGroup) -> int:
+    hits = 0
+    for enemy in area.enemies:
+        enemy_rect = enemy.image.get_rect(topleft=enemy.get_pixel_location())
+        for projectile in projectiles:
+            proj_rect = projectile.image.get_rect(topleft=projectile.get_pixel_location())
+            if enemy_rect.colliderect(proj_rect):
+                hits += 1
+    return hits
+
+
+def grid(area: Area, projectiles: SpatialGroup) -> int:
+    hits = 0
+    for enemy in area.enemies:
+        enemy_rect = enemy.get_rect()
+        for projectile in projectiles.query(enemy_rect):
+            if enemy_rect.colliderect(projectile.get_rect()):
+                hits += 1
+    return hits
+
+
+def timed(function, repeats: int) -> tuple[float, int]:
+    start = time.perf_counter()
+    for _ in range(repeats):
+        result = function()
+    return (time.perf_counter() - start) / repeats, result
+
+
+def main():
+    random.seed(1)
+    for num_projectiles, num_enemies in ((250, 125), (500, 250), (1000, 500), (2000, 1000)):
+        area = Area(1)
+        projectiles = populate(area, num_projectiles, num_enemies)
+
+        brute_time, brute_hits = timed(lambda: brute_force(area, projectiles), 3)
+        grid_time, grid_hits = timed(lambda: grid(area, projectiles), 20)
+        assert brute_hits == grid_hits, (brute_hits, grid_hits)
+
+        def move_all():
+            for projectile in projectiles:
+                projectile.move_relative(3, 0)
+        move_time, _ = timed(move_all, 20)
+
+        print(f'{num_projectiles:5d} projectiles, {num_enemies:5d} enemies: '
+              f'all pairs {brute_time * 1e3:8.2f} ms, grid {grid_time * 1e3:6.2f} ms '
+              f'({brute_time / grid_time:5.1f}x), moving all projectiles {move_time * 1e3:5.2f} ms, '
+              f'{grid_hits} hits')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+"""
+Compares the text (JSON) and binary wire protocols for a busy area.
+
+Run from the repository root: python -m benchmarks.bench_wire_protocol
+"""
+import json
+import random
+import timeit
+
+from pygame import Vector2
+
+from models.Area import Area
+from models.Loot import RingLoot, GearSlot
+from models.LootModifier import LootModifier, ModifierType
+from models.Player import Player
+from models.Projectile import Projectile
+from models.Snapshot import Snapshot
+from models.WireProtocol import WireProtocol
+from systems.EnemySystem import EnemySystem
+
+
+def make_loot(loot_id: int) -> RingLoot:
+    loot = RingLoot(1, loot_id, (random.randint(0, 2000), random.randint(0, 2000)))
+    for modifier_id in range(random.randint(1, 3)):
+        modifier_type = random.choice(list(ModifierType))
+        loot.modifiers.append(LootModifier(1, loot_id, loot_id * 10 + modifier_id, modifier_type, [random.randint(1, 100)]))
+    return loot
+
+
+def make_area(num_players: int, num_projectiles: int, num_ground_loot: int) -> Area:
+    random.seed(1)
+    area = Area(1)
+    EnemySystem().spawn_enemies(area)
+    loot_id = 1
+    for client_id in range(num_players):
+        player = Player(client_id, area.get_spawn())
+        for _ in range(40):
+            player.inventory.try_add_loot(make_loot(loot_id))
+            loot_id += 1
+        for slot in list(GearSlot)[13:21]:
+            player.set_gear(slot, make_loot(loot_id))
+            loot_id += 1
+        area.players.add(player)
+    for _ in range(num_projectiles):
+        velocity = Vector2()
+        velocity.from_polar((5, random.uniform(0, 360)))
+        area.projectiles.add(Projectile((random.randint(0, 2000), random.randint(0, 2000)), 60, velocity, damage=3))
+    for _ in range(num_ground_loot):
+        area.loots.add(make_loot(loot_id))
+        loot_id += 1
+    return area
+
+
+def step(area: Area) -> None:
+    for player in area.players:
+        player.move_relative(3, 0)
+    # Moves through walls, unlike ProjectilePool.move, so every projectile changes
+    area.projectiles.x += area.projectiles.vx
+    area.projectiles.y -= area.projectiles.vy
+
+
+def bench(label: str, func, number: int) -> float:
+    seconds = timeit.timeit(func, number=number) / number
+    print(f'  {label:<34} {seconds * 1e3:9.3f} ms')
+    return seconds
+
+
+def main():
+    area = make_area(num_players=10, num_projectiles=300, num_ground_loot=50)
+    full = Snapshot.from_broadcast(1, area.to_broadcast())
+    step(area)
+    moved = Snapshot.from_broadcast(2, area.to_broadcast())
+
+    for label, snapshot, baseline in (('Full snapshot', full, None), ('Delta after one tick', moved, full)):
+        json_frame = (json.dumps(snapshot.delta_from(baseline)) + '\n').encode()
+        binary_frame = WireProtocol.encode_snapshot(snapshot, baseline)
+        _, payload, _ = WireProtocol.read_frame(binary_frame)
+        print(f'{label}')
+        print(f'  {"json bytes":<34} {len(json_frame):9d}')
+        print(f'  {"binary bytes":<34} {len(binary_frame):9d}  ({len(json_frame) / len(binary_frame):.1f}x smaller)')
+
+        json_encode = bench('json encode', lambda: (json.dumps(snapshot.delta_from(baseline)) + '\n').encode(), 50)
+        binary_encode = bench('binary encode', lambda: WireProtocol.encode_snapshot(snapshot, baseline), 50)
+        print(f'  {"encode speedup":<34} {json_encode / binary_encode:9.1f}x')
+
+        json_decode = bench('json decode', lambda: json.loads(json_frame), 50)
+        binary_decode = bench('binary decode', lambda: WireProtocol.decode_snapshot(payload), 50)
+        print(f'  {"decode speedup":<34} {json_decode / binary_decode:9.1f}x')
+
+        client_area = Area.from_broadcast(full.to_broadcast())
+
+        def apply(delta):
+            Area.from_broadcast(Snapshot.from_delta(delta, baseline).to_broadcast(), client_area)
+
+        json_apply = bench('json decode + Area.from_broadcast', lambda: apply(json.loads(json_frame)), 20)
+        binary_apply = bench('binary decode + Area.from_broadcast', lambda: apply(WireProtocol.decode_snapshot(payload)), 20)
+        print(f'  {"decode + apply speedup":<34} {json_apply / binary_apply:9.1f}x')
+        if baseline is None:
+            continue
+
+        # What the client does when the baseline is the snapshot it applied last, only touching what changed
+        def merge(delta):
+            client_area.merge_delta(delta, Snapshot.from_delta(delta, baseline), baseline)
+
+        binary_merge = bench('binary decode + Area.merge_delta', lambda: merge(WireProtocol.decode_snapshot(payload)),
+                             20)
+        print(f'  {"against json + from_broadcast":<34} {json_apply / binary_merge:9.1f}x')
+
+
+if __name__ == '__main__':
+    main()
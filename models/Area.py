@@ -1,15 +1,22 @@
 import sys
 from enum import IntEnum
+from typing import Callable, TYPE_CHECKING
 
-import pygame
-from pygame import Surface, Mask
-from pygame.sprite import Group
+import numpy
 
-from models.Enemy import EnemyType, NormalEnemy, BossEnemy
+from models.CollisionBackend import CollisionBackend, TileCollisionBackend
+from models.Enemy import Enemy, EnemyType, NormalEnemy, BossEnemy
+from models.Entity import Entity
 from models.ExitDoor import ExitDoor
 from models.Loot import Loot
 from models.Player import Player
-from models.Projectile import Projectile
+from models.ProjectilePool import ProjectilePool
+from models.SpatialGroup import SpatialGroup
+from models.WireProtocol import WireProtocol
+
+if TYPE_CHECKING:
+    from models.AreaCache import AreaCache
+    from models.Snapshot import Snapshot
 
 
 class TileType(IntEnum):
@@ -21,7 +28,13 @@ class TileType(IntEnum):
 
 
 class Area:
-    def __init__(self, seed: int | None = None):
+    collision_backend: type[CollisionBackend] = TileCollisionBackend
+
+    def __init__(self, seed: int | None = None, tiles: list[list[TileType]] | None = None):
+        """
+        :param seed: Seed the map is generated from, random if not given.
+        :param tiles: Tiles that were already generated and populated from the seed, to skip generating them again.
+        """
         import random
         if seed is None:
             seed = random.randrange(sys.maxsize)
@@ -34,19 +47,35 @@ class Area:
         self.map_grid_size = 40
         self.map_render_size = 2000
 
-        self.tiles = self.generate_tiles()
+        if tiles is None:
+            self.tiles = self.generate_tiles()
+            self.populate_tiles(self.tiles)
+        else:
+            self.tiles = tiles
+            self._spawn = next((i, j) for i, row in enumerate(tiles) for j, tile in enumerate(row)
+                               if tile == TileType.SPAWN)
+            self._boss = next((i, j) for i, row in enumerate(tiles) for j, tile in enumerate(row)
+                              if tile == TileType.BOSS)
         self.scale = self.map_render_size // len(self.tiles)
-        self.populate_tiles(self.tiles)
 
-        self.mask = self._get_mask()
+        self._collision: CollisionBackend | None = None
         self.floor_surface = None
         self.wall_surface = None
 
         self.exit: ExitDoor | None = None
-        self.players = Group()
-        self.projectiles = Group()
-        self.enemies = Group()
-        self.loots = Group()
+        self.players = SpatialGroup(self.scale)
+        self.projectiles = ProjectilePool()
+        self.enemies = SpatialGroup(self.scale)
+        self.loots = SpatialGroup(self.scale)
+
+    @property
+    def collision(self) -> CollisionBackend:
+        """
+        Tests rects against the walls, built the first time it is needed since clients never move anything themselves.
+        """
+        if self._collision is None:
+            self._collision = self.collision_backend(self)
+        return self._collision
 
     def get_spawn(self) -> tuple[int, int]:
         unscaled_spawn = self._spawn
@@ -57,33 +86,30 @@ class Area:
         return unscaled_boss[0] * self.scale, unscaled_boss[1] * self.scale
 
     def generate_tiles(self) -> list[list[TileType]]:
-        tiles = [x[:] for x in [[TileType.EMPTY] * self.map_grid_size] * self.map_grid_size]
+        size = self.map_grid_size
+        tiles = numpy.zeros((size, size), dtype=numpy.uint8)
 
-        rng = range(self.map_grid_size)
-        for i in rng:
-            if i == 0 or i == self.map_grid_size - 1:
-                continue
-            for j in rng:
-                if j == 0 or j == self.map_grid_size - 1 or self.random.randint(0, 99) < 40:  # 40% chance of wall
-                    tiles[i][j] = TileType.WALL
+        # The first and last rows start empty, they only become walls after the first smoothing pass.
+        # Random numbers are drawn in the same order as always, so the same seed gives the same map on every version.
+        if size > 2:
+            tiles[1:-1, 0] = TileType.WALL
+            tiles[1:-1, -1] = TileType.WALL
+            noise = [self.random.randint(0, 99) < 40 for _ in range((size - 2) ** 2)]  # 40% chance of wall
+            tiles[1:-1, 1:-1] = numpy.array(noise, dtype=numpy.uint8).reshape(size - 2, size - 2)
 
         for _ in range(10):
-            new_tiles = [[TileType.EMPTY] * self.map_grid_size for _ in rng]
-
-            for i in rng:
-                for j in rng:
-                    if j == 0 or j == self.map_grid_size - 1 or i == 0 or i == self.map_grid_size - 1:
-                        new_tiles[i][j] = TileType.WALL
-                    else:
-                        if (tiles[i - 1][j - 1] + tiles[i - 1][j] + tiles[i - 1][j + 1] +
-                                           tiles[i][j - 1] + tiles[i][j] + tiles[i][j + 1] +
-                                           tiles[i + 1][j - 1] + tiles[i + 1][j] + tiles[i + 1][j + 1]) >= 5:
-                            new_tiles[i][j] = TileType.WALL
-                    j += 1
-                i += 1
+            # Sum each interior tile's 3x3 neighborhood by adding the grid to itself shifted in all nine directions
+            neighbors = numpy.zeros((size - 2, size - 2), dtype=numpy.uint8)
+            for di in range(3):
+                for dj in range(3):
+                    neighbors += tiles[di:di + size - 2, dj:dj + size - 2]
+
+            new_tiles = numpy.full((size, size), TileType.WALL, dtype=numpy.uint8)
+            new_tiles[1:-1, 1:-1] = neighbors >= 5
             tiles = new_tiles
 
-        return tiles
+        wall, empty = TileType.WALL, TileType.EMPTY
+        return [[wall if tile else empty for tile in row] for row in tiles.tolist()]
 
     def populate_tiles(self, original_tiles: list[list[TileType]]) -> None:
         """
@@ -137,16 +163,40 @@ class Area:
         def distance_squared(a: tuple[int, int], b: tuple[int, int]) -> int:
             return (a[0] - b[0]) ** 2 + (a[1] - b[1]) ** 2
 
+        # The farthest pair is always made of two convex hull vertices, so only those pairs need to be compared.
+        # Comparing them in sorted order picks the same pair as comparing every pair of empty tiles would on a tie.
         empty_tiles = [(i, j) for i, row in enumerate(tiles) for j, tile in enumerate(row) if tile == TileType.EMPTY]
-        return max(((a, b) for a in empty_tiles for b in empty_tiles if a < b), key=lambda x: distance_squared(*x))
+        hull = sorted(Area.convex_hull(empty_tiles))
+        pairs = ((a, b) for index, a in enumerate(hull) for b in hull[index + 1:])
+        return max(pairs, key=lambda x: distance_squared(*x))
 
-    def _get_mask(self) -> Mask:
-        surface = Surface((self.map_render_size, self.map_render_size), pygame.SRCALPHA)
-        for i, row in enumerate(self.tiles):
-            for j, tile in enumerate(row):
-                if tile == TileType.WALL:
-                    pygame.draw.rect(surface, (255, 255, 255), (i * self.scale, j * self.scale, self.scale, self.scale))
-        return pygame.mask.from_surface(surface)
+    @staticmethod
+    def convex_hull(points: list[tuple[int, int]]) -> list[tuple[int, int]]:
+        """
+        Returns the vertices of the convex hull of the points, leaving out points that lie on an edge.
+
+        :param points: The points, sorted.
+        :return: The hull's vertices in counterclockwise order.
+        """
+        def cross(o: tuple[int, int], a: tuple[int, int], b: tuple[int, int]) -> int:
+            return (a[0] - o[0]) * (b[1] - o[1]) - (a[1] - o[1]) * (b[0] - o[0])
+
+        if len(points) <= 2:
+            return list(points)
+
+        lower = []
+        for point in points:
+            while len(lower) >= 2 and cross(lower[-2], lower[-1], point) <= 0:
+                lower.pop()
+            lower.append(point)
+
+        upper = []
+        for point in reversed(points):
+            while len(upper) >= 2 and cross(upper[-2], upper[-1], point) <= 0:
+                upper.pop()
+            upper.append(point)
+
+        return lower[:-1] + upper[:-1]
 
     @staticmethod
     def flood_fill(holey_tiles: list[list[TileType]], i: int, j: int) -> int:
@@ -183,51 +233,119 @@ class Area:
         return {
             'seed': self.seed,
             'players': [player.to_broadcast() for player in self.players],
-            'projectiles': [projectile.to_broadcast() for projectile in self.projectiles],
+            'projectiles': self.projectiles.to_broadcast(),
             'enemies': [enemy.to_broadcast() for enemy in self.enemies],
             'loot': [loot.to_broadcast() for loot in self.loots],
             'exit': self.exit.to_broadcast() if self.exit else None
         }
 
+    def clear_entities(self) -> None:
+        self.players.empty()
+        self.projectiles.empty()
+        self.enemies.empty()
+        self.loots.empty()
+        if self.exit:
+            self.exit.kill()
+        self.exit = None
+
     @staticmethod
-    def from_broadcast(update: dict, diff_from_area = None) -> 'Area':
+    def from_broadcast(update: dict, diff_from_area = None, area_cache: 'AreaCache | None' = None) -> 'Area':
         if diff_from_area and diff_from_area.seed == update['seed']:
             area = diff_from_area
+        elif area_cache:
+            # A cached area still holds the entities from the last time it was seen
+            area = area_cache.get(update['seed'])
+            area.clear_entities()
         else:
             area = Area(update['seed'])
 
-        for player_update in update['players']:
-            client_id = int(player_update['client_id'])
-            player = next((p for p in area.players if p.client_id == client_id), None)
-            if player:
-                player.merge_broadcast(player_update)
-            else:
-                area.players.add(Player.from_broadcast(player_update))
-
-        for player in area.players:
-            if player.client_id not in [int(player_update['client_id']) for player_update in update['players']]:
-                player.kill()
-
-        area.projectiles.empty()
-        area.projectiles.add([Projectile.from_broadcast(projectile) for projectile in update['projectiles']])
-
-        area.enemies.empty()
-        for enemy_update in update['enemies']:
-            enemy_type = int(enemy_update['type'])
-            if enemy_type == EnemyType.NORMAL:
-                area.enemies.add(NormalEnemy.from_broadcast(enemy_update))
-            elif enemy_type == EnemyType.BOSS:
-                area.enemies.add(BossEnemy.from_broadcast(enemy_update))
-            else:
-                raise ValueError(f'Unknown enemy type: {enemy_type}')
-
-        area.loots.empty()
-        for loot_update in update['loot']:
-            loot = Loot.from_broadcast(loot_update)
-            area.loots.add(loot)
+        # Entities are matched by id and updated in place, so only those entering or leaving the broadcast are created
+        # or removed. Players keep being matched by client id, which is what the rest of the client looks them up by.
+        Area._reconcile(area.players, update['players'], Player.from_broadcast, 'client_id', 'client_id')
+        area.projectiles.merge_broadcast(update['projectiles'])
+        Area._reconcile(area.enemies, update['enemies'], Area._enemy_from_broadcast)
+        Area._reconcile(area.loots, update['loot'], Loot.from_broadcast)
 
         if area.exit:
             area.exit.kill()
         area.exit = ExitDoor.from_broadcast(update['exit']) if update['exit'] else None
 
         return area
+
+    def merge_delta(self, delta: dict, snapshot: 'Snapshot', baseline: 'Snapshot') -> None:
+        """
+        Applies a delta to an area that is in the state of the delta's baseline. Unlike from_broadcast, only the
+        entities that changed or were removed are looked at.
+
+        :param snapshot: The snapshot the delta was turned into, which has the whole of each changed entity.
+        :param baseline: The snapshot the area was last updated to.
+        """
+        Area._merge_changes(self.players, 'players', delta, snapshot, baseline, Player.from_broadcast, 'client_id',
+                            'client_id')
+        records = delta['projectiles'].get('records')
+        if records is None:
+            # Text deltas only have the fields that changed
+            projectiles = snapshot.groups['projectiles']
+            records = numpy.array([tuple(projectiles[fields['id']][field] for field in WireProtocol.RECORD.names)
+                                   for fields in delta['projectiles']['changed']], dtype=WireProtocol.RECORD)
+        self.projectiles.merge_records(records, delta['projectiles']['removed'])
+        Area._merge_changes(self.enemies, 'enemies', delta, snapshot, baseline, Area._enemy_from_broadcast)
+        Area._merge_changes(self.loots, 'loot', delta, snapshot, baseline, Loot.from_broadcast)
+
+        if snapshot.exit != baseline.exit:
+            if self.exit:
+                self.exit.kill()
+            self.exit = ExitDoor.from_broadcast(snapshot.exit) if snapshot.exit else None
+
+    @staticmethod
+    def _merge_changes(group: SpatialGroup, name: str, delta: dict, snapshot: 'Snapshot', baseline: 'Snapshot',
+                       create: Callable[[dict], Entity], attribute: str = 'entity_id', field: str = 'id') -> None:
+        """
+        Like _reconcile, for the entities of one group that a delta changed or removed.
+        """
+        changed, removed = delta[name]['changed'], delta[name]['removed']
+        if not changed and not removed:
+            return
+        existing = {getattr(entity, attribute): entity for entity in group}
+        old_entities = baseline.groups[name]
+        for entity_id in removed:
+            entity = existing.pop(old_entities[entity_id][field], None)
+            if entity is not None:
+                entity.kill()
+        entities = snapshot.groups[name]
+        for fields in changed:
+            entity_update = entities[fields['id']]
+            entity = existing.get(int(entity_update[field]))
+            if entity is None:
+                group.add(create(entity_update))
+            else:
+                entity.merge_broadcast(entity_update)
+
+    @staticmethod
+    def _reconcile(group: SpatialGroup, updates: list[dict], create: Callable[[dict], Entity],
+                   attribute: str = 'entity_id', field: str = 'id') -> None:
+        """
+        Updates the entities in the group that are still in the broadcast, creates those that are new to it and removes
+        those that are no longer in it.
+
+        :param attribute: The entity attribute to match entities by.
+        :param field: The broadcast field holding the same value.
+        """
+        existing = {getattr(entity, attribute): entity for entity in group}
+        for entity_update in updates:
+            entity = existing.pop(int(entity_update[field]), None)
+            if entity is None:
+                group.add(create(entity_update))
+            else:
+                entity.merge_broadcast(entity_update)
+        for entity in existing.values():
+            entity.kill()
+
+    @staticmethod
+    def _enemy_from_broadcast(data: dict) -> Enemy:
+        enemy_type = int(data['type'])
+        if enemy_type == EnemyType.NORMAL:
+            return NormalEnemy.from_broadcast(data)
+        if enemy_type == EnemyType.BOSS:
+            return BossEnemy.from_broadcast(data)
+        raise ValueError(f'Unknown enemy type: {enemy_type}')
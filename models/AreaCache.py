@@ -0,0 +1,122 @@
+import json
+import os
+from collections import OrderedDict
+
+import pygame
+
+from models.Area import Area, TileType
+
+
+class AreaCache:
+    """
+    Least recently used cache of areas by seed, so returning to an area doesn't generate its tiles or render its floor
+    and wall surfaces again.
+
+    When a directory is given, areas are also written there when they are evicted or the cache is flushed, and read
+    back from there when they aren't in memory. That keeps them across restarts of the client.
+    """
+    version = 1  # Stored with the tiles, bump it when generated areas change
+
+    def __init__(self, max_areas: int = 4, directory: str | None = None, max_disk_areas: int = 8):
+        """
+        :param max_areas: Number of areas to keep in memory. Each holds about 50 MB of surfaces once drawn.
+        :param directory: Where to keep areas on disk, or None to only keep them in memory.
+        :param max_disk_areas: Number of areas to keep on disk.
+        """
+        self.max_areas = max_areas
+        self.directory = directory
+        self.max_disk_areas = max_disk_areas
+        self.areas: OrderedDict[int, Area] = OrderedDict()
+
+    @staticmethod
+    def user_directory() -> str:
+        """
+        :return: The directory areas are kept in for the current user, under the platform's cache directory.
+        """
+        if os.name == 'nt':
+            base = os.environ.get('LOCALAPPDATA') or os.path.expanduser('~/AppData/Local')
+        else:
+            base = os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache')
+        return os.path.join(base, 'pygame-mmo', 'areas')
+
+    def get(self, seed: int) -> Area:
+        """
+        Returns the area for the seed, from memory, from disk or newly generated.
+        """
+        area = self.areas.pop(seed, None)
+        if area is None:
+            area = self.load(seed) or Area(seed)
+        self.areas[seed] = area
+
+        while len(self.areas) > self.max_areas:
+            _, evicted = self.areas.popitem(last=False)
+            self.save(evicted)
+        return area
+
+    def flush(self) -> None:
+        for area in self.areas.values():
+            self.save(area)
+
+    def save(self, area: Area) -> None:
+        if self.directory is None:
+            return
+
+        os.makedirs(self.directory, exist_ok=True)
+        tiles_path, floor_path, walls_path = self._paths(area.seed)
+        with open(tiles_path, 'w') as f:
+            json.dump({'version': self.version, 'tiles': area.tiles}, f)
+
+        # Surfaces are only rendered once per seed, so a file that exists already holds the same image
+        if area.floor_surface and not os.path.exists(floor_path):
+            pygame.image.save(area.floor_surface, floor_path)
+        if area.wall_surface and not os.path.exists(walls_path):
+            pygame.image.save(area.wall_surface, walls_path)
+
+        self._prune()
+
+    def load(self, seed: int) -> Area | None:
+        if self.directory is None:
+            return None
+
+        tiles_path, floor_path, walls_path = self._paths(seed)
+        if not os.path.exists(tiles_path):
+            return None
+        try:
+            with open(tiles_path) as f:
+                saved = json.load(f)
+            if saved['version'] != self.version:
+                return None
+            area = Area(seed, [[TileType(tile) for tile in row] for row in saved['tiles']])
+            if os.path.exists(floor_path):
+                area.floor_surface = self._load_surface(floor_path)
+            if os.path.exists(walls_path):
+                area.wall_surface = self._load_surface(walls_path)
+        except (OSError, ValueError, KeyError, pygame.error) as e:
+            print(f'Ignoring cached area {seed}: {e}')
+            return None
+
+        os.utime(tiles_path)  # Keeps recently used areas from being pruned
+        return area
+
+    def _prune(self) -> None:
+        tiles_paths = [os.path.join(self.directory, name) for name in os.listdir(self.directory)
+                       if name.endswith('.json')]
+        tiles_paths.sort(key=os.path.getmtime, reverse=True)
+        for tiles_path in tiles_paths[self.max_disk_areas:]:
+            seed = int(os.path.basename(tiles_path)[:-len('.json')])
+            for path in self._paths(seed):
+                if os.path.exists(path):
+                    os.remove(path)
+
+    def _paths(self, seed: int) -> tuple[str, str, str]:
+        # Bitmaps are large on disk but load far faster than PNGs, which would take longer than rendering again
+        return (os.path.join(self.directory, f'{seed}.json'),
+                os.path.join(self.directory, f'{seed}_floor.bmp'),
+                os.path.join(self.directory, f'{seed}_walls.bmp'))
+
+    @staticmethod
+    def _load_surface(path: str) -> pygame.Surface:
+        surface = pygame.image.load(path)
+        if pygame.display.get_surface():
+            surface = surface.convert_alpha()
+        return surface
@@ -1,11 +1,72 @@
 import socket
+import threading
 
 from models.Player import Player
+from models.WireProtocol import TEXT_PROTOCOL_VERSION
 
 
 class Client:
-    def __init__(self, connection: socket.socket):
+    WRITE_SIZE = 65536  # Most outbound data handed to one write
+
+    def __init__(self, connection: socket.socket, buffered: bool = False):
         self.client_id = id(connection)
         self.connection = connection
         self.player: Player | None = None
-        self.buffer: str = ''
+        self.protocol_version = TEXT_PROTOCOL_VERSION
+
+        # Buffered clients are written by an I/O loop or thread, so outbound data is queued until that gets to it.
+        # Everything is sent in order except snapshots, which are replaced by newer ones while they wait.
+        self.buffered = buffered
+        self.outbound = bytearray()
+        self.snapshot: bytes | None = None  # The newest snapshot, queued once everything before it is written
+        self.dropped_snapshots = 0  # Snapshots replaced since one was last queued
+        self.ready = threading.Condition()  # Guards the outbound data, which an I/O thread may be waiting for
+
+    def send(self, data: bytes) -> None:
+        if self.buffered:
+            with self.ready:
+                self.outbound += data
+                self.ready.notify()
+        else:
+            self.write(data)
+
+    def send_snapshot(self, data: bytes) -> None:
+        """
+        Sends a snapshot. A buffered client that has not started receiving it before the next one is sent never will.
+        """
+        if not self.buffered:
+            self.write(data)
+            return
+
+        with self.ready:
+            if self.snapshot is not None:
+                self.dropped_snapshots += 1
+            self.snapshot = data
+            self.ready.notify()
+
+    def write(self, data: bytes) -> None:
+        """
+        Writes to the socket directly, which is how everything is sent to clients that aren't buffered.
+        """
+        self.connection.sendall(data)
+
+    def take_outbound(self, timeout: float = 0) -> bytes:
+        """
+        Returns up to WRITE_SIZE bytes to write next, after waiting up to the timeout for some if there is none.
+        Call consume with how much of it was written.
+        """
+        with self.ready:
+            if timeout and not self.outbound and self.snapshot is None:
+                self.ready.wait(timeout)
+            if not self.outbound and self.snapshot is not None:
+                self.outbound += self.snapshot
+                self.snapshot = None
+                self.dropped_snapshots = 0
+            return bytes(self.outbound[:Client.WRITE_SIZE])
+
+    def consume(self, count: int) -> None:
+        with self.ready:
+            del self.outbound[:count]
+
+    def queued_bytes(self) -> int:
+        return len(self.outbound) + (len(self.snapshot) if self.snapshot is not None else 0)
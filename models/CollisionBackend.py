@@ -0,0 +1,114 @@
+from typing import TYPE_CHECKING
+
+import numpy
+from pygame import Mask
+
+if TYPE_CHECKING:
+    from models.Area import Area
+
+
+class CollisionBackend:
+    """
+    Answers whether rects overlap an area's walls. Areas build the backend chosen by Area.collision_backend the first
+    time they are asked for collisions.
+    """
+
+    def __init__(self, area: 'Area'):
+        self.scale = area.scale
+        self.size = area.map_render_size
+
+    def rect_hits_wall(self, x: int, y: int, width: int, height: int) -> bool:
+        """
+        :param x: Left edge in pixels.
+        :param y: Top edge in pixels.
+        :param width: Width in pixels.
+        :param height: Height in pixels.
+        :return: Whether the rect overlaps a wall.
+        """
+        raise NotImplementedError
+
+    def rects_hit_walls(self, x: numpy.ndarray, y: numpy.ndarray, width: numpy.ndarray,
+                        height: numpy.ndarray) -> numpy.ndarray:
+        """
+        Tests many rects at once, with the same parameters as rect_hits_wall given as arrays.
+
+        :return: Whether each rect overlaps a wall.
+        """
+        return numpy.array([self.rect_hits_wall(*rect) for rect in zip(
+            numpy.asarray(x, dtype=numpy.int64).tolist(), numpy.asarray(y, dtype=numpy.int64).tolist(),
+            numpy.asarray(width).tolist(), numpy.asarray(height).tolist())], dtype=bool)
+
+
+class MaskCollisionBackend(CollisionBackend):
+    """
+    Overlaps a filled mask of the rect with a pixel mask of every wall in the area.
+    """
+    _rect_masks: dict[tuple[int, int], Mask] = {}
+
+    def __init__(self, area: 'Area'):
+        super().__init__(area)
+        from models.Area import TileType
+        self.mask = Mask((self.size, self.size))
+        wall = Mask((self.scale, self.scale), fill=True)
+        for i, row in enumerate(area.tiles):
+            for j, tile in enumerate(row):
+                if tile == TileType.WALL:
+                    self.mask.draw(wall, (i * self.scale, j * self.scale))
+
+    def rect_hits_wall(self, x: int, y: int, width: int, height: int) -> bool:
+        size = width, height
+        if size not in MaskCollisionBackend._rect_masks:
+            MaskCollisionBackend._rect_masks[size] = Mask(size, fill=True)
+        return self.mask.overlap(MaskCollisionBackend._rect_masks[size], (x, y)) is not None
+
+
+class TileCollisionBackend(CollisionBackend):
+    """
+    Counts the walls among the tiles a rect covers, using a summed area table of the tile grid so any rect takes four
+    lookups. Walls fill whole tiles, so this gives the same answers as MaskCollisionBackend without a pixel mask.
+    """
+
+    def __init__(self, area: 'Area'):
+        super().__init__(area)
+        from models.Area import TileType
+        walls = numpy.array(area.tiles) == TileType.WALL
+        self.tiles_across = len(walls)
+
+        # wall_counts[i][j] is the number of walls among tiles[a][b] with a < i and b < j
+        self.wall_grid = numpy.zeros((self.tiles_across + 1, self.tiles_across + 1), dtype=numpy.int64)
+        self.wall_grid[1:, 1:] = walls.cumsum(axis=0).cumsum(axis=1)
+        self.wall_counts: list[list[int]] = self.wall_grid.tolist()
+
+    def rect_hits_wall(self, x: int, y: int, width: int, height: int) -> bool:
+        scale, size = self.scale, self.tiles_across
+        first_i, end_i = x // scale, (x + width - 1) // scale + 1
+        first_j, end_j = y // scale, (y + height - 1) // scale + 1
+        if first_i < 0:
+            first_i = 0
+        if first_j < 0:
+            first_j = 0
+        if end_i > size:
+            end_i = size
+        if end_j > size:
+            end_j = size
+        if end_i <= first_i or end_j <= first_j:
+            return False
+        counts = self.wall_counts
+        return counts[end_i][end_j] - counts[first_i][end_j] - counts[end_i][first_j] + counts[first_i][first_j] > 0
+
+    def rects_hit_walls(self, x: numpy.ndarray, y: numpy.ndarray, width: numpy.ndarray,
+                        height: numpy.ndarray) -> numpy.ndarray:
+        x, y = numpy.asarray(x, dtype=numpy.int64), numpy.asarray(y, dtype=numpy.int64)
+        first_i = numpy.clip(x // self.scale, 0, self.tiles_across)
+        end_i = numpy.clip((x + width - 1) // self.scale + 1, 0, self.tiles_across)
+        first_j = numpy.clip(y // self.scale, 0, self.tiles_across)
+        end_j = numpy.clip((y + height - 1) // self.scale + 1, 0, self.tiles_across)
+        counts = self.wall_grid
+        walls = counts[end_i, end_j] - counts[first_i, end_j] - counts[end_i, first_j] + counts[first_i, first_j]
+        return (walls > 0) & (end_i > first_i) & (end_j > first_j)
+
+
+COLLISION_BACKENDS: dict[str, type[CollisionBackend]] = {
+    'tiles': TileCollisionBackend,
+    'mask': MaskCollisionBackend
+}
@@ -0,0 +1,14 @@
+from models.Client import Client
+from models.WireProtocol import MessageType
+
+
+class Command:
+    """
+    A message from a client, parsed by whichever thread read it and applied later by the game thread.
+    """
+    __slots__ = ('client', 'message_type', 'args')
+
+    def __init__(self, client: Client, message_type: MessageType, args: tuple):
+        self.client = client
+        self.message_type = message_type
+        self.args = args
@@ -20,6 +20,10 @@ class Enemy(Entity, ABC):
         result['health'] = self.health
         return result
 
+    def merge_broadcast(self, data: dict[str, Any]):
+        super().merge_broadcast(data)
+        self.health = data['health']
+
 
 class NormalEnemy(Enemy):
     def __init__(self, spawn: tuple[int, int], health):
@@ -32,7 +36,9 @@ class NormalEnemy(Enemy):
 
     @staticmethod
     def from_broadcast(data: dict[str, Any]) -> 'NormalEnemy':
-        return NormalEnemy((data['x'], data['y']), data['health'])
+        result = NormalEnemy((data['x'], data['y']), data['health'])
+        result.entity_id = int(data['id'])
+        return result
 
 
 class BossEnemy(Enemy):
@@ -46,4 +52,6 @@ class BossEnemy(Enemy):
 
     @staticmethod
     def from_broadcast(data: dict[str, Any]) -> 'BossEnemy':
-        return BossEnemy((int(data['x']), int(data['y'])), int(data['health']))
+        result = BossEnemy((int(data['x']), int(data['y'])), int(data['health']))
+        result.entity_id = int(data['id'])
+        return result
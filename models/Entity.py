@@ -1,28 +1,53 @@
+import itertools
 from abc import ABC
 from typing import Any
 
-from pygame import mask, Surface, Vector2
+from pygame import Mask, Rect, Surface, Vector2
 from pygame.sprite import Sprite
 
 from models.Behaviors import CollisionBehavior
+from models.SpatialGroup import SpatialGroup
 
 
 class Entity(Sprite, ABC):
+    _next_entity_id = itertools.count(1)
+    _hitbox_masks: dict[tuple[int, int], Mask] = {}
+
     def __init__(self, spawn: tuple[int, int], width: int, height: int, color: tuple[int, int, int],
                  time_to_live: int = None):
         super().__init__()
 
+        # Server assigned, and overwritten with the server's id when the entity is recreated from a broadcast
+        self.entity_id: int = next(Entity._next_entity_id)
         self.width = width
         self.height = height
-
-        self.image = Surface((width, height))
-        self.image.fill(color)
-        self.mask = mask.from_surface(self.image)
+        self.color = color
+        self._image: Surface | None = None
         self.time_to_live = time_to_live
 
         self._preferred_velocity = Vector2()
         self._precise_location: tuple[float, float] = spawn
 
+    @property
+    def image(self) -> Surface:
+        """
+        Created when first drawn, so the server never allocates surfaces.
+        """
+        if self._image is None:
+            self._image = Surface((self.width, self.height))
+            self._image.fill(self.color)
+        return self._image
+
+    @property
+    def mask(self) -> Mask:
+        """
+        Hitboxes are solid rectangles, so every entity of the same size shares one mask.
+        """
+        size = self.width, self.height
+        if size not in Entity._hitbox_masks:
+            Entity._hitbox_masks[size] = Mask(size, fill=True)
+        return Entity._hitbox_masks[size]
+
     def get_collision_behaviors(self) -> list[CollisionBehavior]:
         return []
 
@@ -48,8 +73,12 @@ class Entity(Sprite, ABC):
         top_left = self.get_pixel_location()
         return top_left[0] + self.width // 2, top_left[1] + self.height // 2
 
+    def get_rect(self) -> Rect:
+        return Rect(self.get_pixel_location(), (self.width, self.height))
+
     def move_absolute(self, x: float, y: float):
         self._precise_location = x, y
+        self._update_spatial_groups()
 
     def move_relative(self, dx: float, dy: float):
         rounded_dx = int(round(dx))
@@ -58,9 +87,16 @@ class Entity(Sprite, ABC):
             return
 
         self._precise_location = self._precise_location[0] + dx, self._precise_location[1] + dy
+        self._update_spatial_groups()
+
+    def _update_spatial_groups(self):
+        for group in self.groups():
+            if isinstance(group, SpatialGroup):
+                group.update_position(self)
 
     def to_broadcast(self) -> dict[str, Any]:
         return {
+            'id': self.entity_id,
             'x': int(round(self._precise_location[0])),
             'y': int(round(self._precise_location[1])),
             'vx': self._preferred_velocity.x,
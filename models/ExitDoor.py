@@ -13,4 +13,6 @@ class ExitDoor(Entity):
 
     @staticmethod
     def from_broadcast(data: dict[str, Any]) -> 'ExitDoor':
-        return ExitDoor((int(data['x']), int(data['y'])))
+        result = ExitDoor((int(data['x']), int(data['y'])))
+        result.entity_id = int(data['id'])
+        return result
@@ -113,6 +113,7 @@ class Loot(Entity):
             result = RingLoot(server_id, loot_id, spawn)
         else:
             raise ValueError(f'Unknown loot type: {loot_type}')
+        result.entity_id = int(data['id'])
         result.modifiers = modifiers
         return result
 
@@ -9,16 +9,36 @@ class LootContainer:
         self.height = height
         self.loot: dict[tuple[int, int], Loot] = {}  # (x, y) of top left corner => loot
         self.loot_dict: dict[tuple[int, int], Loot] = {}  # (server_id, loot_id) => loot
+        self.positions: dict[tuple[int, int], tuple[int, int]] = {}  # (server_id, loot_id) => (x, y) of top left corner
+        self.occupied = bytearray(width * height)  # 1 for every cell covered by loot, row by row
+        self.version = 0  # Increases whenever loot is placed or removed, clients adopt the server's
+        self._broadcast: dict[str, Any] | None = None
 
     def try_add_loot(self, loot: Loot) -> bool:
         """
         Find a position to place loot, and place it. Scans left to right first, top to bottom second.
         :return: True if loot was added, else False
         """
-        for y in range(self.height - loot.inventory_height + 1):
-            for x in range(self.width - loot.inventory_width + 1):
-                if self.try_add_loot_at_position(loot, (x, y)):
+        first_free = self.occupied.find(0)
+        if first_free == -1:
+            return False
+
+        last_x = self.width - loot.inventory_width
+        for y in range(first_free // self.width, self.height - loot.inventory_height + 1):
+            row_start = y * self.width
+            x = 0
+            while x <= last_x:
+                # Loot can only go where its top left cell is free
+                free = self.occupied.find(0, row_start + x, row_start + last_x + 1)
+                if free == -1:
+                    break
+                x = free - row_start
+
+                blocked_x = self._find_occupied(x, y, loot.inventory_width, loot.inventory_height)
+                if blocked_x is None:
+                    self._place(loot, (x, y))
                     return True
+                x = blocked_x + 1  # Every position up to the occupied cell overlaps it too
 
         return False
 
@@ -32,30 +52,25 @@ class LootContainer:
         if x + loot.inventory_width > self.width or y + loot.inventory_height > self.height:
             return False
 
-        # Check for overlap with existing loot
-        for dy in range(loot.inventory_height):
-            for dx in range(loot.inventory_width):
-                if (x + dx, y + dy) in self.loot:
-                    return False
+        # Check for overlap with every cell of existing loot
+        if self._find_occupied(x, y, loot.inventory_width, loot.inventory_height) is not None:
+            return False
 
-        # Place loot at the requested top-left position
-        self.loot[(x, y)] = loot
-        self.loot_dict[(loot.server_id, loot.loot_id)] = loot
+        self._place(loot, position)
         return True
 
     def get_container_position(self, loot: Loot) -> tuple[int, int] | None:
-        for position, existing_loot in self.loot.items():
-            if existing_loot == loot:
-                return position
-        return None
+        position = self.positions.get((loot.server_id, loot.loot_id))
+        if position is None or self.loot[position] != loot:
+            return None
+        return position
 
     def remove(self, loot: Loot) -> None:
         position = self.get_container_position(loot)
         if position is None:
             return
 
-        del self.loot[position]
-        del self.loot_dict[(loot.server_id, loot.loot_id)]
+        self._unplace(position)
 
     def move_to_container(self,
                           loot: Loot,
@@ -76,8 +91,7 @@ class LootContainer:
             return
 
         # Remove from this container
-        del self.loot[position]
-        del self.loot_dict[(loot.server_id, loot.loot_id)]
+        self._unplace(position)
 
     def get_loot(self, server_id: int, loot_id: int) -> Loot | None:
         return self.loot_dict.get((server_id, loot_id))
@@ -86,13 +100,22 @@ class LootContainer:
         return len(self.loot_dict)
 
     def to_broadcast(self):
-        return {
-            'width': self.width,
-            'height': self.height,
-            'loot': [(x, y, loot.to_broadcast()) for (x, y), loot in self.loot.items()]
-        }
+        """
+        Reuses the previous broadcast until the contents change, so unchanged containers compare equal by identity.
+        """
+        if self._broadcast is None or self._broadcast['version'] != self.version:
+            self._broadcast = {
+                'width': self.width,
+                'height': self.height,
+                'version': self.version,
+                'loot': [(x, y, loot.to_broadcast()) for (x, y), loot in self.loot.items()]
+            }
+        return self._broadcast
 
     def merge_broadcast(self, data: dict[str, Any]):
+        if data['version'] == self.version:
+            return
+
         incoming_position_dict = {}
         incoming_loot_dict = {}
         for x, y, loot_update in data['loot']:
@@ -100,25 +123,61 @@ class LootContainer:
             incoming_position_dict[(x, y)] = incoming_loot
             incoming_loot_dict[(incoming_loot.server_id, incoming_loot.loot_id)] = incoming_loot
 
-        # Remove, add, update
+        # Remove, add, update. Loot that is still at the same position is kept, anything else at a position is replaced
         for position, existing_loot in list(self.loot.items()):  # NOSONAR Cannot modify iterable while iterating, so copy is required
-            if position not in incoming_position_dict:
-                del self.loot[position]
-                del self.loot_dict[(existing_loot.server_id, existing_loot.loot_id)]
+            incoming_loot = incoming_position_dict.get(position)
+            if incoming_loot is None or self._key(incoming_loot) != self._key(existing_loot):
+                self._unplace(position)
 
         for position, incoming_loot in incoming_position_dict.items():
             if position not in self.loot:
-                self.loot[position] = incoming_loot
-                self.loot_dict[(incoming_loot.server_id, incoming_loot.loot_id)] = incoming_loot
+                self._place(incoming_loot, position)
             else:
-                self.loot[position].merge_broadcast(incoming_position_dict[position].to_broadcast())
-                self.loot_dict[(incoming_loot.server_id, incoming_loot.loot_id)] = self.loot[position]
+                self.loot[position].merge_broadcast(incoming_loot.to_broadcast())
+        self.version = data['version']
 
     @staticmethod
     def from_broadcast(data: dict[str, Any]) -> 'LootContainer':
         result = LootContainer(data['width'], data['height'])
         for x, y, loot_update in data['loot']:
-            loot = Loot.from_broadcast(loot_update)
-            result.loot[(x, y)] = loot
-            result.loot_dict[(loot.server_id, loot.loot_id)] = loot
+            result._place(Loot.from_broadcast(loot_update), (x, y))
+        result.version = data['version']
         return result
+
+    def _find_occupied(self, x: int, y: int, width: int, height: int) -> int | None:
+        """
+        :return: The column of the rightmost occupied cell in the given rect, None if every cell is free.
+        """
+        blocked_x = None
+        for row in range(y, y + height):
+            start = row * self.width + x
+            found = self.occupied.rfind(1, start, start + width)
+            if found != -1:
+                found -= row * self.width
+                if blocked_x is None or found > blocked_x:
+                    blocked_x = found
+        return blocked_x
+
+    def _fill(self, loot: Loot, position: tuple[int, int], value: int) -> None:
+        x, y = position
+        for row in range(y, y + loot.inventory_height):
+            start = row * self.width + x
+            self.occupied[start:start + loot.inventory_width] = bytes([value]) * loot.inventory_width
+
+    def _place(self, loot: Loot, position: tuple[int, int]) -> None:
+        self.loot[position] = loot
+        self.loot_dict[self._key(loot)] = loot
+        self.positions[self._key(loot)] = position
+        self._fill(loot, position, 1)
+        self.version += 1
+
+    def _unplace(self, position: tuple[int, int]) -> None:
+        loot = self.loot.pop(position)
+        del self.loot_dict[self._key(loot)]
+        del self.positions[self._key(loot)]
+        self._fill(loot, position, 0)
+        self.version += 1
+
+    @staticmethod
+    def _key(loot: Loot) -> tuple[int, int]:
+        return loot.server_id, loot.loot_id
@@ -0,0 +1,120 @@
+import socket
+
+from models.WireProtocol import MessageType, WireProtocol
+
+
+class MessageFramer:
+    """
+    Splits the bytes received from a socket into newline terminated text messages or binary frames.
+
+    Sockets read straight into the free end of one bytearray with recv_into. Messages are taken from the front by
+    moving an offset, and the search for a newline resumes where the last search stopped, so a message is only copied
+    once, when it is taken. Unread bytes are moved to the front when the free end gets too small for a read, and the
+    buffer grows when a message doesn't fit at all.
+
+    The peer decides how long a message is, so messages over a maximum size are refused, instead of growing the buffer
+    for as long as the peer keeps sending.
+    """
+
+    def __init__(self, read_size: int = 65536, max_message_size: int = 1 << 24):
+        """
+        :param read_size: Most bytes to read at once, and the least free space to read into.
+        :param max_message_size: Most bytes in a frame's payload or a text message.
+        """
+        self.read_size = read_size
+        self.max_message_size = max_message_size
+        self.buffer = bytearray(2 * read_size)
+        self.view = memoryview(self.buffer)
+        self.start = 0  # Start of the first message not taken yet
+        self.end = 0  # End of the received bytes
+        self.scanned = 0  # Bytes before this have no newline after start
+
+    def __len__(self) -> int:
+        return self.end - self.start
+
+    def recv_into(self, connection: socket.socket) -> int:
+        """
+        Reads what the socket has into the buffer.
+
+        :return: Number of bytes read, 0 if the connection was closed.
+        """
+        self.make_room(self.read_size)
+        received = connection.recv_into(self.view[self.end:self.end + self.read_size])
+        self.end += received
+        return received
+
+    def feed(self, data: bytes) -> None:
+        """
+        Adds bytes that were read elsewhere.
+        """
+        self.make_room(len(data))
+        self.view[self.end:self.end + len(data)] = data
+        self.end += len(data)
+
+    def next_line(self) -> bytes | None:
+        """
+        Takes the next text message, without its newline, or returns None if it hasn't been received completely.
+
+        :raises ConnectionResetError: If the message is longer than the maximum message size, which means the connection
+                                      should be closed.
+        """
+        newline = self.buffer.find(b'\n', max(self.start, self.scanned), self.end)
+        if newline == -1:
+            self.scanned = self.end
+            if self.end - self.start > self.max_message_size:
+                raise ConnectionResetError(f'Text message of over {self.max_message_size} bytes.')
+            return None
+        if newline - self.start > self.max_message_size:
+            raise ConnectionResetError(f'Text message of {newline - self.start} bytes, over {self.max_message_size}.')
+        line = bytes(self.view[self.start:newline])
+        self.take(newline + 1)
+        return line
+
+    def next_frame(self) -> tuple[MessageType, bytes] | None:
+        """
+        Takes the next binary frame, or returns None if it hasn't been received completely.
+
+        :return: The message type and the payload.
+        :raises ValueError: If the frame's message type is unknown.
+        :raises ConnectionResetError: If the frame is longer than the maximum message size, which means the connection
+                                      should be closed.
+        """
+        header_end = self.start + WireProtocol.HEADER.size
+        if header_end > self.end:
+            return None
+        length, message_type = WireProtocol.HEADER.unpack_from(self.buffer, self.start)
+        if length > self.max_message_size:
+            raise ConnectionResetError(f'Frame of {length} bytes, over {self.max_message_size}.')
+        if header_end + length > self.end:
+            return None
+        payload = bytes(self.view[header_end:header_end + length])
+        self.take(header_end + length)
+        # Converted only once the frame is taken, so a frame of an unknown type doesn't stop the ones after it
+        return MessageType(message_type), payload
+
+    def take(self, end: int) -> None:
+        if end == self.end:
+            # Everything has been taken, so the next read can start at the front without moving anything
+            self.start = self.end = self.scanned = 0
+        else:
+            self.start = end
+
+    def make_room(self, size: int) -> None:
+        """
+        Makes sure at least size bytes fit after the received bytes.
+        """
+        if len(self.buffer) - self.end >= size:
+            return
+
+        unread = self.end - self.start
+        if unread + size > len(self.buffer):
+            buffer = bytearray(max(2 * len(self.buffer), unread + size))
+            buffer[:unread] = self.view[self.start:self.end]
+            self.view.release()
+            self.buffer = buffer
+            self.view = memoryview(buffer)
+        else:
+            self.view[:unread] = self.view[self.start:self.end]
+        self.scanned = max(0, self.scanned - self.start)
+        self.start = 0
+        self.end = unread
@@ -6,8 +6,9 @@ from pygame import Vector2
 from models.Direction import Direction
 from models.Entity import Entity
 from models.LootContainer import LootContainer
-from models.Loot import GearSlot, Loot
+from models.Loot import GearSlot, Loot, LootType
 from models.LootModifier import ModifierType
+from models.PlayerStats import PlayerStats
 
 
 class Player(Entity):
@@ -20,29 +21,51 @@ class Player(Entity):
 
         self.inventory = LootContainer(10, 6)
         self.cursor_loot = LootContainer(99, 99)
-        self.gear: dict[GearSlot, Loot | None] = dict.fromkeys(GearSlot, None)
+        self._stats = PlayerStats()
+        self._gear: dict[GearSlot, Loot | None] = dict.fromkeys(GearSlot, None)
+        self.gear_version = 0  # Increases whenever gear changes, like LootContainer.version
+        self._gear_broadcast: tuple[int, list, list] | None = None
+        self.equipment: dict[GearSlot, LootType] = {}  # Type of loot in each slot, from broadcasts of the player
+        self._equipment_broadcast: list | None = None  # What equipment was last built from
         self.show_character_panel = False
 
+        self.last_input = 0  # Sequence number of the last movement input the server applied
+        self.predicted = False  # Moved by its own client, which reconciles it against snapshots itself
+
+    @property
+    def gear(self) -> dict[GearSlot, Loot | None]:
+        """
+        The loot in each gear slot. Change slots through set_gear, so the player's stats are recomputed.
+        """
+        return self._gear
+
+    @gear.setter
+    def gear(self, gear: dict[GearSlot, Loot | None]):
+        self._gear = gear
+        self.gear_version += 1
+        self._stats.invalidate()
+
+    def set_gear(self, slot: GearSlot, loot: Loot | None) -> None:
+        self._gear[slot] = loot
+        self.gear_version += 1
+        self._stats.invalidate()
+
+    @property
+    def stats(self) -> PlayerStats:
+        if self._stats.stale:
+            self._stats.update(self._gear.values())
+        return self._stats
+
     @property
     def movement_speed(self) -> float:
-        base_speed = 3.0
-        total_percent_multiplier = 1.0 + self.total_from_gear(ModifierType.MOVEMENT_SPEED_PERCENT) / 100.0
-        return base_speed * total_percent_multiplier
+        return self.stats.movement_speed
 
     @property
     def attacks_per_second(self) -> float:
-        base_aps = 1.0
-        total_percent_multiplier = 1.0 + self.total_from_gear(ModifierType.ATTACK_SPEED_PERCENT) / 100.0
-        return base_aps * total_percent_multiplier
+        return self.stats.attacks_per_second
 
     def total_from_gear(self, modifier_type: ModifierType) -> float:
-        total = 0.0
-        for gear in self.gear.values():
-            if gear is not None:
-                for modifier in gear.modifiers:
-                    if modifier.modifier_type == modifier_type:
-                        total += modifier.values[0]
-        return total
+        return self.stats.totals[modifier_type]
 
     def set_preferred_velocity(self, direction: Direction):
         go_left = Direction.LEFT in direction
@@ -74,36 +97,79 @@ class Player(Entity):
         return self._preferred_velocity
 
     def to_broadcast(self) -> dict[str, Any]:
+        """
+        What every client in the area sees of the player, with only a summary of the gear they have equipped.
+        Inventory, cursor loot and the gear itself are private, see owner_broadcast.
+        """
         result = super().to_broadcast()
         result['client_id'] = self.client_id
-        result['inventory'] = self.inventory.to_broadcast()
-        result['cursor_loot'] = self.cursor_loot.to_broadcast()
-        gear_list = []
-        for slot, loot in self.gear.items():
-            if loot is not None:
-                gear_list.append((int(slot), loot.to_broadcast()))
-        result['gear'] = gear_list
+        result['input'] = self.last_input
+        result['equipment'] = self._get_gear_broadcast()[1]
         return result
 
+    def owner_broadcast(self) -> dict[str, Any]:
+        """
+        What only the player's own client sees: their containers and gear, each with the version it was sent at.
+        """
+        return {
+            'inventory': self.inventory.to_broadcast(),
+            'cursor_loot': self.cursor_loot.to_broadcast(),
+            'gear_version': self.gear_version,
+            'gear': self._get_gear_broadcast()[0],
+        }
+
     def merge_broadcast(self, data: dict[str, Any]):
-        super().merge_broadcast(data)
+        if not self.predicted:
+            super().merge_broadcast(data)
+        self.last_input = int(data['input'])
+        if data['equipment'] != self._equipment_broadcast:
+            self.equipment = {GearSlot(slot): LootType(loot_type) for slot, loot_type in data['equipment']}
+            self._equipment_broadcast = data['equipment']
+
+    def merge_owner_broadcast(self, data: dict[str, Any]) -> None:
         self.inventory.merge_broadcast(data['inventory'])
         self.cursor_loot.merge_broadcast(data['cursor_loot'])
+        if data['gear_version'] != self.gear_version:
+            self._merge_gear(data)
+
+    def _get_gear_broadcast(self) -> tuple[list, list]:
+        # Like containers, gear is only broadcast again after it changes
+        if self._gear_broadcast is None or self._gear_broadcast[0] != self.gear_version:
+            gear_list, equipment = [], []
+            for slot, loot in self.gear.items():
+                if loot is not None:
+                    gear_list.append((int(slot), loot.to_broadcast()))
+                    equipment.append((int(slot), int(loot.loot_type)))
+            self._gear_broadcast = self.gear_version, gear_list, equipment
+        return self._gear_broadcast[1], self._gear_broadcast[2]
+
+    def _merge_gear(self, data: dict[str, Any]) -> None:
         self.gear = dict.fromkeys(GearSlot, None)
         for slot_value, loot_data in data.get('gear', []):
             slot = GearSlot(int(slot_value))
-            self.gear[slot] = Loot.from_broadcast(loot_data)
+            self.set_gear(slot, Loot.from_broadcast(loot_data))
+        self.gear_version = data['gear_version']
+
+    def handoff_state(self) -> dict[str, Any]:
+        """
+        Everything needed to recreate the player on another process, both public and private.
+        """
+        return {**self.to_broadcast(), **self.owner_broadcast()}
+
+    @staticmethod
+    def from_handoff_state(data: dict[str, Any]) -> 'Player':
+        result = Player.from_broadcast(data)
+        result.merge_owner_broadcast(data)
+        return result
 
     @staticmethod
     def from_broadcast(data: dict[str, Any]) -> 'Player':
         result = Player(int(data['client_id']), (int(data['x']), int(data['y'])))
+        result.entity_id = int(data['id'])
         vx = float(data['vx'])
         vy = float(data['vy'])
         result._preferred_velocity = Vector2(vx, vy)
-        result.inventory = LootContainer.from_broadcast(data['inventory'])
-        result.cursor_loot = LootContainer.from_broadcast(data['cursor_loot'])
-        result.gear = dict.fromkeys(GearSlot, None)
-        for slot_value, loot_data in data.get('gear', []):
-            slot = GearSlot(int(slot_value))
-            result.gear[slot] = Loot.from_broadcast(loot_data)
+        result.last_input = int(data['input'])
+        result.equipment = {GearSlot(slot): LootType(loot_type) for slot, loot_type in data['equipment']}
+        result._equipment_broadcast = data['equipment']
         return result
@@ -0,0 +1,49 @@
+from typing import Iterable
+
+from models.Loot import Loot
+from models.LootModifier import ModifierType
+
+
+class PlayerStats:
+    """
+    A player's modifier totals from their gear, and the stats derived from them.
+    Totals are only recomputed after the player's gear changes, rather than every time a stat is read.
+    """
+    base_movement_speed = 3.0
+    base_attacks_per_second = 1.0
+
+    def __init__(self):
+        self.totals: dict[ModifierType, float] = dict.fromkeys(ModifierType, 0.0)
+        self.stale = True
+
+        self.movement_speed = self.base_movement_speed
+        self.attacks_per_second = self.base_attacks_per_second
+        self.flat_damage = 0
+
+    def invalidate(self) -> None:
+        """
+        Marks the stats as needing to be recomputed, for whenever the gear they come from changes.
+        """
+        self.stale = True
+
+    def update(self, gear: Iterable[Loot | None]) -> None:
+        """
+        Recomputes the totals of every modifier type, then each derived stat from those totals.
+
+        :param gear: The loot in each gear slot, None for empty slots.
+        """
+        self.totals = dict.fromkeys(ModifierType, 0.0)
+        for loot in gear:
+            if loot is not None:
+                for modifier in loot.modifiers:
+                    self.totals[modifier.modifier_type] += modifier.values[0]
+
+        self.movement_speed = self.base_movement_speed * self.percent_multiplier(ModifierType.MOVEMENT_SPEED_PERCENT)
+        self.attacks_per_second = (self.base_attacks_per_second *
+                                   self.percent_multiplier(ModifierType.ATTACK_SPEED_PERCENT))
+        self.flat_damage = int(self.totals[ModifierType.DAMAGE_FLAT] *
+                               self.percent_multiplier(ModifierType.DAMAGE_PERCENT))
+        self.stale = False
+
+    def percent_multiplier(self, modifier_type: ModifierType) -> float:
+        return 1.0 + self.totals[modifier_type] / 100.0
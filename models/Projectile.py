@@ -7,13 +7,15 @@ from models.Entity import Entity
 
 
 class Projectile(Entity):
+    COLLISION_BEHAVIORS = [CollisionBehavior.DISAPPEAR, CollisionBehavior.DAMAGE]
+
     def __init__(self, spawn: tuple[int, int], time_to_live: int, initial_velocity: Vector2, height: int = 10, width: int = 10, damage: int = 0):
         super().__init__(spawn, height, width, (0, 255, 255), time_to_live)
         self.damage = damage
         self._preferred_velocity = initial_velocity
 
     def get_collision_behaviors(self) -> list[CollisionBehavior]:
-        return [CollisionBehavior.DISAPPEAR, CollisionBehavior.DAMAGE]
+        return Projectile.COLLISION_BEHAVIORS
 
     def to_broadcast(self) -> dict[str, Any]:
         result = super().to_broadcast()
@@ -25,4 +27,6 @@ class Projectile(Entity):
     def from_broadcast(data: dict[str, Any]) -> 'Projectile':
         vx = float(data['vx'])
         vy = float(data['vy'])
-        return Projectile((int(data['x']), int(data['y'])) , 0, Vector2(vx, vy))
+        result = Projectile((int(data['x']), int(data['y'])) , 0, Vector2(vx, vy))
+        result.entity_id = int(data['id'])
+        return result
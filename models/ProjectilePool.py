@@ -0,0 +1,296 @@
+from typing import Any, Iterable, Iterator, TYPE_CHECKING
+
+import numpy
+from pygame import Rect, Vector2
+
+from models.Behaviors import CollisionBehavior
+from models.Entity import Entity
+from models.Projectile import Projectile
+
+if TYPE_CHECKING:
+    from models.Area import Area
+
+
+class ProjectileView:
+    """
+    A projectile in a pool, with the parts of the Entity interface that systems use for projectiles.
+    Views are only valid until the projectile is removed, after which its slot can hold another projectile.
+    """
+    __slots__ = ('pool', 'slot')
+
+    def __init__(self, pool: 'ProjectilePool', slot: int):
+        self.pool = pool
+        self.slot = slot
+
+    @property
+    def entity_id(self) -> int:
+        return int(self.pool.entity_id[self.slot])
+
+    @property
+    def damage(self) -> int:
+        return int(self.pool.damage[self.slot])
+
+    @property
+    def time_to_live(self) -> int:
+        return int(self.pool.time_to_live[self.slot])
+
+    def get_collision_behaviors(self) -> list[CollisionBehavior]:
+        return Projectile.COLLISION_BEHAVIORS
+
+    def get_preferred_velocity(self) -> Vector2:
+        return Vector2(float(self.pool.vx[self.slot]), float(self.pool.vy[self.slot]))
+
+    def get_precise_location(self) -> tuple[float, float]:
+        return float(self.pool.x[self.slot]), float(self.pool.y[self.slot])
+
+    def get_pixel_location(self) -> tuple[int, int]:
+        return int(round(self.pool.x[self.slot])), int(round(self.pool.y[self.slot]))
+
+    def get_rect(self) -> Rect:
+        return Rect(self.get_pixel_location(), (int(self.pool.width[self.slot]), int(self.pool.height[self.slot])))
+
+    def alive(self) -> bool:
+        return bool(self.pool.alive[self.slot])
+
+    def kill(self) -> None:
+        self.pool.remove(self.slot)
+
+    def to_broadcast(self) -> dict[str, Any]:
+        x, y = self.get_pixel_location()
+        vx, vy = self.get_preferred_velocity()
+        return {'id': self.entity_id, 'x': x, 'y': y, 'vx': vx, 'vy': vy}
+
+
+class ProjectilePool:
+    """
+    Stores an area's projectiles as columns of NumPy arrays instead of sprites, so movement, aging and collisions run
+    as batch operations over every projectile at once.
+    Removed projectiles free their slot for the next projectile that is added.
+    """
+
+    def __init__(self, capacity: int = 64):
+        self.x = numpy.zeros(capacity)
+        self.y = numpy.zeros(capacity)
+        self.vx = numpy.zeros(capacity)
+        self.vy = numpy.zeros(capacity)
+        self.time_to_live = numpy.zeros(capacity, dtype=numpy.int64)
+        self.damage = numpy.zeros(capacity, dtype=numpy.int64)
+        self.width = numpy.zeros(capacity, dtype=numpy.int64)
+        self.height = numpy.zeros(capacity, dtype=numpy.int64)
+        self.entity_id = numpy.zeros(capacity, dtype=numpy.int64)
+        self.alive = numpy.zeros(capacity, dtype=bool)
+        self.free: list[int] = list(range(capacity - 1, -1, -1))  # Popped from the end, so low slots are used first
+        self.count = 0
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __iter__(self) -> Iterator[ProjectileView]:
+        return iter([ProjectileView(self, int(slot)) for slot in numpy.flatnonzero(self.alive)])
+
+    def add(self, *projectiles: Projectile | Iterable[Projectile]) -> None:
+        """
+        Copies projectiles into the pool. Like Group.add, accepts projectiles and lists of projectiles.
+        """
+        for projectile in projectiles:
+            if isinstance(projectile, Projectile):
+                self._add(projectile)
+            else:
+                self.add(*projectile)
+
+    def remove(self, slot: int) -> None:
+        if self.alive[slot]:
+            self.alive[slot] = False
+            self.free.append(slot)
+            self.count -= 1
+
+    def empty(self) -> None:
+        self.alive[:] = False
+        self.free = list(range(len(self.alive) - 1, -1, -1))
+        self.count = 0
+
+    def move(self, area: 'Area') -> None:
+        """
+        Moves every projectile by its velocity, first along x and then along y, the same way MovementSystem moves
+        entities. Projectiles disappear when either move would hit a wall.
+        """
+        slots = numpy.flatnonzero(self.alive)
+        if not len(slots):
+            return
+
+        x, y = self.x[slots], self.y[slots]
+        vx, vy = self.vx[slots], self.vy[slots]
+        width, height = self.width[slots], self.height[slots]
+
+        hit_x = area.collision.rects_hit_walls(numpy.round(x + vx), numpy.round(y), width, height)
+        move_x = numpy.where(hit_x, 0.0, vx)
+        move_y = -vy
+        hit_y = area.collision.rects_hit_walls(numpy.round(x + move_x), numpy.round(y + move_y), width, height)
+
+        still = (vx == 0) & (vy == 0)
+        hit = (hit_x | hit_y) & ~still
+        for slot in slots[hit]:
+            self.remove(int(slot))
+
+        # Like Entity.move_relative, moves that round to nothing are skipped
+        moving = ~hit & ~still & ((numpy.round(move_x) != 0) | (numpy.round(move_y) != 0))
+        self.x[slots[moving]] += move_x[moving]
+        self.y[slots[moving]] += move_y[moving]
+
+    def age(self) -> None:
+        """
+        Counts down every projectile's time to live, removing those that reach the end of it.
+        """
+        slots = numpy.flatnonzero(self.alive)
+        for slot in slots[self.time_to_live[slots] <= 1]:
+            self.remove(int(slot))
+        self.time_to_live[slots] -= 1
+
+    def collide(self, entities: list[Entity]) -> list[tuple[int, ProjectileView]]:
+        """
+        Finds the projectiles overlapping each entity.
+
+        :param entities: The entities to test, such as an area's enemies.
+        :return: Pairs of entity index and overlapping projectile, ordered by entity and then by slot.
+        """
+        slots = numpy.flatnonzero(self.alive)
+        if not len(slots) or not entities:
+            return []
+
+        px = numpy.round(self.x[slots]).astype(numpy.int64)
+        py = numpy.round(self.y[slots]).astype(numpy.int64)
+        pw, ph = self.width[slots], self.height[slots]
+        ex, ey, ew, eh = numpy.array([tuple(entity.get_rect()) for entity in entities], dtype=numpy.int64).T
+
+        # With cells at least as large as any rect, overlapping rects have their top left corners in neighboring cells
+        cell = int(max(pw.max(), ph.max(), ew.max(), eh.max(), 1))
+        stride = 1 << 32
+        keys = (px // cell) * stride + py // cell
+        order = numpy.argsort(keys, kind='stable')
+        sorted_keys = keys[order]
+
+        # Look up the cell of each entity's top left corner and the eight cells around it in one go
+        offsets = numpy.array([dx * stride + dy for dx in (-1, 0, 1) for dy in (-1, 0, 1)])
+        neighbor_keys = ((ex // cell) * stride + ey // cell)[:, None] + offsets
+        low = numpy.searchsorted(sorted_keys, neighbor_keys.ravel(), 'left')
+        counts = numpy.searchsorted(sorted_keys, neighbor_keys.ravel(), 'right') - low
+        total = int(counts.sum())
+        if not total:
+            return []
+
+        e = numpy.repeat(numpy.arange(len(entities)).repeat(len(offsets)), counts)
+        p = order[numpy.repeat(low, counts) + numpy.arange(total) - numpy.repeat(numpy.cumsum(counts) - counts, counts)]
+        overlaps = ((px[p] < ex[e] + ew[e]) & (px[p] + pw[p] > ex[e]) &
+                    (py[p] < ey[e] + eh[e]) & (py[p] + ph[p] > ey[e]))
+        e, p = e[overlaps], p[overlaps]
+        pair_order = numpy.lexsort((slots[p], e))
+        return [(entity_index, ProjectileView(self, slot))
+                for entity_index, slot in zip(e[pair_order].tolist(), slots[p[pair_order]].tolist())]
+
+    def ids_in_rect(self, rect: Rect) -> set[int]:
+        """
+        :return: The entity ids of the projectiles overlapping the rect.
+        """
+        slots = numpy.flatnonzero(self.alive)
+        px = numpy.round(self.x[slots]).astype(numpy.int64)
+        py = numpy.round(self.y[slots]).astype(numpy.int64)
+        inside = ((px < rect.right) & (px + self.width[slots] > rect.left) &
+                  (py < rect.bottom) & (py + self.height[slots] > rect.top))
+        return set(self.entity_id[slots[inside]].tolist())
+
+    def to_broadcast(self) -> list[dict[str, Any]]:
+        slots = numpy.flatnonzero(self.alive)
+        return [{'id': entity_id, 'x': x, 'y': y, 'vx': vx, 'vy': vy} for entity_id, x, y, vx, vy in zip(
+            self.entity_id[slots].tolist(),
+            numpy.round(self.x[slots]).astype(numpy.int64).tolist(),
+            numpy.round(self.y[slots]).astype(numpy.int64).tolist(),
+            self.vx[slots].tolist(),
+            self.vy[slots].tolist())]
+
+    def merge_broadcast(self, updates: list[dict[str, Any]]) -> None:
+        """
+        Updates the projectiles that are still in the broadcast in place, adds those that are new to it and removes
+        those that are no longer in it, so a client's pool keeps its slots from one snapshot to the next.
+
+        :param updates: Projectile broadcasts, as produced by to_broadcast.
+        """
+        slots = numpy.flatnonzero(self.alive)
+        existing = dict(zip(self.entity_id[slots].tolist(), slots.tolist()))
+        incoming = {int(update['id']): update for update in updates}
+
+        kept_slots, kept = [], []
+        for entity_id, slot in existing.items():
+            update = incoming.get(entity_id)
+            if update is None:
+                self.remove(slot)
+            else:
+                kept_slots.append(slot)
+                kept.append((float(update['x']), float(update['y']), float(update['vx']), float(update['vy'])))
+        if kept:
+            self.x[kept_slots], self.y[kept_slots], self.vx[kept_slots], self.vy[kept_slots] = numpy.array(kept).T
+
+        # Removed first, so new projectiles reuse the freed slots
+        for entity_id, update in incoming.items():
+            if entity_id not in existing:
+                self._add(Projectile.from_broadcast(update))
+
+    def merge_records(self, records: numpy.ndarray, removed: list[int]) -> None:
+        """
+        Like merge_broadcast, for a delta: the changed projectiles are updated in place as one batch, new ones are
+        added, and only the removed ones are removed.
+
+        :param records: The changed projectiles, with 'id', 'x', 'y', 'vx' and 'vy' fields, see WireProtocol.RECORD.
+        :param removed: Entity ids of the projectiles that are gone.
+        """
+        if removed:
+            for slot in self._slots_of(numpy.array(removed, dtype=numpy.int64)).tolist():
+                if slot >= 0:
+                    self.remove(slot)
+
+        slots = self._slots_of(records['id'].astype(numpy.int64))
+        found = slots >= 0
+        kept = slots[found]
+        self.x[kept] = records['x'][found]
+        self.y[kept] = records['y'][found]
+        self.vx[kept] = records['vx'][found]
+        self.vy[kept] = records['vy'][found]
+
+        # Removed first, so new projectiles reuse the freed slots
+        for entity_id, x, y, vx, vy in records[~found].tolist():
+            self._add(Projectile.from_broadcast({'id': entity_id, 'x': x, 'y': y, 'vx': vx, 'vy': vy}))
+
+    def _slots_of(self, entity_ids: numpy.ndarray) -> numpy.ndarray:
+        """
+        :return: The slot of the projectile with each entity id, or -1 where there is none.
+        """
+        slots = numpy.flatnonzero(self.alive)
+        if not len(slots):
+            return numpy.full(len(entity_ids), -1)
+        ids = self.entity_id[slots]
+        order = numpy.argsort(ids)
+        ids, slots = ids[order], slots[order]
+        positions = numpy.minimum(numpy.searchsorted(ids, entity_ids), len(ids) - 1)
+        return numpy.where(ids[positions] == entity_ids, slots[positions], -1)
+
+    def _add(self, projectile: Projectile) -> None:
+        if not self.free:
+            self._grow()
+        slot = self.free.pop()
+        self.x[slot], self.y[slot] = projectile.get_precise_location()
+        velocity = projectile.get_preferred_velocity()
+        self.vx[slot], self.vy[slot] = velocity.x, velocity.y
+        self.time_to_live[slot] = projectile.time_to_live or 0
+        self.damage[slot] = projectile.damage
+        self.width[slot] = projectile.width
+        self.height[slot] = projectile.height
+        self.entity_id[slot] = projectile.entity_id
+        self.alive[slot] = True
+        self.count += 1
+
+    def _grow(self) -> None:
+        capacity = len(self.alive)
+        extra = max(capacity, 64)
+        for name in ('x', 'y', 'vx', 'vy', 'time_to_live', 'damage', 'width', 'height', 'entity_id', 'alive'):
+            column = getattr(self, name)
+            setattr(self, name, numpy.concatenate((column, numpy.zeros(extra, dtype=column.dtype))))
+        self.free.extend(range(capacity + extra - 1, capacity - 1, -1))
@@ -0,0 +1,293 @@
+from typing import Any
+
+Cell = int  # A grid cell's column times SnapshotGrid.STRIDE plus its row, which hashes faster than a tuple
+
+
+class Snapshot:
+    """
+    An area broadcast with each entity group indexed by entity id. Snapshots are never modified once created, so a newer
+    snapshot can be sent as a delta against any older snapshot the recipient still has.
+    """
+    GROUPS = ('players', 'projectiles', 'enemies', 'loot')
+
+    def __init__(self, number: int, seed: int, exit: dict[str, Any] | None, groups: dict[str, dict[int, dict]]):
+        self.number = number
+        self.seed = seed
+        self.exit = exit
+        self.groups = groups
+        # Number of the snapshot each entity last changed in, by group, see share_unchanged
+        self.versions: dict[str, dict[int, int]] = {group: dict.fromkeys(groups[group], number) for group in groups}
+
+    def same_content(self, other: 'Snapshot') -> bool:
+        return self.seed == other.seed and self.exit == other.exit and self.groups == other.groups
+
+    def share_unchanged(self, previous: 'Snapshot') -> bool:
+        """
+        Replaces the entities that are equal in the previous snapshot of the same area with the previous snapshot's
+        dicts, and carries over when they last changed, so later snapshots only need to be compared where they changed.
+
+        :return: Whether anything differs from the previous snapshot.
+        """
+        changed = self.seed != previous.seed or self.exit != previous.exit
+        for group in Snapshot.GROUPS:
+            entities = self.groups[group]
+            old_entities = previous.groups[group]
+            old_versions = previous.versions[group]
+            versions = self.versions[group]
+            for entity_id, entity in entities.items():
+                old_entity = old_entities.get(entity_id)
+                if old_entity == entity:
+                    entities[entity_id] = old_entity
+                    versions[entity_id] = old_versions[entity_id]
+                else:
+                    changed = True
+            changed = changed or len(entities) != len(old_entities)
+        return changed
+
+    def delta_from(self, baseline: 'Snapshot | None') -> dict[str, Any]:
+        """
+        Builds the message that turns the baseline into this snapshot. New entities are sent whole, changed entities
+        only carry their id and changed fields, and removed entities are sent as ids.
+
+        :param baseline: A snapshot the recipient has acknowledged, or None to send everything.
+        :return: A JSON serializable delta.
+        """
+        result = {
+            'snapshot': self.number,
+            'baseline': baseline.number if baseline else None,
+            'seed': self.seed,
+            'exit': self.exit,
+        }
+        for group in Snapshot.GROUPS:
+            current = self.groups[group]
+            previous = baseline.groups[group] if baseline else {}
+
+            changed = []
+            for entity_id, entity in current.items():
+                old_entity = previous.get(entity_id)
+                if old_entity is None:
+                    changed.append(entity)
+                elif old_entity != entity:
+                    fields = {key: value for key, value in entity.items() if old_entity.get(key) != value}
+                    fields['id'] = entity_id
+                    changed.append(fields)
+
+            removed = [entity_id for entity_id in previous if entity_id not in current]
+            result[group] = {'changed': changed, 'removed': removed}
+        return result
+
+    @staticmethod
+    def from_delta(delta: dict[str, Any], baseline: 'Snapshot | None') -> 'Snapshot':
+        """
+        Applies a delta to the baseline it was built against. The baseline is left untouched.
+        """
+        groups = {}
+        for group in Snapshot.GROUPS:
+            entities = dict(baseline.groups[group]) if baseline else {}
+            for entity_id in delta[group]['removed']:
+                entities.pop(entity_id, None)
+            for fields in delta[group]['changed']:
+                entity_id = fields['id']
+                if entity_id in entities:
+                    entities[entity_id] = {**entities[entity_id], **fields}
+                else:
+                    entities[entity_id] = fields
+            groups[group] = entities
+        return Snapshot(delta['snapshot'], delta['seed'], delta['exit'], groups)
+
+    @staticmethod
+    def from_broadcast(number: int, update: dict[str, Any]) -> 'Snapshot':
+        groups = {group: {entity['id']: entity for entity in update[group]} for group in Snapshot.GROUPS}
+        return Snapshot(number, update['seed'], update['exit'], groups)
+
+    def to_broadcast(self) -> dict[str, Any]:
+        result = {group: list(self.groups[group].values()) for group in Snapshot.GROUPS}
+        result['seed'] = self.seed
+        result['exit'] = self.exit
+        return result
+
+
+class SnapshotGrid:
+    """
+    An area snapshot's entities bucketed into square cells by their position, with the number of the snapshot each cell
+    last changed in, so that views of the snapshot are built and compared a cell at a time. Entities move much more
+    often than they cross into another cell, so when each entity last changed cells or disappeared is kept as well, and
+    only those entities need to be checked for having left a view.
+
+    The records of a cell are packed once and shared by every view that includes it, and carried over to the next grid
+    while the cell is unchanged.
+    """
+    STRIDE = 1 << 16  # Rows can be negative, as long as they are within half of this
+    HISTORY = 64  # Grids that disappeared entities are remembered for
+
+    def __init__(self, snapshot: Snapshot, cell_size: int, previous: 'SnapshotGrid | None' = None):
+        """
+        :param previous: The grid of an earlier snapshot of the same area, to carry unchanged cells over from.
+        """
+        self.snapshot = snapshot
+        self.cell_size = cell_size
+        self.origin = previous.origin if previous else self  # Versions are only comparable between grids of one origin
+        # Snapshot numbers of this grid and the ones before it, the first being the oldest that 'gone' is complete from
+        self.numbers = (previous.numbers + (snapshot.number,))[-SnapshotGrid.HISTORY:] if previous else (snapshot.number,)
+        self.cells: dict[str, dict[Cell, list[int]]] = {}  # Ids of the entities in each cell, by group
+        self.where: dict[str, dict[int, Cell]] = {}  # The cell of each entity, by group
+        self.versions: dict[str, dict[Cell, int]] = {}  # When anything in each cell last changed, including emptied cells
+        self.moved: dict[str, dict[int, int]] = {}  # When each entity arrived in its cell
+        self.gone: dict[str, dict[int, int]] = {}  # When each entity that is no longer in the area disappeared
+        self.blobs: dict[str, dict[Cell, bytes]] = {}  # Packed records of each cell, see WireProtocol.encode_view
+        self.records: dict[tuple[int, bool], bytes] = {}  # Packed players, with and without equipment
+        self._changed_since: dict[int, tuple[dict[str, set[Cell]], dict[str, list[int]], dict[str, list[int]]]] = {}
+
+        number = snapshot.number
+        for group in Snapshot.GROUPS:
+            versions = snapshot.versions[group]
+            old_where = previous.where[group] if previous else {}
+            old_moved = previous.moved[group] if previous else {}
+            cells: dict[Cell, list[int]] = {}
+            where: dict[int, Cell] = {}
+            moved: dict[int, int] = {}
+            changed: set[Cell] = set()
+            for entity_id, entity in snapshot.groups[group].items():
+                key = entity['x'] // cell_size * SnapshotGrid.STRIDE + entity['y'] // cell_size
+                cell = cells.get(key)
+                if cell is None:
+                    cells[key] = [entity_id]
+                else:
+                    cell.append(entity_id)
+                where[entity_id] = key
+                moved[entity_id] = old_moved[entity_id] if old_where.get(entity_id) == key else number
+                if previous is None or versions[entity_id] > previous.snapshot.number:
+                    changed.add(key)
+
+            gone = {entity_id: version for entity_id, version in previous.gone[group].items()
+                    if version > self.numbers[0]} if previous else {}
+            gone.update(dict.fromkeys(old_where.keys() - where.keys(), number))
+
+            # Cells that have been emptied are kept, so views can tell that their entities left
+            old_cells = previous.cells[group] if previous else {}
+            old_versions = previous.versions[group] if previous else {}
+            old_blobs = previous.blobs[group] if previous else {}
+            cell_versions, blobs = {}, {}
+            for key in cells.keys() | old_versions.keys():
+                if key in old_versions and key not in changed and cells.get(key, []) == old_cells.get(key, []):
+                    cell_versions[key] = old_versions[key]
+                    if key in old_blobs:
+                        blobs[key] = old_blobs[key]
+                else:
+                    cell_versions[key] = number
+            self.cells[group] = cells
+            self.where[group] = where
+            self.versions[group] = cell_versions
+            self.moved[group] = moved
+            self.gone[group] = gone
+            self.blobs[group] = blobs
+
+    def changed_since(self, number: int) -> tuple[dict[str, set[Cell]], dict[str, list[int]], dict[str, list[int]]]:
+        """
+        :param number: An earlier snapshot of the same area, no older than the first of the grid's numbers.
+        :return: By group, the cells where anything changed after that snapshot, the entities that arrived in their cell
+                 after it, and the entities that disappeared after it.
+        """
+        changed = self._changed_since.get(number)
+        if changed is None:
+            changed = self._changed_since[number] = (
+                {group: {cell for cell, version in self.versions[group].items() if version > number}
+                 for group in Snapshot.GROUPS},
+                {group: [entity_id for entity_id, version in self.moved[group].items() if version > number]
+                 for group in Snapshot.GROUPS},
+                {group: [entity_id for entity_id, version in self.gone[group].items() if version > number]
+                 for group in Snapshot.GROUPS})
+        return changed
+
+
+class SnapshotView:
+    """
+    The cells of an area snapshot that one client is interested in. Views point at the snapshot's grid rather than
+    copying entities, and are compared with other views cell by cell, so a view costs about the same however many
+    entities are in it.
+    """
+
+    def __init__(self, number: int, grid: SnapshotGrid, region: frozenset[Cell]):
+        """
+        :param number: Number of the view, from the same sequence as snapshot numbers.
+        :param region: The cells in the view.
+        """
+        self.number = number
+        self.grid = grid
+        self.snapshot = grid.snapshot
+        self.region = region
+        self.seed = self.snapshot.seed
+        self.exit = self.snapshot.exit
+        self._groups: dict[str, dict[int, dict]] | None = None
+
+    @property
+    def groups(self) -> dict[str, dict[int, dict]]:
+        """
+        The entities in the view, built when first needed, which only the text protocol does.
+        """
+        if self._groups is None:
+            self._groups = {}
+            for group in Snapshot.GROUPS:
+                entities = self.snapshot.groups[group]
+                cells = self.grid.cells[group]
+                self._groups[group] = {entity_id: entities[entity_id] for cell in self.region & cells.keys()
+                                       for entity_id in cells[cell]}
+        return self._groups
+
+    def delta_from(self, baseline: 'SnapshotView | None') -> dict[str, Any]:
+        """
+        Builds the text protocol's delta from the entities in the views, see Snapshot.delta_from.
+        """
+        return Snapshot.delta_from(self, baseline)
+
+    def contains(self, group: str, entity_id: int) -> bool:
+        return self.grid.where[group].get(entity_id) in self.region
+
+    def changes_from(self, baseline: 'SnapshotView | None') -> dict[str, tuple[set[Cell], list[int]]]:
+        """
+        :return: By group, the cells to send whole because they are new to the view or changed since the baseline, and
+                 the ids of the entities that are no longer in the view.
+        """
+        changes = {}
+        if baseline is None or baseline.grid.origin is not self.grid.origin:
+            for group in Snapshot.GROUPS:
+                old_cells = baseline.grid.cells[group] if baseline else {}
+                removed = [entity_id for cell in baseline.region & old_cells.keys()
+                           for entity_id in old_cells[cell]] if baseline else []
+                changes[group] = self.region & self.grid.cells[group].keys(), removed
+            return changes
+
+        complete = baseline.snapshot.number >= self.grid.numbers[0]
+        changed, moved, gone = self.grid.changed_since(baseline.snapshot.number if complete else self.grid.numbers[0])
+        left = baseline.region - self.region
+        kept = baseline.region & self.region
+        for group in Snapshot.GROUPS:
+            cells = self.grid.cells[group]
+            where = self.grid.where[group]
+            old_cells = baseline.grid.cells[group]
+            old_where = baseline.grid.where[group]
+            if not complete:
+                # Too old to know which entities moved since, so everything in the baseline is checked
+                changes[group] = self.region & cells.keys(), [
+                    entity_id for cell in baseline.region & old_cells.keys() for entity_id in old_cells[cell]
+                    if where.get(entity_id) not in self.region]
+                continue
+
+            # Entities only leave a view with the cells that leave it, by moving out of it, or by disappearing
+            removed = [entity_id for cell in left & old_cells.keys() for entity_id in old_cells[cell]
+                       if where.get(entity_id) not in self.region]
+            removed.extend(entity_id for entity_id in moved[group]
+                           if old_where.get(entity_id) in kept and where[entity_id] not in self.region)
+            removed.extend(entity_id for entity_id in gone[group] if old_where.get(entity_id) in kept)
+            changes[group] = ((self.region - baseline.region) | (self.region & changed[group])) & cells.keys(), removed
+        return changes
+
+    def same_content(self, other: 'SnapshotView') -> bool:
+        if self.exit != other.exit or self.region != other.region or self.grid.origin is not other.grid.origin:
+            return False
+        if self.grid is other.grid:
+            return True
+        if other.snapshot.number < self.grid.numbers[0]:
+            return False
+        changed, _, _ = self.grid.changed_since(other.snapshot.number)
+        return all(self.region.isdisjoint(changed[group]) for group in Snapshot.GROUPS)
@@ -0,0 +1,84 @@
+from collections import deque
+
+from models.Snapshot import Snapshot
+
+
+class SnapshotBuffer:
+    """
+    The last few snapshots a client applied, with the time each one arrived. Entities are drawn a little in the past,
+    at positions interpolated between the two snapshots around that time, so snapshots arriving unevenly or less often
+    than frames are drawn still move smoothly. When the next snapshot is late, positions are extrapolated from the
+    entities' velocities instead, for a limited time.
+    """
+    GROUPS = ('players', 'projectiles', 'enemies')  # Loot never moves
+
+    def __init__(self, size: int = 32, delay: float = 100.0, max_extrapolation: float = 200.0,
+                 steps_per_second: int = 60):
+        """
+        :param size: Number of snapshots kept.
+        :param delay: Milliseconds in the past that entities are drawn at.
+        :param max_extrapolation: Milliseconds past the newest snapshot that entities keep moving for.
+        :param steps_per_second: The server's simulation rate, which velocities are per step of.
+        """
+        self.entries: deque[tuple[float, Snapshot]] = deque(maxlen=size)
+        self.delay = delay
+        self.max_extrapolation = max_extrapolation
+        self.steps_per_second = steps_per_second
+
+    def add(self, received: float, snapshot: Snapshot) -> None:
+        """
+        :param received: When the snapshot arrived, in milliseconds.
+        """
+        self.entries.append((received, snapshot))
+
+    def positions(self, now: float) -> dict[str, dict[int, tuple[int, int]]]:
+        """
+        Returns where each moving entity should be drawn at the given time, by group and entity id.
+        Entities that are not in the buffer are left out, and should be drawn where the latest snapshot has them.
+
+        :param now: The current time, in milliseconds.
+        """
+        entries = list(self.entries)  # Snapshots are added from the receiving thread
+        if not entries:
+            return {}
+
+        render_time = now - self.delay
+        older, newer = None, None
+        for entry in reversed(entries):
+            if entry[0] <= render_time:
+                older = entry
+                break
+            newer = entry
+
+        if older is None:
+            # Not enough history yet, hold the oldest snapshot until render time catches up with it
+            return self._extrapolate(newer[1], 0.0)
+        if newer is None or newer[1].seed != older[1].seed:
+            return self._extrapolate(older[1], min(render_time - older[0], self.max_extrapolation))
+
+        fraction = (render_time - older[0]) / (newer[0] - older[0])
+        return self._interpolate(older[1], newer[1], fraction)
+
+    def _interpolate(self, older: Snapshot, newer: Snapshot,
+                     fraction: float) -> dict[str, dict[int, tuple[int, int]]]:
+        result = {}
+        for group in SnapshotBuffer.GROUPS:
+            previous = older.groups[group]
+            positions = {}
+            for entity_id, entity in newer.groups[group].items():
+                start = previous.get(entity_id)
+                if start is None:
+                    positions[entity_id] = entity['x'], entity['y']
+                else:
+                    positions[entity_id] = (int(round(start['x'] + (entity['x'] - start['x']) * fraction)),
+                                            int(round(start['y'] + (entity['y'] - start['y']) * fraction)))
+            result[group] = positions
+        return result
+
+    def _extrapolate(self, snapshot: Snapshot, elapsed: float) -> dict[str, dict[int, tuple[int, int]]]:
+        # Velocities are per simulation step, with y pointing up
+        steps = elapsed * self.steps_per_second / 1000
+        return {group: {entity_id: (int(round(entity['x'] + entity['vx'] * steps)),
+                                    int(round(entity['y'] - entity['vy'] * steps)))
+                        for entity_id, entity in snapshot.groups[group].items()}
+                for group in SnapshotBuffer.GROUPS}
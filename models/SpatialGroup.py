@@ -0,0 +1,87 @@
+from typing import TYPE_CHECKING
+
+from pygame import Rect
+from pygame.sprite import Group
+
+if TYPE_CHECKING:
+    from models.Entity import Entity
+
+
+class SpatialGroup(Group):
+    """
+    A sprite group that also buckets its entities into a uniform grid of square cells, so collision queries only have
+    to look at the entities in the cells a rect overlaps instead of the whole group.
+    Entities tell the groups they belong to when they move, which keeps the grid up to date.
+    """
+
+    def __init__(self, cell_size: int, *sprites):
+        self.cell_size = cell_size
+        self.cells: dict[tuple[int, int], dict['Entity', None]] = {}  # Dicts keep insertion order, unlike sets
+        self.entity_cells: dict['Entity', tuple[int, int, int, int]] = {}
+        super().__init__(*sprites)
+
+    def add_internal(self, sprite, layer=None):
+        super().add_internal(sprite, layer)
+        self._insert(sprite, self._cell_range(sprite.get_rect()))
+
+    def remove_internal(self, sprite):
+        super().remove_internal(sprite)
+        self._remove(sprite)
+
+    def update_position(self, entity: 'Entity') -> None:
+        """
+        Moves the entity to the cells covering its current rect, if they changed.
+        :param entity: An entity in this group that has moved.
+        """
+        cell_range = self._cell_range(entity.get_rect())
+        if self.entity_cells.get(entity) == cell_range:
+            return
+        self._remove(entity)
+        self._insert(entity, cell_range)
+
+    def query(self, rect: Rect) -> list['Entity']:
+        """
+        Returns the entities in the cells the rect overlaps. These are candidates only, callers still need to check the
+        entities' rects against the rect.
+        :param rect: The area to look in.
+        """
+        min_x, min_y, max_x, max_y = self._cell_range(rect)
+        if min_x == max_x and min_y == max_y:
+            return list(self.cells.get((min_x, min_y), ()))
+
+        # A rect covering more cells than there are entities is quicker to answer by checking every entity's cells
+        if (max_x - min_x + 1) * (max_y - min_y + 1) > len(self.entity_cells):
+            return [entity for entity, (left, top, right, bottom) in self.entity_cells.items()
+                    if left <= max_x and right >= min_x and top <= max_y and bottom >= min_y]
+
+        found: dict['Entity', None] = {}
+        for x in range(min_x, max_x + 1):
+            for y in range(min_y, max_y + 1):
+                cell = self.cells.get((x, y))
+                if cell:
+                    found.update(cell)
+        return list(found)
+
+    def _cell_range(self, rect: Rect) -> tuple[int, int, int, int]:
+        # Rects are right and bottom exclusive, so the last cell is the one holding the last pixel
+        return (rect.left // self.cell_size, rect.top // self.cell_size,
+                (rect.right - 1) // self.cell_size, (rect.bottom - 1) // self.cell_size)
+
+    def _insert(self, entity: 'Entity', cell_range: tuple[int, int, int, int]) -> None:
+        min_x, min_y, max_x, max_y = cell_range
+        for x in range(min_x, max_x + 1):
+            for y in range(min_y, max_y + 1):
+                self.cells.setdefault((x, y), {})[entity] = None
+        self.entity_cells[entity] = cell_range
+
+    def _remove(self, entity: 'Entity') -> None:
+        cell_range = self.entity_cells.pop(entity, None)
+        if cell_range is None:
+            return
+        min_x, min_y, max_x, max_y = cell_range
+        for x in range(min_x, max_x + 1):
+            for y in range(min_y, max_y + 1):
+                cell = self.cells[(x, y)]
+                del cell[entity]
+                if not cell:
+                    del self.cells[(x, y)]
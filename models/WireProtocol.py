@@ -0,0 +1,431 @@
+import struct
+from enum import IntEnum
+from typing import Any
+
+import numpy
+
+from models.LootModifier import ModifierType
+from models.Snapshot import Snapshot, SnapshotView
+
+TEXT_PROTOCOL_VERSION = 1
+BINARY_PROTOCOL_VERSION = 2
+PROTOCOL_VERSION = BINARY_PROTOCOL_VERSION
+
+
+class MessageType(IntEnum):
+    SNAPSHOT = 1
+    ACK = 2
+    MOVE = 3
+    STOP = 4
+    ATTACK = 5
+    ATTACK_STOP = 6
+    GRAB_INVENTORY = 7
+    DROP_INVENTORY = 8
+    GRAB_GEAR = 9
+    DROP_GEAR = 10
+    DROP_GROUND = 11
+    OWNER = 12
+    INPUT = 13
+
+
+class WireProtocol:
+    """
+    Encoding of messages for both protocol versions.
+
+    Version 1 is the original text protocol: newline terminated JSON snapshots and colon separated commands.
+    Version 2 frames every message as a little endian uint32 payload length and a uint8 MessageType, followed by the
+    payload. Snapshots are built from fixed layout records, so nothing is parsed or converted on the client.
+
+    Clients request a version by sending the text line 'connect:<version>'. The server answers with
+    'connect:<client_id>:<version>:<sim_rate>' and both sides use that version for everything after the answer.
+    A bare 'connect' is answered with 'connect:<client_id>' and the connection stays on version 1.
+    """
+    HEADER = struct.Struct('<IB')
+
+    # Text command name and the argument types that follow it
+    TEXT_COMMANDS: dict[MessageType, tuple[str, tuple[type, ...]]] = {
+        MessageType.ACK: ('ack', (int,)),
+        MessageType.MOVE: ('move', (int,)),
+        MessageType.STOP: ('stop', (int,)),
+        MessageType.ATTACK: ('attack', (float, float)),
+        MessageType.ATTACK_STOP: ('attack_stop', ()),
+        MessageType.GRAB_INVENTORY: ('grab_inventory', (int, int)),
+        MessageType.DROP_INVENTORY: ('drop_inventory', (int, int, int, int)),
+        MessageType.GRAB_GEAR: ('grab_gear', (int,)),
+        MessageType.DROP_GEAR: ('drop_gear', (int, int, int)),
+        MessageType.DROP_GROUND: ('drop_ground', (int, int, float, float)),
+        MessageType.INPUT: ('input', (int, int)),
+    }
+    TEXT_COMMAND_TYPES = {name: message_type for message_type, (name, _) in TEXT_COMMANDS.items()}
+
+    COMMANDS: dict[MessageType, struct.Struct] = {
+        MessageType.ACK: struct.Struct('<I'),
+        MessageType.MOVE: struct.Struct('<B'),
+        MessageType.STOP: struct.Struct('<B'),
+        MessageType.ATTACK: struct.Struct('<ff'),
+        MessageType.ATTACK_STOP: struct.Struct('<'),
+        MessageType.GRAB_INVENTORY: struct.Struct('<II'),
+        MessageType.DROP_INVENTORY: struct.Struct('<IIhh'),
+        MessageType.GRAB_GEAR: struct.Struct('<B'),
+        MessageType.DROP_GEAR: struct.Struct('<IIB'),
+        MessageType.DROP_GROUND: struct.Struct('<IIff'),
+        MessageType.INPUT: struct.Struct('<IB'),  # sequence, direction
+    }
+
+    SNAPSHOT_HEADER = struct.Struct('<IIqB')  # snapshot, baseline (0 if none), seed, has exit
+    COUNT = struct.Struct('<I')
+    ID = struct.Struct('<I')
+    ENTITY = struct.Struct('<Iiiff')  # id, x, y, vx, vy
+    RECORD = numpy.dtype([('id', '<u4'), ('x', '<i4'), ('y', '<i4'), ('vx', '<f4'), ('vy', '<f4')])  # Same as ENTITY
+    ENEMY = struct.Struct('<IiiffBi')  # entity, type, health
+    PLAYER = struct.Struct('<IiiffQIB')  # entity, client_id, last input, equipment count or 255 if unchanged
+    LOOT = struct.Struct('<IiiffIIBB')  # entity, server_id, loot_id, type, modifier count
+    MODIFIER = struct.Struct('<IBB')  # modifier_id, type, value count
+    INT_VALUE = struct.Struct('<Bq')
+    FLOAT_VALUE = struct.Struct('<Bd')
+    CONTAINER = struct.Struct('<HHIH')  # width, height, version, loot count
+    CONTAINER_POSITION = struct.Struct('<hh')
+    GEAR_HEADER = struct.Struct('<II')  # version, loot count
+    GEAR_SLOT = struct.Struct('<B')
+    EQUIPMENT = struct.Struct('<BB')  # gear slot, loot type
+    FLAGS = struct.Struct('<B')
+    UNCHANGED = 255
+
+    INVENTORY = 1
+    CURSOR_LOOT = 2
+    GEAR = 4
+
+    MODIFIER_TYPES = list(ModifierType)
+    MODIFIER_TYPE_INDEX = {modifier_type: i for i, modifier_type in enumerate(MODIFIER_TYPES)}
+
+    @staticmethod
+    def frame(message_type: MessageType, payload: bytes) -> bytes:
+        return WireProtocol.HEADER.pack(len(payload), message_type) + payload
+
+    @staticmethod
+    def read_frame(buffer: bytes) -> tuple[MessageType, bytes, int] | None:
+        """
+        Reads the first complete frame in the buffer.
+
+        :return: The message type, the payload and the total length of the frame, or None if the frame is incomplete.
+        """
+        if len(buffer) < WireProtocol.HEADER.size:
+            return None
+        length, message_type = WireProtocol.HEADER.unpack_from(buffer)
+        end = WireProtocol.HEADER.size + length
+        if len(buffer) < end:
+            return None
+        return MessageType(message_type), bytes(buffer[WireProtocol.HEADER.size:end]), end
+
+    @staticmethod
+    def encode_command(message_type: MessageType, args: tuple) -> bytes:
+        return WireProtocol.frame(message_type, WireProtocol.COMMANDS[message_type].pack(*args))
+
+    @staticmethod
+    def decode_command(message_type: MessageType, payload: bytes) -> tuple:
+        if message_type not in WireProtocol.COMMANDS:
+            raise ValueError(f'Unexpected message type: {message_type}')
+        return WireProtocol.COMMANDS[message_type].unpack(payload)
+
+    @staticmethod
+    def format_text_command(message_type: MessageType, args: tuple) -> bytes:
+        name, _ = WireProtocol.TEXT_COMMANDS[message_type]
+        if message_type == MessageType.ATTACK:
+            return f'{name}:{args[0]},{args[1]}\n'.encode()
+        return ':'.join([name, *(str(arg) for arg in args)]).encode() + b'\n'
+
+    @staticmethod
+    def parse_text_command(message: str) -> tuple[MessageType, tuple]:
+        name, _, rest = message.partition(':')
+        if name not in WireProtocol.TEXT_COMMAND_TYPES:
+            raise ValueError(f'Unknown command: {message}')
+        message_type = WireProtocol.TEXT_COMMAND_TYPES[name]
+        _, arg_types = WireProtocol.TEXT_COMMANDS[message_type]
+
+        values = rest.split(',') if message_type == MessageType.ATTACK else rest.split(':')
+        if not arg_types:
+            return message_type, ()
+        if len(values) != len(arg_types):
+            raise ValueError(f'Expected {len(arg_types)} arguments: {message}')
+        return message_type, tuple(arg_type(value) for arg_type, value in zip(arg_types, values))
+
+    @staticmethod
+    def encode_snapshot(snapshot: Snapshot, baseline: Snapshot | None) -> bytes:
+        """
+        Encodes the delta from the baseline to the snapshot. Changed entities are sent as whole records, except that a
+        player's equipment is only included when it changed.
+        """
+        parts = [WireProtocol.SNAPSHOT_HEADER.pack(snapshot.number, baseline.number if baseline else 0,
+                                                   snapshot.seed, snapshot.exit is not None)]
+        if snapshot.exit is not None:
+            parts.append(WireProtocol._pack_entity(snapshot.exit))
+
+        for group in Snapshot.GROUPS:
+            current = snapshot.groups[group]
+            previous = baseline.groups[group] if baseline else {}
+
+            changed = []
+            for entity_id, entity in current.items():
+                old_entity = previous.get(entity_id)
+                if old_entity is None or old_entity != entity:
+                    changed.append((entity, old_entity))
+            removed = [entity_id for entity_id in previous if entity_id not in current]
+
+            parts.append(WireProtocol.COUNT.pack(len(changed)))
+            for entity, old_entity in changed:
+                if group == 'players':
+                    WireProtocol._pack_player(entity, old_entity, parts)
+                elif group == 'loot':
+                    WireProtocol._pack_loot(entity, parts)
+                elif group == 'enemies':
+                    parts.append(WireProtocol._pack_enemy(entity))
+                else:
+                    parts.append(WireProtocol._pack_entity(entity))
+
+            parts.append(WireProtocol.COUNT.pack(len(removed)))
+            parts.extend(WireProtocol.ID.pack(entity_id) for entity_id in removed)
+
+        return WireProtocol.frame(MessageType.SNAPSHOT, b''.join(parts))
+
+    @staticmethod
+    def encode_view(view: SnapshotView, baseline: SnapshotView | None) -> bytes:
+        """
+        Encodes the delta from the baseline to the view like encode_snapshot does, except that every entity in a cell
+        that changed is sent. The records of a cell are packed once and kept in the grid, so every view of the snapshot
+        shares them.
+        """
+        grid = view.grid
+        parts = [WireProtocol.SNAPSHOT_HEADER.pack(view.number, baseline.number if baseline else 0,
+                                                   view.seed, view.exit is not None)]
+        if view.exit is not None:
+            parts.append(WireProtocol._pack_entity(view.exit))
+
+        for group, (changed, removed) in view.changes_from(baseline).items():
+            entities = view.snapshot.groups[group]
+            cells = grid.cells[group]
+            parts.append(WireProtocol.COUNT.pack(sum(map(len, map(cells.__getitem__, changed)))))
+            if group == 'players':
+                # Whether the equipment is included depends on what the client has, so there are two records
+                old_players = baseline.snapshot.groups[group] if baseline else {}
+                for cell in changed:
+                    for entity_id in cells[cell]:
+                        player = entities[entity_id]
+                        old_player = (old_players.get(entity_id) if baseline and baseline.contains(group, entity_id)
+                                      else None)
+                        key = entity_id, old_player is None or old_player['equipment'] != player['equipment']
+                        record = grid.records.get(key)
+                        if record is None:
+                            record_parts = []
+                            WireProtocol._pack_player(player, old_player, record_parts)
+                            record = grid.records[key] = b''.join(record_parts)
+                        parts.append(record)
+            else:
+                blobs = grid.blobs[group]
+                for cell in changed:
+                    blob = blobs.get(cell)
+                    if blob is None:
+                        blob_parts = []
+                        for entity_id in cells[cell]:
+                            entity = entities[entity_id]
+                            if group == 'loot':
+                                WireProtocol._pack_loot(entity, blob_parts)
+                            else:
+                                blob_parts.append(WireProtocol._pack_enemy(entity) if group == 'enemies'
+                                                  else WireProtocol._pack_entity(entity))
+                        blob = blobs[cell] = b''.join(blob_parts)
+                    parts.append(blob)
+
+            parts.append(WireProtocol.COUNT.pack(len(removed)))
+            parts.append(struct.pack(f'<{len(removed)}I', *removed))
+
+        return WireProtocol.frame(MessageType.SNAPSHOT, b''.join(parts))
+
+    @staticmethod
+    def decode_snapshot(payload: bytes) -> dict[str, Any]:
+        """
+        Decodes a snapshot payload into the same delta format that Snapshot.delta_from produces. The changed projectiles
+        are also kept as the array of records they were read from, under 'records', for ProjectilePool.merge_records.
+        """
+        number, baseline, seed, has_exit = WireProtocol.SNAPSHOT_HEADER.unpack_from(payload)
+        offset = WireProtocol.SNAPSHOT_HEADER.size
+        result = {
+            'snapshot': number,
+            'baseline': baseline or None,
+            'seed': seed,
+            'exit': None,
+        }
+        if has_exit:
+            result['exit'], offset = WireProtocol._unpack_entity(payload, offset)
+
+        for group in Snapshot.GROUPS:
+            (count,) = WireProtocol.COUNT.unpack_from(payload, offset)
+            offset += WireProtocol.COUNT.size
+            if group == 'projectiles':
+                # Fixed size records can be read in one pass
+                records = numpy.frombuffer(payload, WireProtocol.RECORD, count, offset)
+                changed = [{'id': entity_id, 'x': x, 'y': y, 'vx': vx, 'vy': vy}
+                           for entity_id, x, y, vx, vy in records.tolist()]
+                offset += count * WireProtocol.ENTITY.size
+            elif group == 'enemies':
+                end = offset + count * WireProtocol.ENEMY.size
+                changed = [{'id': entity_id, 'x': x, 'y': y, 'vx': vx, 'vy': vy, 'health': health, 'type': enemy_type}
+                           for entity_id, x, y, vx, vy, enemy_type, health
+                           in WireProtocol.ENEMY.iter_unpack(payload[offset:end])]
+                offset = end
+            else:
+                changed = []
+                for _ in range(count):
+                    if group == 'players':
+                        entity, offset = WireProtocol._unpack_player(payload, offset)
+                    else:
+                        entity, offset = WireProtocol._unpack_loot(payload, offset)
+                    changed.append(entity)
+
+            (count,) = WireProtocol.COUNT.unpack_from(payload, offset)
+            offset += WireProtocol.COUNT.size
+            removed = [entity_id for (entity_id,) in WireProtocol.ID.iter_unpack(
+                payload[offset:offset + count * WireProtocol.ID.size])]
+            offset += count * WireProtocol.ID.size
+
+            result[group] = {'changed': changed, 'removed': removed}
+        result['projectiles']['records'] = records
+        return result
+
+    @staticmethod
+    def _pack_entity(entity: dict[str, Any]) -> bytes:
+        return WireProtocol.ENTITY.pack(entity['id'], entity['x'], entity['y'], entity['vx'], entity['vy'])
+
+    @staticmethod
+    def _unpack_entity(payload: bytes, offset: int) -> tuple[dict[str, Any], int]:
+        entity_id, x, y, vx, vy = WireProtocol.ENTITY.unpack_from(payload, offset)
+        return {'id': entity_id, 'x': x, 'y': y, 'vx': vx, 'vy': vy}, offset + WireProtocol.ENTITY.size
+
+    @staticmethod
+    def _pack_enemy(enemy: dict[str, Any]) -> bytes:
+        return WireProtocol.ENEMY.pack(enemy['id'], enemy['x'], enemy['y'], enemy['vx'], enemy['vy'],
+                                       enemy['type'], enemy['health'])
+
+    @staticmethod
+    def _pack_loot(loot: dict[str, Any], parts: list[bytes]) -> None:
+        parts.append(WireProtocol.LOOT.pack(loot['id'], loot['x'], loot['y'], loot['vx'], loot['vy'],
+                                            loot['server_id'], loot['loot_id'], loot['type'], len(loot['modifiers'])))
+        for modifier in loot['modifiers']:
+            modifier_type = WireProtocol.MODIFIER_TYPE_INDEX[ModifierType(modifier['type'])]
+            parts.append(WireProtocol.MODIFIER.pack(modifier['modifier_id'], modifier_type, len(modifier['values'])))
+            for value in modifier['values']:
+                if isinstance(value, int):
+                    parts.append(WireProtocol.INT_VALUE.pack(0, value))
+                else:
+                    parts.append(WireProtocol.FLOAT_VALUE.pack(1, value))
+
+    @staticmethod
+    def _unpack_loot(payload: bytes, offset: int) -> tuple[dict[str, Any], int]:
+        (entity_id, x, y, vx, vy,
+         server_id, loot_id, loot_type, modifier_count) = WireProtocol.LOOT.unpack_from(payload, offset)
+        offset += WireProtocol.LOOT.size
+
+        modifiers = []
+        for _ in range(modifier_count):
+            modifier_id, modifier_type, value_count = WireProtocol.MODIFIER.unpack_from(payload, offset)
+            offset += WireProtocol.MODIFIER.size
+            values = []
+            for _ in range(value_count):
+                if payload[offset] == 0:
+                    _, value = WireProtocol.INT_VALUE.unpack_from(payload, offset)
+                else:
+                    _, value = WireProtocol.FLOAT_VALUE.unpack_from(payload, offset)
+                offset += WireProtocol.INT_VALUE.size
+                values.append(value)
+            modifiers.append({
+                'server_id': server_id,
+                'loot_id': loot_id,
+                'modifier_id': modifier_id,
+                'type': WireProtocol.MODIFIER_TYPES[modifier_type],
+                'values': values,
+            })
+
+        loot = {'id': entity_id, 'x': x, 'y': y, 'vx': vx, 'vy': vy,
+                'server_id': server_id, 'loot_id': loot_id, 'type': loot_type, 'modifiers': modifiers}
+        return loot, offset
+
+    @staticmethod
+    def _pack_player(player: dict[str, Any], old_player: dict[str, Any] | None, parts: list[bytes]) -> None:
+        equipment = player['equipment']
+        changed = old_player is None or old_player['equipment'] != equipment
+        count = len(equipment) if changed else WireProtocol.UNCHANGED
+        parts.append(WireProtocol.PLAYER.pack(player['id'], player['x'], player['y'], player['vx'], player['vy'],
+                                              player['client_id'], player['input'], count))
+        if changed:
+            parts.extend(WireProtocol.EQUIPMENT.pack(slot, loot_type) for slot, loot_type in equipment)
+
+    @staticmethod
+    def _unpack_player(payload: bytes, offset: int) -> tuple[dict[str, Any], int]:
+        entity_id, x, y, vx, vy, client_id, last_input, count = WireProtocol.PLAYER.unpack_from(payload, offset)
+        offset += WireProtocol.PLAYER.size
+        player = {'id': entity_id, 'x': x, 'y': y, 'vx': vx, 'vy': vy, 'client_id': client_id, 'input': last_input}
+        if count != WireProtocol.UNCHANGED:
+            end = offset + count * WireProtocol.EQUIPMENT.size
+            player['equipment'] = list(WireProtocol.EQUIPMENT.iter_unpack(payload[offset:end]))
+            offset = end
+        return player, offset
+
+    @staticmethod
+    def encode_owner(owner: dict[str, Any]) -> bytes:
+        """
+        Encodes the private part of a player for their own client. Like Player.owner_broadcast, but any of the
+        containers and the gear may be left out when the client already has them.
+        """
+        flags = ((WireProtocol.INVENTORY if 'inventory' in owner else 0) |
+                 (WireProtocol.CURSOR_LOOT if 'cursor_loot' in owner else 0) |
+                 (WireProtocol.GEAR if 'gear' in owner else 0))
+        parts = [WireProtocol.FLAGS.pack(flags)]
+        if flags & WireProtocol.INVENTORY:
+            WireProtocol._pack_container(owner['inventory'], parts)
+        if flags & WireProtocol.CURSOR_LOOT:
+            WireProtocol._pack_container(owner['cursor_loot'], parts)
+        if flags & WireProtocol.GEAR:
+            parts.append(WireProtocol.GEAR_HEADER.pack(owner['gear_version'], len(owner['gear'])))
+            for slot, loot in owner['gear']:
+                parts.append(WireProtocol.GEAR_SLOT.pack(slot))
+                WireProtocol._pack_loot(loot, parts)
+        return WireProtocol.frame(MessageType.OWNER, b''.join(parts))
+
+    @staticmethod
+    def decode_owner(payload: bytes) -> dict[str, Any]:
+        (flags,) = WireProtocol.FLAGS.unpack_from(payload)
+        offset = WireProtocol.FLAGS.size
+        owner = {}
+        if flags & WireProtocol.INVENTORY:
+            owner['inventory'], offset = WireProtocol._unpack_container(payload, offset)
+        if flags & WireProtocol.CURSOR_LOOT:
+            owner['cursor_loot'], offset = WireProtocol._unpack_container(payload, offset)
+        if flags & WireProtocol.GEAR:
+            owner['gear_version'], count = WireProtocol.GEAR_HEADER.unpack_from(payload, offset)
+            offset += WireProtocol.GEAR_HEADER.size
+            gear = []
+            for _ in range(count):
+                (slot,) = WireProtocol.GEAR_SLOT.unpack_from(payload, offset)
+                loot, offset = WireProtocol._unpack_loot(payload, offset + WireProtocol.GEAR_SLOT.size)
+                gear.append((slot, loot))
+            owner['gear'] = gear
+        return owner
+
+    @staticmethod
+    def _pack_container(container: dict[str, Any], parts: list[bytes]) -> None:
+        parts.append(WireProtocol.CONTAINER.pack(container['width'], container['height'], container['version'],
+                                                 len(container['loot'])))
+        for x, y, loot in container['loot']:
+            parts.append(WireProtocol.CONTAINER_POSITION.pack(x, y))
+            WireProtocol._pack_loot(loot, parts)
+
+    @staticmethod
+    def _unpack_container(payload: bytes, offset: int) -> tuple[dict[str, Any], int]:
+        width, height, version, count = WireProtocol.CONTAINER.unpack_from(payload, offset)
+        offset += WireProtocol.CONTAINER.size
+        loot_list = []
+        for _ in range(count):
+            x, y = WireProtocol.CONTAINER_POSITION.unpack_from(payload, offset)
+            loot, offset = WireProtocol._unpack_loot(payload, offset + WireProtocol.CONTAINER_POSITION.size)
+            loot_list.append((x, y, loot))
+        return {'width': width, 'height': height, 'version': version, 'loot': loot_list}, offset
+
@@ -0,0 +1,121 @@
+import multiprocessing
+import random
+import sys
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any
+
+from models.Area import Area
+from models.Enemy import EnemyType, NormalEnemy, BossEnemy
+from systems.EnemySystem import EnemySystem
+
+
+def generate_area(seed: int) -> dict[str, Any]:
+    """
+    Generates an area and its enemies on a worker process.
+    Sprites can't be pickled, so the result only describes the area. The server rebuilds it with build_area.
+    """
+    area = Area(seed)
+    EnemySystem().spawn_enemies(area)
+    return {
+        'seed': seed,
+        'tiles': area.tiles,
+        'random_state': area.random.getstate(),
+        'enemies': [{'type': EnemyType.BOSS if isinstance(enemy, BossEnemy) else EnemyType.NORMAL,
+                     'location': enemy.get_pixel_location(), 'health': enemy.health} for enemy in area.enemies]
+    }
+
+
+def build_area(generated: dict[str, Any]) -> Area:
+    area = Area(generated['seed'], generated['tiles'])
+    area.random.setstate(generated['random_state'])
+    for enemy in generated['enemies']:
+        enemy_class = BossEnemy if enemy['type'] == EnemyType.BOSS else NormalEnemy
+        area.enemies.add(enemy_class(tuple(enemy['location']), enemy['health']))
+    return area
+
+
+class AreaPoolSystem:
+    """
+    Generates areas ahead of time on a process pool, so a player walking through an exit only has to wait for the
+    cheap rebuild of an area that is already generated.
+
+    Seeds are picked up front, when an area is queued for generation, and areas are handed out in that order. Whenever
+    fewer than refill_below areas are ready or being generated, the pool is topped back up to pool_size.
+    If the next area isn't ready when one is needed the pool has run dry, and the game waits for it instead.
+    """
+
+    def __init__(self, pool_size: int = 2, refill_below: int | None = None, max_workers: int = 1,
+                 seed: int | None = None):
+        """
+        :param pool_size: Number of areas to keep ready or in progress. 0 generates every area when it's needed.
+        :param refill_below: Top the pool up once it holds fewer areas than this. Defaults to pool_size.
+        :param max_workers: Number of worker processes.
+        :param seed: Seeds the choice of area seeds, random if not given.
+        """
+        self.pool_size = pool_size
+        self.refill_below = pool_size if refill_below is None else refill_below
+        self.max_workers = max_workers
+        self.seed_random = random.Random(seed)
+        self.executor: ProcessPoolExecutor | None = None
+        self.pending: deque[tuple[int, Future]] = deque()
+
+        self.taken = 0
+        self.ran_dry = 0
+
+    def start(self) -> None:
+        if self.pool_size > 0:
+            # Spawned workers don't inherit the server's sockets, threads or pygame state
+            self.executor = ProcessPoolExecutor(self.max_workers, multiprocessing.get_context('spawn'))
+            self.refill()
+
+    def stop(self) -> None:
+        if self.executor:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+        self.pending.clear()
+        if self.taken:
+            print(f'Area pool ran dry for {self.ran_dry} of {self.taken} areas.')
+
+    def take(self) -> Area:
+        """
+        Returns the next area, with its enemies spawned.
+        """
+        self.taken += 1
+        if not self.pending:
+            self.ran_dry += 1
+            return self.generate_inline(self.next_seed())
+
+        seed, future = self.pending.popleft()
+        if not future.done():
+            self.ran_dry += 1
+            print('Area pool ran dry, waiting for the next area.')
+        try:
+            area = build_area(future.result())
+        except Exception as e:
+            print(f'Area generation failed on the pool, generating it here instead: {e}')
+            area = self.generate_inline(seed)
+
+        self.refill()
+        return area
+
+    def refill(self) -> None:
+        if self.executor is None or len(self.pending) >= self.refill_below:
+            return
+        while len(self.pending) < self.pool_size:
+            seed = self.next_seed()
+            try:
+                self.pending.append((seed, self.executor.submit(generate_area, seed)))
+            except RuntimeError as e:
+                print(f'Area pool stopped, areas will be generated when needed: {e}')
+                self.executor = None
+                return
+
+    def next_seed(self) -> int:
+        return self.seed_random.randrange(sys.maxsize)
+
+    @staticmethod
+    def generate_inline(seed: int) -> Area:
+        area = Area(seed)
+        EnemySystem().spawn_enemies(area)
+        return area
@@ -1,13 +1,19 @@
+from typing import Callable
+
 from models.Area import Area
 from models.Client import Client
 from models.Player import Player
+from systems.AreaPoolSystem import AreaPoolSystem
 from systems.EnemySystem import EnemySystem
 
 
 class AreaSystem:
-    def __init__(self):
+    def __init__(self, area_pool: AreaPoolSystem | None = None):
         self.enemy_system = EnemySystem()
+        self.area_pool = area_pool
         self.areas: list[Area] = []
+        # Called instead of moving players through exits when the next area is decided elsewhere, see ShardWorker
+        self.exit_handler: Callable[[Area, Player], None] | None = None
 
     def run_once(self, clients: list[Client]):
         if len(clients) == 0:
@@ -18,9 +24,7 @@ class AreaSystem:
 
         # Create the first area
         if len(self.areas) == 0:
-            area = Area()
-            self.enemy_system.spawn_enemies(area)
-            self.areas.append(area)
+            self.areas.append(self.create_area())
 
         # Spawn newly connected players in the oldest area
         spawn_area = self.areas[0]
@@ -35,15 +39,18 @@ class AreaSystem:
         for i, area in enumerate(self.areas):
             if not area.exit:
                 continue
-            exit_rect = area.exit.image.get_rect(topleft=area.exit.get_pixel_location())
-            for player in area.players:
-                player_rect = player.image.get_rect(topleft=player.get_pixel_location())
-                if exit_rect.colliderect(player_rect):
+            exit_rect = area.exit.get_rect()
+            for player in area.players.query(exit_rect):
+                if exit_rect.colliderect(player.get_rect()):
+                    if self.exit_handler:
+                        area.players.remove(player)
+                        self.exit_handler(area, player)
+                        continue
+
                     # If the player is in the last area, create a new area
                     if i == len(self.areas) - 1 and not new_area:
-                        new_area = Area()
+                        new_area = self.create_area()
                         move_area = new_area
-                        self.enemy_system.spawn_enemies(new_area)
                     else:
                         move_area = self.areas[i + 1]
 
@@ -54,3 +61,13 @@ class AreaSystem:
 
         if new_area:
             self.areas.append(new_area)
+
+    def create_area(self) -> Area:
+        """
+        Returns a new area with its enemies spawned, from the pool if there is one.
+        """
+        if self.area_pool:
+            return self.area_pool.take()
+        area = Area()
+        self.enemy_system.spawn_enemies(area)
+        return area
@@ -1,30 +1,114 @@
 import json
 import socket
+import time
 
 from models.Area import Area
+from models.AreaCache import AreaCache
+from models.MessageFramer import MessageFramer
+from models.Snapshot import Snapshot
+from models.SnapshotBuffer import SnapshotBuffer
+from models.WireProtocol import MessageType, WireProtocol, BINARY_PROTOCOL_VERSION, TEXT_PROTOCOL_VERSION
+from systems.ClientSenderSystem import ClientSenderSystem
+from systems.PredictionSystem import PredictionSystem
 
 
 class ClientReceiverSystem:
-    def __init__(self, server: socket.socket):
+    def __init__(self, server: socket.socket, sender: ClientSenderSystem, area_cache: AreaCache | None = None):
         self.server = server
+        self.sender = sender
+        self.area_cache = area_cache
         self.area: Area | None = None
         self.client_id: int | None = None
-        self.buffer: str = ''
+        self.framer = MessageFramer()
+        self.snapshots: dict[int, Snapshot] = {}  # Snapshots the server may still send deltas against
+        self.applied: Snapshot | None = None  # The snapshot the area was last updated to
+        self.owner: dict = {}  # The latest private state of this client's player, as sent by the server
+        self.history = SnapshotBuffer()  # Recently applied snapshots, for drawing entities between them
+        self.prediction_system: PredictionSystem | None = None  # Told the server's simulation rate on connection
 
     def receive_updates(self):
-        data = self.server.recv(1024)
-        if not data:
+        if not self.framer.recv_into(self.server):
             raise ConnectionResetError('Server disconnected.')
 
-        self.buffer += data.decode()
-
         # Process all complete messages in the buffer
-        while '\n' in self.buffer:
-            message, self.buffer = self.buffer.split('\n', 1)
+        while True:
+            if self.sender.protocol_version and self.sender.protocol_version >= BINARY_PROTOCOL_VERSION:
+                try:
+                    frame = self.framer.next_frame()
+                except ValueError as e:
+                    # The stream can't be trusted to be in step any more
+                    raise ConnectionResetError(f'Invalid message from server: {e}')
+                if frame is None:
+                    break
+                message_type, payload = frame
+                if message_type == MessageType.SNAPSHOT:
+                    self.apply_delta(WireProtocol.decode_snapshot(payload))
+                elif message_type == MessageType.OWNER:
+                    self.apply_owner(WireProtocol.decode_owner(payload))
+                continue
+
+            line = self.framer.next_line()
+            if line is None:
+                break
+            message = line.decode()
             if message.startswith('connect:'):
-                client_id = message.split(':')[1]
-                self.client_id = int(client_id)
+                # Format: connect:client_id, or connect:client_id:protocol_version:sim_rate
+                split = message.split(':')
+                self.client_id = int(split[1])
+                if len(split) > 3:
+                    self.history.steps_per_second = int(split[3])
+                    if self.prediction_system:
+                        self.prediction_system.set_steps_per_second(int(split[3]))
+                self.sender.connected(int(split[2]) if len(split) > 2 else TEXT_PROTOCOL_VERSION)
+
+            elif message.startswith('owner:'):
+                self.apply_owner(json.loads(message[len('owner:'):]))
 
             elif message.startswith('{'):
-                update = json.loads(message)
-                self.area = Area.from_broadcast(update, self.area)
+                delta = json.loads(message)
+                self.apply_delta(delta)
+
+    def apply_delta(self, delta: dict) -> None:
+        baseline = None
+        if delta['baseline'] is not None:
+            baseline = self.snapshots.get(delta['baseline'])
+            if baseline is None:
+                print(f'Dropping snapshot {delta["snapshot"]}, baseline {delta["baseline"]} is unknown.')
+                return
+
+        snapshot = Snapshot.from_delta(delta, baseline)
+        if (baseline is not None and baseline is self.applied and self.area is not None and
+                baseline.seed == snapshot.seed):
+            # Usually the baseline is the last snapshot applied, and only what changed since needs to be touched
+            self.area.merge_delta(delta, snapshot, baseline)
+        else:
+            self.area = Area.from_broadcast(snapshot.to_broadcast(), self.area, self.area_cache)
+        self.applied = snapshot
+        self.merge_owner()
+        self.history.add(time.perf_counter() * 1000, snapshot)
+
+        # The server never uses a baseline older than the last one it used, or older than a full snapshot
+        if baseline:
+            self.snapshots = {number: s for number, s in self.snapshots.items() if number >= baseline.number}
+        else:
+            self.snapshots = {}
+        self.snapshots[snapshot.number] = snapshot
+        self.sender.ack(snapshot.number)
+
+    def apply_owner(self, owner: dict) -> None:
+        """
+        Keeps the parts of the player's private state that were sent, which may be only some of it.
+        """
+        self.owner.update(owner)
+        self.merge_owner()
+
+    def merge_owner(self) -> None:
+        """
+        Merges the private state into this client's player, which may have been recreated by a snapshot.
+        Containers and gear whose version the player already has are skipped.
+        """
+        if not self.owner or self.area is None:
+            return
+        for player in self.area.players:
+            if player.client_id == self.client_id:
+                player.merge_owner_broadcast(self.owner)
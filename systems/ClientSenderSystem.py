@@ -0,0 +1,70 @@
+import socket
+import threading
+
+from models.Direction import Direction
+from models.WireProtocol import MessageType, WireProtocol, BINARY_PROTOCOL_VERSION, PROTOCOL_VERSION
+
+
+class ClientSenderSystem:
+    """
+    Sends commands to the server in whichever protocol version was agreed during connection setup.
+    Commands issued before the server has answered the connection request are dropped.
+    Inputs are sent from the game thread and acks from the receiver thread, so sends are serialized with a lock, or the
+    bytes of two commands could interleave on the socket.
+    """
+
+    def __init__(self, server: socket.socket):
+        self.server = server
+        self.protocol_version: int | None = None
+        self.lock = threading.Lock()
+
+    def connect(self) -> None:
+        with self.lock:
+            self.server.sendall(f'connect:{PROTOCOL_VERSION}\n'.encode())
+
+    def connected(self, protocol_version: int) -> None:
+        self.protocol_version = protocol_version
+
+    def send(self, message_type: MessageType, *args) -> None:
+        if self.protocol_version is None:
+            return
+
+        if self.protocol_version >= BINARY_PROTOCOL_VERSION:
+            data = WireProtocol.encode_command(message_type, args)
+        else:
+            data = WireProtocol.format_text_command(message_type, args)
+        with self.lock:
+            self.server.sendall(data)
+
+    def ack(self, snapshot_number: int) -> None:
+        self.send(MessageType.ACK, snapshot_number)
+
+    def move(self, direction: Direction) -> None:
+        self.send(MessageType.MOVE, direction.value)
+
+    def stop(self, direction: Direction) -> None:
+        self.send(MessageType.STOP, direction.value)
+
+    def input(self, sequence: int, direction: Direction) -> None:
+        self.send(MessageType.INPUT, sequence, direction.value)
+
+    def attack(self, angle: float, magnitude: float) -> None:
+        self.send(MessageType.ATTACK, angle, magnitude)
+
+    def attack_stop(self) -> None:
+        self.send(MessageType.ATTACK_STOP)
+
+    def grab_inventory(self, server_id: int, loot_id: int) -> None:
+        self.send(MessageType.GRAB_INVENTORY, server_id, loot_id)
+
+    def drop_inventory(self, server_id: int, loot_id: int, col: int, row: int) -> None:
+        self.send(MessageType.DROP_INVENTORY, server_id, loot_id, col, row)
+
+    def grab_gear(self, slot: int) -> None:
+        self.send(MessageType.GRAB_GEAR, slot)
+
+    def drop_gear(self, server_id: int, loot_id: int, slot: int) -> None:
+        self.send(MessageType.DROP_GEAR, server_id, loot_id, slot)
+
+    def drop_ground(self, server_id: int, loot_id: int, x: int, y: int) -> None:
+        self.send(MessageType.DROP_GROUND, server_id, loot_id, x, y)
@@ -12,21 +12,21 @@ class DamageSystem:
 
     def apply_damage(self):
         for area in self.area_system.areas:
-            for enemy in area.enemies:
-                enemy_rect = enemy.image.get_rect(topleft=enemy.get_pixel_location())
-                for projectile in area.projectiles:
-                    proj_rect = projectile.image.get_rect(topleft=projectile.get_pixel_location())
-                    if not enemy_rect.colliderect(proj_rect):
-                        continue
+            enemies = list(area.enemies)
+            for enemy_index, projectile in area.projectiles.collide(enemies):
+                # A projectile that disappeared on an earlier enemy can't hit a later one
+                if not projectile.alive():
+                    continue
 
-                    collision_behaviors = projectile.get_collision_behaviors()
-                    if CollisionBehavior.DAMAGE in collision_behaviors:
-                        enemy.health -= projectile.damage
-                        if enemy.health <= 0:
-                            if isinstance(enemy, BossEnemy):
-                                area.exit = ExitDoor(enemy.get_pixel_location())
-                            self.loot_system.generate_loot(area, enemy)
-                            enemy.kill()
+                enemy = enemies[enemy_index]
+                collision_behaviors = projectile.get_collision_behaviors()
+                if CollisionBehavior.DAMAGE in collision_behaviors:
+                    enemy.health -= projectile.damage
+                    if enemy.health <= 0:
+                        if isinstance(enemy, BossEnemy):
+                            area.exit = ExitDoor(enemy.get_pixel_location())
+                        self.loot_system.generate_loot(area, enemy)
+                        enemy.kill()
 
-                    if CollisionBehavior.DISAPPEAR in collision_behaviors:
-                        projectile.kill()
+                if CollisionBehavior.DISAPPEAR in collision_behaviors:
+                    projectile.kill()
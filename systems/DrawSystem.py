@@ -1,5 +1,6 @@
 import math
 import random
+import time
 
 import pygame
 from pygame import Surface
@@ -11,17 +12,25 @@ from models.ExitDoor import ExitDoor
 from models.Loot import Loot, GearSlot
 from models.Player import Player
 from models.Projectile import Projectile
+from models.SnapshotBuffer import SnapshotBuffer
 from systems.InputSystem import InputSystem, Control
 from systems.InteractableSystem import InteractableSystem, Interactable, ScreenLayer
 
 
 class DrawSystem:
-    def __init__(self, clock: pygame.time.Clock, input_system: InputSystem, interactable_system: InteractableSystem) -> None:
+    def __init__(self, clock: pygame.time.Clock, input_system: InputSystem, interactable_system: InteractableSystem,
+                 snapshot_buffer: SnapshotBuffer | None = None) -> None:
+        """
+        :param snapshot_buffer: Recent snapshots to draw other entities smoothly between. Without one, every entity is
+                                drawn where the latest snapshot has it.
+        """
         self.input_system = input_system
         self.interactable_system = interactable_system
         self.screen = pygame.display.set_mode((self.input_system.game_width, self.input_system.game_height), pygame.SRCALPHA)
         self.clock = clock
         self.player: Player | None = None
+        self.snapshot_buffer = snapshot_buffer
+        self.positions: dict[str, dict[int, tuple[int, int]]] = {}  # Where to draw moving entities this frame
         self.draw_tiles = {
             'player': {
                 'sprite_sheet': pygame.image.load('images/player_sprite_sheet.png').convert(),
@@ -103,6 +112,8 @@ class DrawSystem:
             return
 
         offset = self.input_system.get_offset(self.player)
+        if self.snapshot_buffer is not None:
+            self.positions = self.snapshot_buffer.positions(time.perf_counter() * 1000)
 
         if area is not None:
             self.draw_area(area, offset)
@@ -137,7 +148,8 @@ class DrawSystem:
 
             image = sprite_sheet.subsurface(pygame.Rect(top_left[0], top_left[1], width, height))
             image = pygame.transform.scale(image, (50, 50))
-            location = player.get_pixel_location()
+            # The camera follows this client's own player, so it is always drawn where the latest snapshot has it
+            location = player.get_pixel_location() if player is self.player else self._location('players', player)
             offset_location = (location[0] + offset[0], location[1] + offset[1])
             self._draw_interactable(image, offset_location, ScreenLayer.ABOVE_GROUND, player)
 
@@ -151,13 +163,13 @@ class DrawSystem:
             angle = math.atan2(vy, vx) * 180 / math.pi - 90  # Images point up but 0 degrees is right
             rotated_image = pygame.transform.rotate(image, angle)
 
-            location = projectile.get_pixel_location()
+            location = self._location('projectiles', projectile)
             offset_location = (location[0] + offset[0], location[1] + offset[1])
             self.screen.blit(rotated_image, offset_location)
 
     def draw_enemies(self, enemies: list[Enemy], offset: tuple[int, int]):
         for enemy in enemies:
-            location = enemy.get_pixel_location()
+            location = self._location('enemies', enemy)
             offset_location = (location[0] + offset[0], location[1] + offset[1])
             self._draw_interactable(enemy.image, offset_location, ScreenLayer.ABOVE_GROUND, enemy)
 
@@ -465,6 +477,10 @@ class DrawSystem:
         else:
             raise NotImplementedError(f'Draw code for hoverable type {type(self.input_system.hovered)} not implemented')
 
+    def _location(self, group: str, entity) -> tuple[int, int]:
+        location = self.positions.get(group, {}).get(entity.entity_id)
+        return location if location is not None else entity.get_pixel_location()
+
     def _draw_interactable(self, surface: Surface, location: tuple[int, int], layer: ScreenLayer, obj: object):
         interactable = Interactable(layer, surface.get_rect(topleft=location), obj)
         self.screen.blit(surface, interactable.hitbox)
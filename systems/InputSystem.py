@@ -1,16 +1,19 @@
 import math
-import socket
 from enum import IntEnum, auto
 from functools import partial
-from typing import Callable, Any
+from typing import Callable, Any, TYPE_CHECKING
 
 import pygame
 
 from models.Direction import Direction
 from models.Loot import Loot
 from models.Player import Player
+from systems.ClientSenderSystem import ClientSenderSystem
 from systems.InteractableSystem import InteractableSystem
 
+if TYPE_CHECKING:
+    from systems.PredictionSystem import PredictionSystem
+
 
 class Control(IntEnum):
     QUIT = auto()
@@ -30,11 +33,12 @@ class Control(IntEnum):
 
 
 class InputSystem:
-    def __init__(self, server: socket.socket, interactable_system: InteractableSystem) -> None:
-        self.server = server
+    def __init__(self, sender: ClientSenderSystem, interactable_system: InteractableSystem) -> None:
+        self.sender = sender
         self.interactable_system = interactable_system
         self.subscriptions: dict[Control, set[Callable]] = {}
         self.player: Player | None = None
+        self.prediction_system: 'PredictionSystem | None' = None  # Moves the player locally, if set
         self.attacking: bool = False
         self.hovered: Any = None
         self.game_width, self.game_height = self._get_game_size()
@@ -110,10 +114,16 @@ class InputSystem:
         self.subscribe(Control.AIM, self.hover_loot)
 
     def move_start(self, direction: Direction, _) -> None:
-        self.server.sendall(f'move:{direction.value}\n'.encode())
+        if self.prediction_system is not None:
+            self.prediction_system.press(direction)
+        else:
+            self.sender.move(direction)
 
     def move_stop(self, direction: Direction, _) -> None:
-        self.server.sendall(f'stop:{direction.value}\n'.encode())
+        if self.prediction_system is not None:
+            self.prediction_system.release(direction)
+        else:
+            self.sender.stop(direction)
 
     def attack_start(self, _):
         if not self.player:
@@ -121,7 +131,7 @@ class InputSystem:
 
         offset = self.get_offset(self.player)
         angle, magnitude = self.vector_to_cursor(self.player, offset)
-        self.server.sendall(f'attack:{angle},{magnitude}\n'.encode())
+        self.sender.attack(angle, magnitude)
         self.attacking = True
 
     def attack_aim(self, _):
@@ -129,7 +139,7 @@ class InputSystem:
             self.attack_start(_)
 
     def attack_stop(self, _):
-        self.server.sendall('attack_stop\n'.encode())
+        self.sender.attack_stop()
         self.attacking = False
 
     def hover_loot(self, _):
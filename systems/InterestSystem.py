@@ -0,0 +1,53 @@
+from models.Client import Client
+from models.Snapshot import Cell, Snapshot, SnapshotGrid
+
+
+class InterestSystem:
+    """
+    Decides which entities each client is sent: those within a square around its player.
+
+    The square is anchored where the player was when it was placed, and only moves once the player gets more than the
+    margin away from there, so the cells it covers are rarely recomputed, and entities don't pop in and out at the edge
+    as the player moves around. Entities are looked up by cell in a grid of each area snapshot, which every client in
+    the area shares.
+    """
+
+    def __init__(self, radius: int, margin: int = 100, cell_size: int = 200):
+        """
+        :param radius: Pixels from the player to the edges of the square.
+        :param margin: Pixels the player can move before the square is moved with it.
+        :param cell_size: Pixels per side of the grid cells entities are looked up by.
+        """
+        self.radius = radius
+        self.margin = margin
+        self.cell_size = cell_size
+        self.regions: dict[Client, tuple[tuple[int, int], frozenset[Cell]]] = {}  # Anchor and cells of each client
+
+    def index(self, snapshot: Snapshot, previous: SnapshotGrid | None = None) -> SnapshotGrid:
+        """
+        :param previous: The grid of an earlier snapshot of the same area.
+        """
+        return SnapshotGrid(snapshot, self.cell_size, previous)
+
+    def update(self, client: Client) -> frozenset[Cell]:
+        """
+        :return: The cells the client should be sent the entities of.
+        """
+        x, y = client.player.get_pixel_location()
+        region = self.regions.get(client)
+        if region is None or max(abs(x - region[0][0]), abs(y - region[0][1])) > self.margin:
+            region = self.regions[client] = (x, y), self._cells(x, y)
+        return region[1]
+
+    def forget(self, client: Client) -> None:
+        self.regions.pop(client, None)
+
+    def _cells(self, x: int, y: int) -> frozenset[Cell]:
+        """
+        Finds the cells covering the square around the anchor, with room for the player to move the margin in any
+        direction.
+        """
+        size = self.radius + self.margin
+        return frozenset(column * SnapshotGrid.STRIDE + row
+                         for column in range((x - size) // self.cell_size, (x + size) // self.cell_size + 1)
+                         for row in range((y - size) // self.cell_size, (y + size) // self.cell_size + 1))
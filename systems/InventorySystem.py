@@ -1,17 +1,16 @@
-import socket
-
 from models.Loot import Loot
 from models.Player import Player
 from models.LootContainer import LootContainer
+from systems.ClientSenderSystem import ClientSenderSystem
 from systems.InputSystem import InputSystem, Control
 from systems.InteractableSystem import InteractableSystem
 
 
 class InventorySystem:
-    def __init__(self, input_system: InputSystem, interactable_system: InteractableSystem, server: socket.socket) -> None:
+    def __init__(self, input_system: InputSystem, interactable_system: InteractableSystem, sender: ClientSenderSystem) -> None:
         self.player: Player | None = None
         self.interactable_system = interactable_system
-        self.server = server
+        self.sender = sender
         self.input_system = input_system
         input_system.subscribe(Control.BASIC_INTERACTION, self.grab_item)
 
@@ -27,7 +26,7 @@ class InventorySystem:
                 offset_x, offset_y = self.input_system.get_offset(self.player)
                 world_x = int(event.pos[0] - offset_x)
                 world_y = int(event.pos[1] - offset_y)
-                self.server.sendall(f'drop_ground:{cursor_loot.server_id}:{cursor_loot.loot_id}:{world_x}:{world_y}\n'.encode())
+                self.sender.drop_ground(cursor_loot.server_id, cursor_loot.loot_id, world_x, world_y)
 
             return
 
@@ -37,7 +36,7 @@ class InventorySystem:
             if self.player.show_character_panel:
                 if self.player.cursor_loot.get_loot_count() == 0:
                     # Cursor empty, clicked on item in inventory. Request a grab.
-                    self.server.sendall(f'grab_inventory:{loot.server_id}:{loot.loot_id}\n'.encode())
+                    self.sender.grab_inventory(loot.server_id, loot.loot_id)
                 else:
                     # Loot swap not implemented
                     pass
@@ -49,7 +48,7 @@ class InventorySystem:
                 gear_slot = int(gear_slot)
                 if self.player.cursor_loot.get_loot_count() == 1:
                     cursor_loot = next(iter(self.player.cursor_loot.loot_dict.values()))
-                    self.server.sendall(f'drop_gear:{cursor_loot.server_id}:{cursor_loot.loot_id}:{gear_slot}\n'.encode())
+                    self.sender.drop_gear(cursor_loot.server_id, cursor_loot.loot_id, gear_slot)
 
         # Grab loot from gear slot
         elif (isinstance(interactable.obj, tuple)
@@ -60,7 +59,7 @@ class InventorySystem:
             player, gear_slot, loot = interactable.obj
             gear_slot = int(gear_slot)
             if self.player.cursor_loot.get_loot_count() == 0:
-                self.server.sendall(f'grab_gear:{gear_slot}\n'.encode())
+                self.sender.grab_gear(gear_slot)
 
         # Drop loot into inventory
         elif (isinstance(interactable.obj, tuple)
@@ -74,4 +73,4 @@ class InventorySystem:
                 return
 
             cursor_loot = next(iter(self.player.cursor_loot.loot_dict.values()))
-            self.server.sendall(f'drop_inventory:{cursor_loot.server_id}:{cursor_loot.loot_id}:{col}:{row}\n'.encode())
+            self.sender.drop_inventory(cursor_loot.server_id, cursor_loot.loot_id, col, row)
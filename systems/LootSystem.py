@@ -17,10 +17,9 @@ class LootSystem:
     def check_collisions(self) -> None:
         for area in self.area_system.areas:
             for loot in area.loots:
-                loot_rect = loot.image.get_rect(topleft=loot.get_pixel_location())
-                for player in area.players:
-                    player_rect = player.image.get_rect(topleft=player.get_pixel_location())
-                    if loot_rect.colliderect(player_rect):
+                loot_rect = loot.get_rect()
+                for player in area.players.query(loot_rect):
+                    if loot_rect.colliderect(player.get_rect()):
                         area.loots.remove(loot)
                         player.inventory.try_add_loot(loot)
 
@@ -1,3 +1,5 @@
+from collections import deque
+
 from pygame import Vector2
 
 from models.Area import Area
@@ -12,6 +14,20 @@ class MovementSystem:
     def __init__(self, area_system: AreaSystem):
         self.area_system = area_system
         self.moving: dict[Player, Direction] = {}
+        self.inputs: dict[Player, deque[tuple[int, Direction]]] = {}  # Numbered inputs from predicting clients
+        self.max_input_backlog = 4  # Inputs beyond this many are applied early so the player catches up
+
+    def queue_input(self, player: Player, sequence: int, direction: Direction) -> None:
+        """
+        Queues one simulation step of movement from a client that predicts its own player. Inputs are applied one per
+        step rather than as they arrive, the same way the client applied them, so its replay ends up where we do.
+        Inputs that are older than one already queued or applied are ignored.
+        """
+        inputs = self.inputs.setdefault(player, deque())
+        if sequence <= (inputs[-1][0] if inputs else player.last_input):
+            return
+        self.moving.pop(player, None)
+        inputs.append((sequence, direction))
 
     def start_moving(self, player, direction: Direction):
         if player not in self.moving:
@@ -26,23 +42,28 @@ class MovementSystem:
     def move(self):
         for area in self.area_system.areas:
             for player in area.players:
-                if player not in self.moving:
-                    continue
-
-                player.set_preferred_velocity(self.moving[player])
-
-                actual_velocity = self.try_get_actual_velocity(player, area)
-                if actual_velocity is None or actual_velocity == (0, 0):
-                    continue
-
-                player.move_relative(*actual_velocity)
-
-            for projectile in area.projectiles:
-                actual_velocity = self.try_get_actual_velocity(projectile, area)
-                if actual_velocity is None or actual_velocity == (0, 0):
-                    continue
+                inputs = self.inputs.get(player)
+                if inputs:
+                    for _ in range(max(1, len(inputs) - self.max_input_backlog)):
+                        sequence, direction = inputs.popleft()
+                        player.last_input = sequence
+                        self.step(player, area, direction)
+                elif player in self.moving:
+                    self.step(player, area, self.moving[player])
+
+            area.projectiles.move(area)
+
+    def step(self, player: Player, area: Area, direction: Direction) -> None:
+        """
+        Moves the player one simulation step in the direction, stopping at walls.
+        """
+        player.set_preferred_velocity(direction)
+
+        actual_velocity = self.try_get_actual_velocity(player, area)
+        if actual_velocity is None or actual_velocity == (0, 0):
+            return
 
-                projectile.move_relative(*actual_velocity)
+        player.move_relative(*actual_velocity)
 
     def try_get_actual_velocity(self, entity: Entity, area: Area) -> tuple[float, float] | None:
         preferred_velocity = entity.get_preferred_velocity()
@@ -77,8 +98,7 @@ class MovementSystem:
         move = preferred_velocity.x
         new_pos = int(round(current_location[0] + preferred_velocity.x))
         entity_offset = new_pos, int(round(current_location[1]))
-        overlap = area.mask.overlap(entity.mask, entity_offset)
-        if overlap:
+        if area.collision.rect_hits_wall(*entity_offset, entity.width, entity.height):
             return 0, True
         return move, False
 
@@ -89,7 +109,6 @@ class MovementSystem:
         move = -preferred_velocity.y
         new_pos = int(round(current_location[1] + move))
         entity_offset = int(round(current_location[0])), new_pos
-        overlap = area.mask.overlap(entity.mask, entity_offset)
-        if overlap:
+        if area.collision.rect_hits_wall(*entity_offset, entity.width, entity.height):
             return 0, True
         return move, False
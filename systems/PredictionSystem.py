@@ -0,0 +1,150 @@
+import time
+from collections import deque
+
+from models.Area import Area
+from models.Direction import Direction
+from models.Player import Player
+from models.SnapshotBuffer import SnapshotBuffer
+from systems.AreaSystem import AreaSystem
+from systems.ClientSenderSystem import ClientSenderSystem
+from systems.MovementSystem import MovementSystem
+
+
+class PredictionSystem:
+    """
+    Moves this client's own player as soon as movement keys change, instead of a round trip later when the server's
+    snapshot arrives. The player is moved one simulation step at a time with the same MovementSystem logic the server
+    uses, against the area generated from the same seed.
+
+    Every step the player moves in is sent to the server as a numbered input, which the server also applies one per
+    step. Snapshots say which input the server applied last, so whenever one arrives the player is put back where the
+    server has it and the inputs the server has not applied yet are replayed on top.
+    """
+
+    def __init__(self, sender: ClientSenderSystem, history: SnapshotBuffer, steps_per_second: int = 60,
+                 max_catch_up_steps: int = 5):
+        """
+        :param history: The snapshots the client has applied, the newest of which the player is reconciled against.
+        :param steps_per_second: The server's simulation rate, until the server says what it is.
+        :param max_catch_up_steps: More steps than this due in one frame and the time is dropped instead.
+        """
+        self.sender = sender
+        self.history = history
+        self.movement_system = MovementSystem(AreaSystem())
+        self.max_catch_up_steps = max_catch_up_steps
+        self.step_seconds = 0.0
+        self.max_pending = 0
+        self.set_steps_per_second(steps_per_second)
+
+        self.direction = Direction(0)  # Movement keys currently held
+        self.sent_direction = Direction(0)
+        self.sequence = 0
+        self.pending: deque[tuple[int, Direction]] = deque()  # Not yet applied by the server
+        self.player: Player | None = None
+        self.location: tuple[float, float] | None = None  # Where the player is predicted to be
+        self.reconciled = None  # The snapshot the player was last reconciled against
+        self.previous: float | None = None
+        self.accumulator = 0.0
+
+    def set_steps_per_second(self, steps_per_second: int) -> None:
+        """
+        Steps at the server's simulation rate, which it sends when the client connects.
+        """
+        self.step_seconds = 1 / steps_per_second
+        self.max_pending = 2 * steps_per_second  # Inputs the server can fall behind on before prediction gives up
+
+    def press(self, direction: Direction) -> None:
+        self.direction |= direction
+
+    def release(self, direction: Direction) -> None:
+        self.direction &= ~direction
+
+    def update(self, area: Area | None, player: Player | None) -> None:
+        """
+        Reconciles the player against the newest snapshot if there is a new one, then moves it for the simulation steps
+        that are due. Called once per frame.
+        """
+        now = time.perf_counter()
+        elapsed = now - self.previous if self.previous is not None else 0.0
+        self.previous = now
+        if area is None or player is None or self.sender.protocol_version is None:
+            return
+
+        if player is not self.player:
+            # A new area recreates the player, which we then take over from the snapshots
+            self.player = player
+            self.location = None
+            self.reconciled = None
+            player.predicted = True
+
+        self.reconcile(area, player)
+        if self.location is None:
+            return
+        player.move_absolute(*self.location)
+
+        self.accumulator += elapsed
+        steps = 0
+        while self.accumulator >= self.step_seconds:
+            if steps == self.max_catch_up_steps:
+                self.accumulator = 0.0
+                break
+            self.accumulator -= self.step_seconds
+            steps += 1
+
+            # Standing still sends nothing, since the server also leaves a player without inputs where it is
+            if self.direction or self.direction != self.sent_direction:
+                self.sequence += 1
+                self.sender.input(self.sequence, self.direction)
+                if len(self.pending) >= self.max_pending:
+                    self.snap(player)
+                self.pending.append((self.sequence, self.direction))
+                self.sent_direction = self.direction
+                self.movement_system.step(player, area, self.direction)
+
+        player.set_preferred_velocity(self.direction)
+        self.location = player.get_precise_location()
+
+    def reconcile(self, area: Area, player: Player) -> None:
+        """
+        Moves the player to where the newest snapshot has it, then replays the inputs the server had not applied yet.
+        """
+        if not self.history.entries:
+            return
+        snapshot = self.history.entries[-1][1]
+        if snapshot is self.reconciled:
+            return
+        self.reconciled = snapshot
+
+        record = self.server_record(player)
+        if record is None:
+            return
+
+        last_input = int(record['input'])
+        while self.pending and self.pending[0][0] <= last_input:
+            self.pending.popleft()
+
+        player.move_absolute(float(record['x']), float(record['y']))
+        for _, direction in self.pending:
+            self.movement_system.step(player, area, direction)
+        self.location = player.get_precise_location()
+
+    def snap(self, player: Player) -> None:
+        """
+        Forgets the inputs the server has not applied yet and puts the player where the newest snapshot has it. Used
+        once the server is so far behind that replaying every input it hasn't applied would be a guess at best.
+        """
+        print(f'Server has not applied the last {len(self.pending)} inputs, snapping to its state.')
+        self.pending.clear()
+        record = self.server_record(player)
+        if record is not None:
+            player.move_absolute(float(record['x']), float(record['y']))
+
+    def server_record(self, player: Player) -> dict | None:
+        """
+        :return: The player in the newest snapshot, if there is one with it.
+        """
+        if not self.history.entries:
+            return None
+        snapshot = self.history.entries[-1][1]
+        return next((record for record in snapshot.groups['players'].values()
+                     if int(record['client_id']) == player.client_id), None)
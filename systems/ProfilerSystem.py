@@ -0,0 +1,148 @@
+import json
+import sys
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+
+class ProfilerSystem:
+    """
+    Records how long each server system takes every tick, and how often a tick takes longer than its budget.
+    Only the most recent ticks are kept, so percentiles describe recent load rather than the whole run.
+    """
+
+    def __init__(self, budget: float, history_size: int = 3600, clock: Callable[[], float] = time.perf_counter):
+        """
+        :param budget: Seconds a tick may take, normally the simulation step.
+        :param history_size: Number of recent ticks to keep timings for.
+        :param clock: Returns the time in seconds.
+        """
+        self.budget = budget
+        self.clock = clock
+        self.history_size = history_size
+        self.timings: dict[str, deque[float]] = {}
+        self.tick_durations: deque[float] = deque(maxlen=history_size)
+        self.current: dict[str, float] = {}
+        self.tick_start = 0.0
+
+        self.ticks = 0
+        self.overruns = 0
+        self.dropped_steps = 0
+
+        self.queue_depths: dict[int, int] = {}  # Bytes queued for each client by id, as of the last broadcast
+        self.max_queue_depths: deque[int] = deque(maxlen=history_size)  # Of the deepest queue after each broadcast
+        self.laggards = 0  # Clients disconnected for not keeping up with what they were sent
+
+    def start_tick(self) -> None:
+        self.current = {}
+        self.tick_start = self.clock()
+
+    def end_tick(self) -> None:
+        duration = self.clock() - self.tick_start
+        self.tick_durations.append(duration)
+        self.ticks += 1
+        if duration > self.budget:
+            self.overruns += 1
+
+        for name, seconds in self.current.items():
+            self.timings.setdefault(name, deque(maxlen=self.history_size)).append(seconds)
+
+    @contextmanager
+    def measure(self, name: str):
+        """
+        Adds the time spent in the with block to the named system's time for the current tick.
+        """
+        start = self.clock()
+        try:
+            yield
+        finally:
+            self.current[name] = self.current.get(name, 0.0) + self.clock() - start
+
+    def record_queue_depths(self, depths: dict[int, int]) -> None:
+        """
+        Records how many outbound bytes are queued for each client, by client id.
+        """
+        self.queue_depths = depths
+        self.max_queue_depths.append(max(depths.values(), default=0))
+
+    def summary(self) -> dict:
+        """
+        Returns p50, p99 and max milliseconds per system and for whole ticks, along with the overrun counts, and the
+        outbound queue depths.
+        """
+        ordered = sorted(self.max_queue_depths)
+        return {
+            'budget_ms': self.budget * 1000,
+            'ticks': self.ticks,
+            'overruns': self.overruns,
+            'dropped_steps': self.dropped_steps,
+            'tick': self._stats(self.tick_durations),
+            'systems': {name: self._stats(timings) for name, timings in self.timings.items()},
+            'laggards': self.laggards,
+            'queue_depth': {
+                'p50_max_bytes': self._percentile(ordered, 50),
+                'p99_max_bytes': self._percentile(ordered, 99),
+                'max_bytes': ordered[-1] if ordered else 0,
+                'clients': dict(self.queue_depths)
+            }
+        }
+
+    def export(self, path: str) -> None:
+        """
+        Writes the summary and the recent per tick timings as JSON.
+        """
+        result = self.summary()
+        result['peak_rss_mb'] = self.peak_rss_mb()
+        result['samples_ms'] = {name: [seconds * 1000 for seconds in timings]
+                                for name, timings in self.timings.items()}
+        result['samples_ms']['tick'] = [seconds * 1000 for seconds in self.tick_durations]
+        with open(path, 'w') as f:
+            json.dump(result, f)
+
+    def report(self) -> str:
+        summary = self.summary()
+        lines = [f'{summary["ticks"]} ticks, {summary["overruns"]} over the {summary["budget_ms"]:.1f} ms budget, '
+                 f'{summary["dropped_steps"]} simulation steps dropped, peak RSS {self.format_peak_rss()}']
+        for name, stats in [('tick', summary['tick'])] + list(summary['systems'].items()):
+            lines.append(f'{name:>10}: p50 {stats["p50_ms"]:7.3f} ms, p99 {stats["p99_ms"]:7.3f} ms, '
+                         f'max {stats["max_ms"]:7.3f} ms')
+        queue = summary['queue_depth']
+        lines.append(f'Deepest outbound queue: p50 {queue["p50_max_bytes"]} B, p99 {queue["p99_max_bytes"]} B, '
+                     f'max {queue["max_bytes"]} B, {summary["laggards"]} clients disconnected for lagging')
+        return '\n'.join(lines)
+
+    @staticmethod
+    def peak_rss_mb() -> float | None:
+        """
+        Returns the most memory the process has had resident, in megabytes, or None where that isn't available.
+        """
+        if resource is None:
+            return None
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024  # Bytes on macOS, kilobytes elsewhere
+
+    @staticmethod
+    def format_peak_rss() -> str:
+        peak = ProfilerSystem.peak_rss_mb()
+        return 'unknown' if peak is None else f'{peak:.1f} MB'
+
+    @staticmethod
+    def _stats(timings: deque[float]) -> dict[str, float]:
+        if not timings:
+            return {'p50_ms': 0.0, 'p99_ms': 0.0, 'max_ms': 0.0}
+        ordered = sorted(timings)
+        return {'p50_ms': ProfilerSystem._percentile(ordered, 50) * 1000,
+                'p99_ms': ProfilerSystem._percentile(ordered, 99) * 1000,
+                'max_ms': ordered[-1] * 1000}
+
+    @staticmethod
+    def _percentile(ordered: list[float], p: float) -> float:
+        if not ordered:
+            return 0
+        return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))]
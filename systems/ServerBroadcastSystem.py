@@ -1,29 +1,215 @@
 import json
 from socket import socket
+from typing import Any, TYPE_CHECKING
 
+from models.Area import Area
 from models.Client import Client
+from models.Snapshot import Snapshot, SnapshotGrid, SnapshotView
+from models.WireProtocol import WireProtocol, BINARY_PROTOCOL_VERSION
 from systems.AreaSystem import AreaSystem
+from systems.InterestSystem import InterestSystem
+
+if TYPE_CHECKING:
+    from systems.ShardSystem import ShardSystem
 
 
 class ServerBroadcastSystem:
-    def __init__(self, clients: dict[socket, Client], area_system: AreaSystem):
+    """
+    Sends each client the snapshot of its area as a delta against a snapshot the client acknowledged, and the private
+    state of its own player whenever that changes.
+
+    Every area is turned into a snapshot once per tick, and a snapshot is only replaced when its content changed, so
+    clients that are up to date can be skipped with an identity check. Clients in the same area are given a common
+    baseline whenever possible, and encoded frames are cached by snapshot, baseline and protocol, so N clients in one
+    area normally share a single encode. With an InterestSystem, each client is instead sent its own view of the area:
+    the cells of a grid of the area snapshot around its player. Cells remember when they last changed and keep their
+    packed records, so a view only has to resend the cells that changed since its baseline.
+    """
+
+    def __init__(self, clients: dict[socket, Client], area_system: 'AreaSystem | ShardSystem',
+                 interest_system: InterestSystem | None = None):
+        """
+        :param area_system: The areas to send, which are simulated on other processes when it is a ShardSystem.
+        :param interest_system: Limits what each client is sent to the entities around its player. Without one, every
+                                client is sent its whole area.
+        """
         self.clients = clients
         self.area_system = area_system
-        self.prev_update: dict[Client, dict] = {}
+        self.interest_system = interest_system
+        self.snapshot_number = 0
+        self.history_size = 64
+        self.area_snapshots: dict[Area, Snapshot] = {}
+        self.prev_update: dict[Client, Snapshot] = {}
+        self.sent: dict[Client, dict[int, Snapshot]] = {}  # Snapshots a client may still use as a baseline
+        self.acked: dict[Client, int] = {}
+        self.baseline_floor: dict[Client, int] = {}  # The client discards snapshots older than its last baseline
+        self.owner_sent: dict[Client, dict[str, Any]] = {}  # The private player state each client was last sent
+        self.encode_count = 0
+        self.area_grids: dict[Area, SnapshotGrid] = {}  # Kept while the area exists, so cells can be carried over
 
     def send_updates(self):
         player_area = {player: area for area in self.area_system.areas for player in area.players}
-        area_broadcast_dict = {area: area.to_broadcast() for area in self.area_system.areas}
+        area_clients: dict[Area, list[Client]] = {}
         for client in self.clients.values():
-            if client.player not in player_area:
-                continue
+            if client.player in player_area:
+                area_clients.setdefault(player_area[client.player], []).append(client)
+
+        self.area_snapshots = {area: self.get_snapshot(area) for area in self.area_system.areas}
+
+        for clients in area_clients.values():
+            for client in clients:
+                self.send_owner_state(client)
 
-            area = player_area[client.player]
-            update = area_broadcast_dict[area]
+        frames: dict[tuple[int, int, bool], bytes] = {}
+        if self.interest_system is not None:
+            self.area_grids = {area: self.get_grid(area) if area in area_clients else self.area_grids[area]
+                               for area in self.area_system.areas if area in area_clients or area in self.area_grids}
+        for area, clients in area_clients.items():
+            if self.interest_system is not None:
+                for client in clients:
+                    self.send_view(client, self.area_grids[area], frames)
+                continue
 
-            if client in self.prev_update and update == self.prev_update[client]:
+            snapshot = self.area_snapshots[area]
+            outdated = [client for client in clients if self.prev_update.get(client) is not snapshot]
+            if not outdated:
                 continue
-            self.prev_update[client] = update
 
-            update_frame = (json.dumps(update) + '\n').encode()
-            client.connection.sendall(update_frame)
+            shared_baseline = self.get_shared_baseline(outdated)
+            for client in outdated:
+                self.send_snapshot(client, snapshot, shared_baseline, frames)
+
+    def send_view(self, client: Client, grid: SnapshotGrid, frames: dict[tuple[int, int, bool], bytes]) -> None:
+        """
+        Sends the client the part of the area snapshot its interest covers, if that changed since the last one it was
+        sent. Views are numbered like area snapshots, so they use the same baselines and acknowledgements.
+        """
+        view = SnapshotView(self.snapshot_number + 1, grid, self.interest_system.update(client))
+        previous = self.prev_update.get(client)
+        if previous is not None and view.same_content(previous):
+            return
+        self.snapshot_number += 1
+        self.send_snapshot(client, view, self.acked.get(client), frames)
+
+    def send_snapshot(self, client: Client, snapshot: Snapshot, baseline_number: int | None,
+                      frames: dict[tuple[int, int, bool], bytes]) -> None:
+        """
+        Sends the snapshot as a delta against the preferred baseline, or against the client's last acknowledged snapshot
+        if the client can't use that, or whole if it can't use either.
+        """
+        if not self.is_valid_baseline(client, baseline_number):
+            baseline_number = self.acked.get(client)
+            if not self.is_valid_baseline(client, baseline_number):
+                baseline_number = None
+        baseline = self.sent[client][baseline_number] if baseline_number is not None else None
+
+        binary = client.protocol_version >= BINARY_PROTOCOL_VERSION
+        key = (snapshot.number, baseline_number or 0, binary)
+        if key not in frames:
+            frames[key] = self.encode(snapshot, baseline, binary)
+
+        self.record_sent(client, snapshot, baseline_number)
+        client.send_snapshot(frames[key])
+
+    def send_owner_state(self, client: Client) -> None:
+        """
+        Sends the client its own player's containers and gear, leaving out any whose version the client already has.
+        """
+        owner = client.player.owner_broadcast()
+        previous = self.owner_sent.get(client)
+        changed = {}
+        for key in ('inventory', 'cursor_loot'):
+            if previous is None or previous[key]['version'] != owner[key]['version']:
+                changed[key] = owner[key]
+        if previous is None or previous['gear_version'] != owner['gear_version']:
+            changed['gear_version'] = owner['gear_version']
+            changed['gear'] = owner['gear']
+        if not changed:
+            return
+
+        self.owner_sent[client] = owner
+        if client.protocol_version >= BINARY_PROTOCOL_VERSION:
+            client.send(WireProtocol.encode_owner(changed))
+        else:
+            client.send(('owner:' + json.dumps(changed) + '\n').encode())
+
+    def get_snapshot(self, area: Area) -> Snapshot:
+        """
+        Returns the area's snapshot for this tick, reusing the previous one if nothing changed.
+        """
+        previous = self.area_snapshots.get(area)
+        snapshot = Snapshot.from_broadcast(self.snapshot_number + 1, area.to_broadcast())
+        if previous is not None and not snapshot.share_unchanged(previous):
+            return previous
+        self.snapshot_number += 1
+        return snapshot
+
+    def get_grid(self, area: Area) -> SnapshotGrid:
+        """
+        Returns the grid of the area's snapshot for this tick, reusing the previous grid if the snapshot didn't change.
+        """
+        snapshot = self.area_snapshots[area]
+        previous = self.area_grids.get(area)
+        if previous is not None and previous.snapshot is snapshot:
+            return previous
+        return self.interest_system.index(snapshot, previous)
+
+    def get_shared_baseline(self, clients: list[Client]) -> int | None:
+        """
+        Picks the acknowledged snapshot that can serve as the baseline for the most clients, preferring newer ones.
+        """
+        candidates = {self.acked[client] for client in clients if client in self.acked}
+        best, best_count = None, 0
+        for number in sorted(candidates, reverse=True):
+            count = sum(1 for client in clients if self.is_valid_baseline(client, number))
+            if count > best_count:
+                best, best_count = number, count
+        return best
+
+    def is_valid_baseline(self, client: Client, number: int | None) -> bool:
+        """
+        A snapshot is a valid baseline if the client received it and has not discarded it yet.
+        """
+        if number is None:
+            return False
+        return (number in self.sent.get(client, {})
+                and number <= self.acked.get(client, 0)
+                and number >= self.baseline_floor.get(client, 0))
+
+    def record_sent(self, client: Client, snapshot: Snapshot, baseline_number: int | None) -> None:
+        self.prev_update[client] = snapshot
+
+        # After a full snapshot the client starts over, otherwise it discards everything older than the baseline
+        self.baseline_floor[client] = baseline_number if baseline_number is not None else snapshot.number
+
+        sent = self.sent.setdefault(client, {})
+        for number in [number for number in sent if number < self.baseline_floor[client]]:
+            del sent[number]
+        sent[snapshot.number] = snapshot
+        if len(sent) > self.history_size:
+            del sent[min(sent)]
+
+    def encode(self, snapshot: Snapshot | SnapshotView, baseline: Snapshot | SnapshotView | None,
+               binary: bool) -> bytes:
+        self.encode_count += 1
+        if binary and isinstance(snapshot, SnapshotView):
+            return WireProtocol.encode_view(snapshot, baseline)
+        if binary:
+            return WireProtocol.encode_snapshot(snapshot, baseline)
+        return (json.dumps(snapshot.delta_from(baseline)) + '\n').encode()
+
+    def acknowledge(self, client: Client, snapshot_number: int) -> None:
+        """
+        Records that the client has applied a snapshot, so it can serve as the baseline for the next delta.
+        """
+        if snapshot_number > self.acked.get(client, 0):
+            self.acked[client] = snapshot_number
+
+    def forget(self, client: Client) -> None:
+        self.prev_update.pop(client, None)
+        self.sent.pop(client, None)
+        self.acked.pop(client, None)
+        self.baseline_floor.pop(client, None)
+        self.owner_sent.pop(client, None)
+        if self.interest_system is not None:
+            self.interest_system.forget(client)
@@ -1,129 +1,226 @@
+import struct
+from collections import deque
 from socket import socket
 
 from pygame import Vector2
 
 from models.Client import Client
+from models.Command import Command
 from models.Direction import Direction
 from models.Loot import GearSlot, Loot
+from models.MessageFramer import MessageFramer
+from models.WireProtocol import MessageType, WireProtocol, BINARY_PROTOCOL_VERSION, PROTOCOL_VERSION
 from systems.AreaSystem import AreaSystem
 from systems.MovementSystem import MovementSystem
 from systems.SkillSystem import SkillSystem
 
 
 class ServerReceiverSystem:
+    READ_SIZE = 4096  # Commands are small, so reads can be too
+    MAX_MESSAGE_SIZE = 4096  # Clients sending anything larger are disconnected
+
     def __init__(self,
                  clients: dict[socket, Client],
                  movement_system: MovementSystem,
                  skill_system: SkillSystem,
-                 area_system: AreaSystem):
+                 area_system: AreaSystem,
+                 sim_rate: int = 60):
+        """
+        :param sim_rate: Simulation steps per second, which clients are told when they connect.
+        """
         self.clients = clients
         self.movement_system = movement_system
         self.skill_system = skill_system
         self.area_system = area_system
-        self.client_buffer: dict[Client, str] = {}
+        self.sim_rate = sim_rate
+        self.framers: dict[Client, MessageFramer] = {}
+        # Appending and popping are atomic, so socket threads and the game thread share this without a lock
+        self.pending: deque[Command] = deque()
         self.loot_system = None
         self.broadcaster = None
+        self.shard_system = None  # Simulates the players on other processes, if set
 
     def receive_updates(self, client: Client, address: str):
-        if client not in self.client_buffer:
-            self.client_buffer[client] = ''
-        client_buffer = self.client_buffer[client]
-
-        data = client.connection.recv(1024)
-        if not data:
+        """
+        Blocks until the client sends data on its own thread, then queues the complete commands for the game thread.
+        """
+        if not self.receive(client):
             raise ConnectionResetError(f'Client {address} disconnected.')
-        client_buffer += data.decode()
-
-        # Process all complete messages in the buffer
-        while '\n' in client_buffer:
-            message, client_buffer = client_buffer.split('\n', 1)
-
-            if message == 'connect':
-                client.connection.sendall(f'connect:{client.client_id}\n'.encode())
-
-            elif message.startswith('move:'):
-                direction = Direction(int(message.split(':')[1]))
-                self.movement_system.start_moving(client.player, direction)
-
-            elif message.startswith('stop:'):
-                direction = Direction(int(message.split(':')[1]))
-                self.movement_system.stop_moving(client.player, direction)
 
-            elif message.startswith('attack:'):
-                angle, magnitude = message.split(':')[1].split(',')
-                destination_vector = Vector2()
-                destination_vector.from_polar((float(magnitude), float(angle)))
-                self.skill_system.start_attacking(client.player, destination_vector)
-
-            elif message.startswith('attack_stop'):
-                self.skill_system.stop_attacking(client.player)
-
-            elif message.startswith('grab_inventory:'):
-                split = message.split(':')
-                server_id = int(split[1])
-                loot_id = int(split[2])
-                loot = client.player.inventory.get_loot(server_id, loot_id)
+    def receive(self, client: Client) -> int:
+        """
+        Reads what the client's socket has and queues the complete commands until the game thread processes them.
+
+        :return: Number of bytes read, 0 if the client disconnected.
+        """
+        received = self.framer(client).recv_into(client.connection)
+        if received:
+            self.queue_commands(client)
+        return received
+
+    def queue_updates(self, client: Client, data: bytes) -> None:
+        """
+        Buffers data read from a client's socket. Complete commands are queued until the game thread processes them.
+        """
+        self.framer(client).feed(data)
+        self.queue_commands(client)
+
+    def queue_commands(self, client: Client) -> None:
+        for message_type, args in self.read_commands(client):
+            self.pending.append(Command(client, message_type, args))
+
+    def framer(self, client: Client) -> MessageFramer:
+        framer = self.framers.get(client)
+        if framer is None:
+            framer = self.framers[client] = MessageFramer(self.READ_SIZE, self.MAX_MESSAGE_SIZE)
+        return framer
+
+    def process_pending(self) -> None:
+        """
+        Handles the commands queued before the call in the order they were received. Commands queued by socket threads
+        while this runs wait for the next tick, so each tick applies one batch.
+        """
+        for _ in range(len(self.pending)):
+            command = self.pending.popleft()
+            client = command.client
+            if client.connection not in self.clients:
+                continue
+
+            try:
+                self.handle_command(client, command.message_type, command.args)
+            except ValueError as e:
+                print(f'Ignoring invalid command from client {client.client_id}: {e}')
+            except Exception as e:
+                # One client's command must never stop the tick for everyone else
+                print(f'Error handling {command.message_type.name} from client {client.client_id}: {e!r}')
+
+    def read_commands(self, client: Client) -> list[tuple[MessageType, tuple]]:
+        """
+        Returns all complete commands in the client's buffer. Connection setup is handled here, because the negotiated
+        protocol version decides how the rest of the buffer is framed.
+        """
+        framer = self.framers[client]
+        commands = []
+        while True:
+            if client.protocol_version >= BINARY_PROTOCOL_VERSION:
+                try:
+                    frame = framer.next_frame()
+                    if frame is None:
+                        break
+                    message_type, payload = frame
+                    commands.append((message_type, WireProtocol.decode_command(message_type, payload)))
+                except (ValueError, struct.error) as e:
+                    print(f'Ignoring malformed command from client {client.client_id}: {e}')
+            else:
+                line = framer.next_line()
+                if line is None:
+                    break
+                try:
+                    message = line.decode()
+                    if message == 'connect' or message.startswith('connect:'):
+                        self.connect(client, message)
+                        continue
+                    commands.append(WireProtocol.parse_text_command(message))
+                except ValueError as e:
+                    print(f'Ignoring malformed command from client {client.client_id}: {e}')
+        return commands
+
+    def connect(self, client: Client, message: str) -> None:
+        """
+        Answers a connection request, agreeing on the highest protocol version both sides support. Clients that ask for
+        a version are also told the simulation rate, which velocities and inputs are per step of.
+        """
+        if message == 'connect':
+            client.send(f'connect:{client.client_id}\n'.encode())
+            return
+
+        requested_version = int(message.split(':')[1])
+        client.protocol_version = min(requested_version, PROTOCOL_VERSION)
+        client.send(f'connect:{client.client_id}:{client.protocol_version}:{self.sim_rate}\n'.encode())
+
+    def forget(self, client: Client) -> None:
+        self.framers.pop(client, None)
+        if self.broadcaster:
+            self.broadcaster.forget(client)
+
+    def handle_command(self, client: Client, message_type: MessageType, args: tuple) -> None:
+        if message_type == MessageType.ACK:
+            self.broadcaster.acknowledge(client, args[0])
+
+        elif self.shard_system is not None:
+            self.shard_system.route(client, message_type, args)
+
+        elif client.player is None:
+            return  # Every other command acts on the player, which hasn't spawned yet
+
+        elif message_type == MessageType.MOVE:
+            direction = Direction(args[0])
+            self.movement_system.start_moving(client.player, direction)
+
+        elif message_type == MessageType.STOP:
+            direction = Direction(args[0])
+            self.movement_system.stop_moving(client.player, direction)
+
+        elif message_type == MessageType.INPUT:
+            sequence, direction = args
+            self.movement_system.queue_input(client.player, sequence, Direction(direction))
+
+        elif message_type == MessageType.ATTACK:
+            angle, magnitude = args
+            destination_vector = Vector2()
+            destination_vector.from_polar((float(magnitude), float(angle)))
+            self.skill_system.start_attacking(client.player, destination_vector)
+
+        elif message_type == MessageType.ATTACK_STOP:
+            self.skill_system.stop_attacking(client.player)
+
+        elif message_type == MessageType.GRAB_INVENTORY:
+            server_id, loot_id = args
+            loot = client.player.inventory.get_loot(server_id, loot_id)
+            if loot is not None:
                 client.player.inventory.move_to_container(loot, client.player.cursor_loot)
 
-            elif message.startswith('drop_inventory:'):
-                split = message.split(':')
-                # Expected format: drop_inventory:server_id:loot_id:col:row
-                server_id = int(split[1])
-                loot_id = int(split[2])
-                col = int(split[3])
-                row = int(split[4])
-                loot = client.player.cursor_loot.get_loot(server_id, loot_id)
-                if loot is not None:
-                    client.player.cursor_loot.move_to_container(loot, client.player.inventory, col, row)
-
-            elif message.startswith('grab_gear:'):
-                # Format: grab_gear:slot_value
-                slot_value = int(message.split(':')[1])
-                slot = GearSlot(slot_value)
-                loot = client.player.gear.get(slot)
-                if loot is not None and client.player.cursor_loot.get_loot_count() == 0:
-                    # Move gear item to cursor
-                    client.player.gear[slot] = None
-                    client.player.cursor_loot.try_add_loot(loot)
-
-            elif message.startswith('drop_gear:'):
-                # Format: drop_gear:server_id:loot_id:slot_value
-                split = message.split(':')
-                server_id = int(split[1])
-                loot_id = int(split[2])
-                slot_value = int(split[3])
-                slot = GearSlot(slot_value)
-
-                loot = client.player.cursor_loot.get_loot(server_id, loot_id)
-                if loot is None:
-                    continue
-
-                is_empty = client.player.gear.get(slot) is None
-                if not is_empty:
-                    continue
-
-                if slot in Loot.GEAR_COMPATIBILITY[loot.loot_type]:
-                    client.player.cursor_loot.remove(loot)
-                    client.player.gear[slot] = loot
-
-            elif message.startswith('drop_ground:'):
-                # Format: drop_ground:server_id:loot_id:x:y
-                split = message.split(':')
-                server_id = int(split[1])
-                loot_id = int(split[2])
-                x = float(split[3])
-                y = float(split[4])
-                loot = client.player.cursor_loot.get_loot(server_id, loot_id)
-                if loot is None:
-                    continue
+        elif message_type == MessageType.DROP_INVENTORY:
+            server_id, loot_id, col, row = args
+            loot = client.player.cursor_loot.get_loot(server_id, loot_id)
+            if loot is not None:
+                client.player.cursor_loot.move_to_container(loot, client.player.inventory, col, row)
+
+        elif message_type == MessageType.GRAB_GEAR:
+            slot = GearSlot(args[0])
+            loot = client.player.gear.get(slot)
+            if loot is not None and client.player.cursor_loot.get_loot_count() == 0:
+                # Move gear item to cursor
+                client.player.set_gear(slot, None)
+                client.player.cursor_loot.try_add_loot(loot)
+
+        elif message_type == MessageType.DROP_GEAR:
+            server_id, loot_id, slot_value = args
+            slot = GearSlot(slot_value)
+
+            loot = client.player.cursor_loot.get_loot(server_id, loot_id)
+            if loot is None:
+                return
+
+            is_empty = client.player.gear.get(slot) is None
+            if not is_empty:
+                return
+
+            if slot in Loot.GEAR_COMPATIBILITY[loot.loot_type]:
                 client.player.cursor_loot.remove(loot)
-
-                loot.move_absolute(x, y)
-                for area in self.area_system.areas:
-                    if client.player in area.players:
-                        loot.area = area
-                        area.loots.add(loot)
-                        # Once added to the correct area stop searching further areas
-                        break
-
-        self.client_buffer[client] = client_buffer
+                client.player.set_gear(slot, loot)
+
+        elif message_type == MessageType.DROP_GROUND:
+            server_id, loot_id, x, y = args
+            loot = client.player.cursor_loot.get_loot(server_id, loot_id)
+            if loot is None:
+                return
+            client.player.cursor_loot.remove(loot)
+
+            loot.move_absolute(x, y)
+            for area in self.area_system.areas:
+                if client.player in area.players:
+                    loot.area = area
+                    area.loots.add(loot)
+                    # Once added to the correct area stop searching further areas
+                    break
@@ -0,0 +1,121 @@
+import selectors
+import socket
+import time
+
+from models.Client import Client
+from systems.ServerReceiverSystem import ServerReceiverSystem
+
+
+class ServerSelectorSystem:
+    """
+    Single threaded, non-blocking socket I/O for the game server. Accepts clients, queues their messages for the game
+    thread and flushes their outbound buffers. Runs on the game thread between ticks instead of sleeping.
+    """
+
+    def __init__(self, clients: dict[socket.socket, Client], receiver: ServerReceiverSystem, host: str, port: int):
+        self.clients = clients
+        self.receiver = receiver
+        self.host = host
+        self.port = port
+        self.selector = selectors.DefaultSelector()
+        self.listener: socket.socket | None = None
+
+    def start(self) -> None:
+        self.listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.listener.bind((self.host, self.port))
+        self.listener.listen()
+        self.listener.setblocking(False)
+        self.selector.register(self.listener, selectors.EVENT_READ)
+        print(f'Server running on {self.host}:{self.port}')
+
+    def stop(self) -> None:
+        for client in list(self.clients.values()):
+            self.disconnect(client)
+        if self.listener:
+            self.selector.unregister(self.listener)
+            self.listener.close()
+            self.listener = None
+        self.selector.close()
+
+    def run_until(self, deadline: float) -> None:
+        """
+        Services sockets until the given time.perf_counter() deadline, typically the start of the next tick.
+        """
+        while True:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                return
+            self.poll(remaining)
+
+    def poll(self, timeout: float = 0) -> None:
+        for key, events in self.selector.select(timeout):
+            if key.fileobj is self.listener:
+                self.accept()
+                continue
+
+            client = key.data
+            if events & selectors.EVENT_READ:
+                self.read(client)
+            if events & selectors.EVENT_WRITE and client.connection in self.clients:
+                self.write(client)
+
+    def flush(self) -> None:
+        """
+        Attempts to write all outbound buffers, waiting for writability on sockets that cannot take everything now.
+        """
+        for client in list(self.clients.values()):
+            if client.queued_bytes():
+                self.write(client)
+
+    def accept(self) -> None:
+        try:
+            connection, address = self.listener.accept()
+        except BlockingIOError:
+            return
+
+        print(f'Client {address} connected.')
+        connection.setblocking(False)
+        client = Client(connection, buffered=True)
+        self.clients[connection] = client
+        self.selector.register(connection, selectors.EVENT_READ, client)
+
+    def read(self, client: Client) -> None:
+        try:
+            received = self.receiver.receive(client)
+        except BlockingIOError:
+            return
+        except ConnectionError as e:
+            print(e)
+            self.disconnect(client)
+            return
+
+        if not received:
+            print(f'Client {client.client_id} disconnected.')
+            self.disconnect(client)
+
+    def write(self, client: Client) -> None:
+        try:
+            sent = client.connection.send(client.take_outbound())
+        except BlockingIOError:
+            sent = 0
+        except ConnectionError as e:
+            print(e)
+            self.disconnect(client)
+            return
+        client.consume(sent)
+
+        events = selectors.EVENT_READ | selectors.EVENT_WRITE if client.queued_bytes() else selectors.EVENT_READ
+        if self.selector.get_key(client.connection).events != events:
+            self.selector.modify(client.connection, events, client)
+
+    def disconnect(self, client: Client) -> None:
+        if client.connection not in self.clients:
+            return
+
+        if client.player:
+            client.player.kill()
+        del self.clients[client.connection]
+        self.receiver.forget(client)
+        self.selector.unregister(client.connection)
+        client.connection.close()
@@ -0,0 +1,197 @@
+import multiprocessing
+import random
+import sys
+from multiprocessing.connection import Connection
+from multiprocessing.process import BaseProcess
+from typing import Any
+
+from models.Client import Client
+from models.WireProtocol import MessageType
+from systems.ShardWorker import run_shard
+
+
+class ShardPlayer:
+    """
+    The front process's view of a player simulated on a shard, with what ServerBroadcastSystem needs of a Player.
+    """
+
+    def __init__(self, shard_system: 'ShardSystem', client_id: int):
+        self.shard_system = shard_system
+        self.client_id = client_id
+        self.owner: dict[str, Any] | None = None  # The latest private state the shard reported
+
+    def owner_broadcast(self) -> dict[str, Any]:
+        return self.owner
+
+    def kill(self) -> None:
+        self.shard_system.leave(self)
+
+
+class ShardArea:
+    """
+    The front process's view of an area simulated on a shard, with what ServerBroadcastSystem needs of an Area.
+    """
+
+    def __init__(self, seed: int, shard: int):
+        self.seed = seed
+        self.shard = shard
+        self.broadcast: dict[str, Any] | None = None  # The latest broadcast the shard reported
+        self.players: list[ShardPlayer] = []
+        self.entered_at = 0  # Messages sent to the shard when a player was last sent into this area
+
+    def to_broadcast(self) -> dict[str, Any]:
+        return self.broadcast
+
+
+class ShardSystem:
+    """
+    Runs the simulation of the areas on worker processes, one ShardWorker per process, while this process keeps the
+    client sockets. Areas never interact except through their exits, so each one is simulated by a single shard.
+
+    Stands in for AreaSystem on the front process. It keeps the chain of areas that players walk through, spawns new
+    players in the oldest area and decides which area a player reaching an exit enters next, the same way AreaSystem
+    does. New areas go to the shard with the fewest players. Client commands are forwarded to the shard simulating the
+    client's player, and each shard's reports are turned into areas that ServerBroadcastSystem can send.
+    """
+
+    def __init__(self, shard_count: int, server_id: int, sim_rate: int, send_rate: int, collision: str,
+                 seed: int | None = None):
+        """
+        :param shard_count: Number of worker processes.
+        :param server_id: Server id of the first shard's loot, each further shard uses the next one.
+        :param seed: Seeds the choice of area seeds, random if not given.
+        """
+        self.shard_count = shard_count
+        self.server_id = server_id
+        self.sim_rate = sim_rate
+        self.send_rate = send_rate
+        self.collision = collision
+        self.seed_random = random.Random(seed)
+
+        self.processes: list[BaseProcess] = []
+        self.connections: list[Connection] = []
+        self.sent: list[int] = [0] * shard_count  # Messages sent to each shard
+        self.steps: list[tuple[int, int]] = [(0, 0)] * shard_count  # Steps simulated and dropped by each shard
+
+        self.chain: list[ShardArea] = []  # In the order players walk through them
+        self.areas: list[ShardArea] = []  # Those that have been reported, and so can be broadcast
+        self.players: dict[int, ShardPlayer] = {}  # By client id
+        self.player_shard: dict[int, int] = {}  # Shard simulating each client's player
+
+    def start(self) -> None:
+        # Spawned workers don't inherit the server's sockets, threads or pygame state
+        context = multiprocessing.get_context('spawn')
+        for index in range(self.shard_count):
+            connection, worker_connection = context.Pipe()
+            process = context.Process(target=run_shard, daemon=True, args=(
+                worker_connection, index, self.shard_count, self.server_id, self.sim_rate, self.send_rate,
+                self.collision))
+            process.start()
+            self.processes.append(process)
+            self.connections.append(connection)
+
+    def stop(self) -> None:
+        for index, connection in enumerate(self.connections):
+            try:
+                connection.send(('stop',))
+            except OSError:
+                pass
+            self.processes[index].join(timeout=1)
+            if self.processes[index].is_alive():
+                self.processes[index].terminate()
+        self.processes.clear()
+        self.connections.clear()
+
+    def run_once(self, clients: list[Client]) -> None:
+        """
+        Spawns newly connected players and takes in everything the shards have sent since the last call.
+        """
+        for client in clients:
+            if client.player is None:
+                client.player = self.players[client.client_id] = ShardPlayer(self, client.client_id)
+                self.enter(client.player, self.spawn_area(), None)
+
+        for shard, connection in enumerate(self.connections):
+            while connection.poll():
+                message = connection.recv()
+                if message[0] == 'state':
+                    self.update(shard, *message[1:])
+                elif message[0] == 'exit':
+                    self.exit(*message[1:])
+
+    def spawn_area(self) -> ShardArea:
+        if not self.chain:
+            self.chain.append(self.create_area())
+        return self.chain[0]
+
+    def create_area(self, shard: int | None = None) -> ShardArea:
+        """
+        Picks a seed for a new area and the shard to simulate it on. The shard generates it once a player enters it.
+
+        :param shard: The shard to use, the one with the fewest players if not given.
+        """
+        if shard is None:
+            load = [0] * self.shard_count
+            for player_shard in self.player_shard.values():
+                load[player_shard] += 1
+            shard = load.index(min(load))
+        return ShardArea(self.seed_random.randrange(sys.maxsize), shard)
+
+    def enter(self, player: ShardPlayer, area: ShardArea, state: dict[str, Any] | None) -> None:
+        self.player_shard[player.client_id] = area.shard
+        self.send(area.shard, ('enter', player.client_id, area.seed, state))
+        area.entered_at = self.sent[area.shard]
+
+    def exit(self, client_id: int, seed: int, state: dict[str, Any]) -> None:
+        """
+        Sends a player that reached the exit of an area into the next one, creating it if that was the last area.
+        """
+        player = self.players.get(client_id)
+        if player is None:
+            return  # Disconnected on the way
+        index = next((i for i, area in enumerate(self.chain) if area.seed == seed), len(self.chain) - 1)
+        if index == len(self.chain) - 1:
+            self.chain.append(self.create_area())
+        self.enter(player, self.chain[index + 1], state)
+
+    def leave(self, player: ShardPlayer) -> None:
+        self.players.pop(player.client_id, None)
+        shard = self.player_shard.pop(player.client_id, None)
+        if shard is not None:
+            self.send(shard, ('leave', player.client_id))
+
+    def route(self, client: Client, message_type: MessageType, args: tuple) -> None:
+        """
+        Forwards a client's command to the shard simulating its player.
+        """
+        shard = self.player_shard.get(client.client_id)
+        if shard is not None:
+            self.send(shard, ('command', client.client_id, message_type, args))
+
+    def send(self, shard: int, message: tuple) -> None:
+        self.connections[shard].send(message)
+        self.sent[shard] += 1
+
+    def update(self, shard: int, received: int, areas: list[tuple[int, dict, list[int]]],
+               owners: dict[int, dict[str, Any]], steps: tuple[int, int]) -> None:
+        """
+        Takes in a shard's report of its areas and of the private state of its players.
+
+        :param received: How many of our messages the shard had handled when it made the report.
+        """
+        self.steps[shard] = steps
+        for client_id, owner in owners.items():
+            if client_id in self.players:
+                self.players[client_id].owner = owner
+
+        reported = {seed: (broadcast, client_ids) for seed, broadcast, client_ids in areas}
+        for area in [area for area in self.chain if area.shard == shard]:
+            broadcast, client_ids = reported.get(area.seed, (None, []))
+            if not client_ids and received >= area.entered_at:
+                # Every player has left the area, and nobody is on their way into it
+                self.chain.remove(area)
+            elif broadcast is not None:
+                area.broadcast = broadcast
+                area.players = [self.players[client_id] for client_id in client_ids
+                                if client_id in self.players and self.players[client_id].owner is not None]
+        self.areas = [area for area in self.chain if area.broadcast is not None]
@@ -0,0 +1,194 @@
+import itertools
+import time
+from multiprocessing.connection import Connection
+from typing import Any
+
+from models.Area import Area
+from models.Client import Client
+from models.CollisionBackend import COLLISION_BACKENDS
+from models.Direction import Direction
+from models.Entity import Entity
+from models.Player import Player
+from systems.AreaSystem import AreaSystem
+from systems.DamageSystem import DamageSystem
+from systems.LootSystem import LootSystem
+from systems.MovementSystem import MovementSystem
+from systems.ServerReceiverSystem import ServerReceiverSystem
+from systems.SkillSystem import SkillSystem
+
+
+def run_shard(connection: Connection, index: int, count: int, server_id: int, sim_rate: int, send_rate: int,
+              collision: str) -> None:
+    """
+    Entry point of a shard's worker process.
+    """
+    Area.collision_backend = COLLISION_BACKENDS[collision]
+    # Entity ids are only unique within a process, so each shard hands out every count-th one
+    Entity._next_entity_id = itertools.count(index + 1, count)
+    try:
+        ShardWorker(connection, server_id + index, sim_rate, send_rate).run()
+    except (EOFError, OSError):
+        pass  # The front process closed its end of the pipe, so there is nobody left to simulate for
+    except Exception as e:
+        print(f'Shard {index} stopped: {e!r}')
+
+
+class ShardWorker:
+    """
+    Simulates a group of areas on its own process, with the same systems GameServer runs for all areas when it isn't
+    sharded. Clients stay connected to the front process, which forwards their commands here and sends them the
+    reports of each area.
+
+    Players only arrive through 'enter' messages, into the area the front picked for them. A player reaching an exit
+    is sent back to the front, which decides which area, and so which shard, they enter next.
+    """
+
+    def __init__(self, connection: Connection, server_id: int, sim_rate: int, send_rate: int):
+        """
+        :param connection: Pipe to the front process.
+        :param server_id: Server id for the loot this shard generates, which must differ between shards.
+        """
+        self.connection = connection
+        self.sim_rate = sim_rate
+        self.send_rate = send_rate
+        self.max_catch_up_steps = 5
+        self.simulation_time = 0.0
+        self.running = False
+
+        self.clients: dict[int, Client] = {}  # By client id
+        self.area_system = AreaSystem()
+        self.area_system.exit_handler = self.exit
+        self.loot_system = LootSystem(self.area_system, server_id)
+        self.movement_system = MovementSystem(self.area_system)
+        self.skill_system = SkillSystem(self.area_system)
+        self.damage_system = DamageSystem(self.area_system, self.loot_system)
+        self.receiver = ServerReceiverSystem({}, self.movement_system, self.skill_system, self.area_system)
+
+        self.received = 0  # Messages handled, so the front knows which of its messages a report reflects
+        self.owner_versions: dict[int, tuple[int, int, int]] = {}  # Versions of the private state last reported
+        self.steps = 0
+        self.dropped_steps = 0
+
+    def run(self) -> None:
+        self.running = True
+        sim_step = 1 / self.sim_rate
+        send_interval = 1 / self.send_rate
+        previous = time.perf_counter()
+        next_send = previous
+        accumulator = 0.0
+
+        while self.running:
+            while self.running and self.connection.poll():
+                self.handle(self.connection.recv())
+
+            now = time.perf_counter()
+            accumulator += now - previous
+            previous = now
+            steps = 0
+            while accumulator >= sim_step:
+                if steps == self.max_catch_up_steps:
+                    self.dropped_steps += int(accumulator / sim_step)
+                    accumulator = 0.0
+                    break
+                self.simulate()
+                accumulator -= sim_step
+                steps += 1
+
+            if now >= next_send:
+                self.report()
+                next_send = max(next_send + send_interval, now)
+
+            deadline = min(now + sim_step - accumulator, next_send)
+            self.connection.poll(max(0.0, deadline - time.perf_counter()))
+
+    def handle(self, message: tuple) -> None:
+        self.received += 1
+        kind = message[0]
+        if kind == 'command':
+            _, client_id, message_type, args = message
+            client = self.clients.get(client_id)
+            if client is None:
+                return  # Commands sent while the player was moving to another shard are dropped
+            try:
+                self.receiver.handle_command(client, message_type, args)
+            except ValueError as e:
+                print(f'Ignoring invalid command from client {client_id}: {e}')
+            except Exception as e:
+                # Like ServerReceiverSystem.process_pending, one client's command must never stop the shard
+                print(f'Error handling {message_type.name} from client {client_id}: {e!r}')
+        elif kind == 'enter':
+            _, client_id, seed, state = message
+            self.enter(client_id, seed, state)
+        elif kind == 'leave':
+            client = self.clients.pop(message[1], None)
+            if client is not None:
+                client.player.kill()
+                self.forget(client.player)
+        elif kind == 'stop':
+            self.running = False
+
+    def enter(self, client_id: int, seed: int, state: dict[str, Any] | None) -> None:
+        """
+        Places a player in the area with the seed, generating the area if this shard doesn't have it.
+
+        :param state: The player's handoff state from another area, or None for a player that just connected.
+        """
+        area = next((area for area in self.area_system.areas if area.seed == seed), None)
+        if area is None:
+            area = Area(seed)
+            self.area_system.enemy_system.spawn_enemies(area)
+            self.area_system.areas.append(area)
+
+        player = Player.from_handoff_state(state) if state else Player(client_id, area.get_spawn())
+        player.move_absolute(*area.get_spawn())
+        area.players.add(player)
+        if state and state.get('moving'):
+            self.movement_system.start_moving(player, Direction(state['moving']))
+
+        client = Client(None)
+        client.client_id = client_id
+        client.player = player
+        self.clients[client_id] = client
+
+    def exit(self, area: Area, player: Player) -> None:
+        """
+        Hands a player that reached the area's exit back to the front.
+        """
+        client = self.clients.pop(player.client_id, None)
+        state = player.handoff_state()
+        moving = self.movement_system.moving.get(player)
+        state['moving'] = moving.value if moving else 0
+        self.forget(player)
+        if client is not None:
+            self.connection.send(('exit', player.client_id, area.seed, state))
+
+    def forget(self, player: Player) -> None:
+        self.owner_versions.pop(player.client_id, None)
+        self.movement_system.moving.pop(player, None)
+        self.movement_system.inputs.pop(player, None)
+        self.skill_system.stop_attacking(player)
+
+    def simulate(self) -> None:
+        self.area_system.run_once(list(self.clients.values()))
+        self.movement_system.move()
+        self.skill_system.use_skills(int(self.simulation_time))
+        self.damage_system.apply_damage()
+        self.loot_system.check_collisions()
+        self.simulation_time += 1000 / self.sim_rate
+        self.steps += 1
+
+    def report(self) -> None:
+        """
+        Sends the front every area's broadcast, and the private state of each player whose containers or gear changed
+        since it was last reported.
+        """
+        areas = [(area.seed, area.to_broadcast(), [player.client_id for player in area.players])
+                 for area in self.area_system.areas]
+        owners = {}
+        for client_id, client in self.clients.items():
+            player = client.player
+            versions = player.inventory.version, player.cursor_loot.version, player.gear_version
+            if self.owner_versions.get(client_id) != versions:
+                self.owner_versions[client_id] = versions
+                owners[client_id] = player.owner_broadcast()
+        self.connection.send(('state', self.received, areas, owners, (self.steps, self.dropped_steps)))
@@ -1,7 +1,5 @@
-import pygame
 from pygame import Vector2
 
-from models.LootModifier import ModifierType
 from models.Player import Player
 from models.skills.Skill import Skill
 from systems.AreaSystem import AreaSystem
@@ -19,8 +17,10 @@ class SkillSystem:
         if player in self.attacking:
             del self.attacking[player]
 
-    def use_skills(self) -> None:
-        current_time = pygame.time.get_ticks()
+    def use_skills(self, current_time: int) -> None:
+        """
+        :param current_time: Simulation time in milliseconds, so attack speed doesn't depend on how ticks are paced.
+        """
         for area in self.area_system.areas:
             for player in area.players:
                 if player in self.attacking:
@@ -34,11 +34,10 @@ class SkillSystem:
 
                     origin = player.get_center()
                     skill = Skill(origin, destination_vector)
-                    damage = skill.base_damage + int(player.total_from_gear(ModifierType.DAMAGE_FLAT) * (1 + player.total_from_gear(ModifierType.DAMAGE_PERCENT) / 100))
+                    damage = skill.base_damage + player.stats.flat_damage
                     projectiles = skill.spawn_projectiles(damage)
                     area.projectiles.add(projectiles)
 
                     player.last_attacked_time = current_time
 
-            for projectile in area.projectiles:
-                projectile.age()
+            area.projectiles.age()
@@ -1,6 +1,15 @@
+import json
+import random
 from unittest import TestCase
 
+from pygame import Vector2
+
 from models.Area import Area, TileType
+from models.Enemy import NormalEnemy
+from models.Player import Player
+from models.Projectile import Projectile
+from models.Snapshot import Snapshot
+from models.WireProtocol import WireProtocol
 
 
 class TestArea(TestCase):
@@ -30,6 +39,21 @@ class TestArea(TestCase):
         actual = Area(5).most_distant_tiles(tiles)
         self.assertEqual(expected, actual)
 
+    def test_most_distant_tiles_matches_all_pairs(self):
+        def distance_squared(a, b):
+            return (a[0] - b[0]) ** 2 + (a[1] - b[1]) ** 2
+
+        for seed in range(10):
+            tiles = Area.find_largest_empty(Area(seed).generate_tiles())
+            empty_tiles = [(i, j) for i, row in enumerate(tiles) for j, tile in enumerate(row) if tile == TileType.EMPTY]
+            expected = max(((a, b) for a in empty_tiles for b in empty_tiles if a < b),
+                           key=lambda x: distance_squared(*x))
+            self.assertEqual(expected, Area.most_distant_tiles(tiles))
+
+        # A square has two equally distant diagonals, the first one in row order wins
+        square = [[0, 0], [0, 0]]
+        self.assertEqual(((0, 0), (1, 1)), Area.most_distant_tiles(square))
+
     def test_populate_tiles(self):
         tiles = [[1, 1, 1, 1, 1],
                  [1, 1, 1, 0, 1],
@@ -44,6 +68,103 @@ class TestArea(TestCase):
         Area(5).populate_tiles(tiles)
         self.assertEqual(expected, tiles)
 
+    def test_generate_tiles_matches_python_generator(self):
+        area = Area(5)
+        for seed in range(10):
+            for size in (5, 40, 67):
+                area.random = random.Random(seed)
+                area.map_grid_size = size
+                actual = area.generate_tiles()
+                expected = self.python_generate_tiles(random.Random(seed), size)
+                self.assertEqual(expected, actual)
+                self.assertTrue(all(type(tile) is TileType for row in actual for tile in row))
+
+    @staticmethod
+    def python_generate_tiles(rng: random.Random, size: int):
+        """
+        The original pure Python generator, which generated maps must stay identical to.
+        """
+        tiles = [[TileType.EMPTY] * size for _ in range(size)]
+        for i in range(1, size - 1):
+            for j in range(size):
+                if j == 0 or j == size - 1 or rng.randint(0, 99) < 40:
+                    tiles[i][j] = TileType.WALL
+
+        for _ in range(10):
+            new_tiles = [[TileType.EMPTY] * size for _ in range(size)]
+            for i in range(size):
+                for j in range(size):
+                    if j == 0 or j == size - 1 or i == 0 or i == size - 1:
+                        new_tiles[i][j] = TileType.WALL
+                    elif sum(tiles[i + di][j + dj] for di in (-1, 0, 1) for dj in (-1, 0, 1)) >= 5:
+                        new_tiles[i][j] = TileType.WALL
+            tiles = new_tiles
+        return tiles
+
+    def test_from_broadcast_keeps_entities_by_id(self):
+        server_area = Area(1)
+        staying, leaving = NormalEnemy((100, 100), 10), NormalEnemy((200, 200), 10)
+        server_area.enemies.add(staying, leaving)
+        client_area = Area.from_broadcast(server_area.to_broadcast())
+        client_staying = next(enemy for enemy in client_area.enemies if enemy.entity_id == staying.entity_id)
+
+        leaving.kill()
+        entering = NormalEnemy((300, 300), 10)
+        server_area.enemies.add(entering)
+        staying.move_absolute(150, 120)
+        staying.health = 5
+        Area.from_broadcast(server_area.to_broadcast(), client_area)
+
+        self.assertEqual({staying.entity_id, entering.entity_id}, {enemy.entity_id for enemy in client_area.enemies})
+        self.assertIn(client_staying, client_area.enemies)
+        self.assertEqual((150, 120), client_staying.get_pixel_location())
+        self.assertEqual(5, client_staying.health)
+
+    def test_from_broadcast_keeps_players_by_client_id(self):
+        server_area = Area(1)
+        staying, leaving = Player(1, (100, 100)), Player(2, (200, 200))
+        server_area.players.add(staying, leaving)
+        client_area = Area.from_broadcast(server_area.to_broadcast())
+        client_staying = next(player for player in client_area.players if player.client_id == 1)
+
+        leaving.kill()
+        staying.move_absolute(150, 120)
+        Area.from_broadcast(server_area.to_broadcast(), client_area)
+
+        self.assertEqual([client_staying], list(client_area.players))
+        self.assertEqual((150, 120), client_staying.get_pixel_location())
+
+    def test_merge_delta_matches_from_broadcast(self):
+        server_area = Area(1)
+        staying, leaving = NormalEnemy((100, 100), 10), NormalEnemy((200, 200), 10)
+        server_area.enemies.add(staying, leaving)
+        server_area.players.add(Player(1, (100, 100)), Player(2, (200, 200)))
+        projectiles = [Projectile((x, 50), 10, Vector2(1, 0)) for x in range(100, 500, 100)]
+        server_area.projectiles.add(projectiles)
+        baseline = Snapshot.from_broadcast(1, server_area.to_broadcast())
+
+        leaving.kill()
+        staying.move_absolute(150, 120)
+        server_area.enemies.add(NormalEnemy((300, 300), 10))
+        next(iter(server_area.players)).move_absolute(130, 140)
+        server_area.projectiles.x[:2] += 5
+        server_area.projectiles.remove(3)
+        server_area.projectiles.add(Projectile((900, 50), 10, Vector2(0, 1)))
+        snapshot = Snapshot.from_broadcast(2, server_area.to_broadcast())
+
+        def contents(area: Area) -> dict:
+            update = area.to_broadcast()
+            return {group: sorted(update[group], key=lambda entity: entity['id']) for group in Snapshot.GROUPS}
+
+        expected = contents(Area.from_broadcast(snapshot.to_broadcast()))
+        _, payload, _ = WireProtocol.read_frame(WireProtocol.encode_snapshot(snapshot, baseline))
+        binary = WireProtocol.decode_snapshot(payload)
+        text = json.loads(json.dumps(snapshot.delta_from(baseline)))
+        for delta in (binary, text):
+            client_area = Area.from_broadcast(baseline.to_broadcast())
+            client_area.merge_delta(delta, Snapshot.from_delta(delta, baseline), baseline)
+            self.assertEqual(expected, contents(client_area))
+
     @staticmethod
     def pretty_print(tiles):
         for row in tiles:
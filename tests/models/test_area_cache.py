@@ -0,0 +1,37 @@
+import os
+import tempfile
+from unittest import TestCase, mock
+
+import pygame
+
+from models.AreaCache import AreaCache
+
+
+class TestAreaCache(TestCase):
+    def test_evicts_least_recently_used(self):
+        cache = AreaCache(max_areas=2)
+        first = cache.get(1)
+        cache.get(2)
+        self.assertIs(first, cache.get(1))
+
+        cache.get(3)
+        self.assertEqual([1, 3], list(cache.areas))
+
+    def test_round_trips_through_disk(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache = AreaCache(max_areas=1, directory=directory)
+            area = cache.get(1)
+            area.floor_surface = pygame.Surface((4, 4), pygame.SRCALPHA)
+            area.floor_surface.fill((10, 20, 30, 40))
+            cache.get(2)
+
+            loaded = AreaCache(directory=directory).get(1)
+            self.assertIsNot(area, loaded)
+            self.assertEqual(area.tiles, loaded.tiles)
+            self.assertEqual(area.get_spawn(), loaded.get_spawn())
+            self.assertEqual((10, 20, 30, 40), tuple(loaded.floor_surface.get_at((0, 0))))
+            self.assertIsNone(loaded.wall_surface)
+
+    @mock.patch.dict(os.environ, {'XDG_CACHE_HOME': '/tmp/cache', 'LOCALAPPDATA': '/tmp/cache'})
+    def test_user_directory_is_under_the_cache_directory(self):
+        self.assertEqual(os.path.join('/tmp/cache', 'pygame-mmo', 'areas'), AreaCache.user_directory())
@@ -0,0 +1,36 @@
+from unittest import TestCase
+
+from models.Client import Client
+
+
+class TestClient(TestCase):
+    def test_waiting_snapshots_are_replaced_by_newer_ones(self):
+        client = Client(None, buffered=True)
+        client.send(b'connect\n')
+        client.send_snapshot(b'snapshot 1\n')
+        self.assertEqual(b'connect\n', client.take_outbound())
+
+        # Still writing what came before, so the client never starts receiving snapshot 1
+        client.consume(4)
+        client.send_snapshot(b'snapshot 2\n')
+        client.send(b'owner\n')
+        self.assertEqual(1, client.dropped_snapshots)
+        self.assertEqual(len(b'ect\nowner\nsnapshot 2\n'), client.queued_bytes())
+        self.assertEqual(b'ect\nowner\n', client.take_outbound())
+
+        client.consume(10)
+        self.assertEqual(b'snapshot 2\n', client.take_outbound())
+        self.assertEqual(0, client.dropped_snapshots)
+
+        # Once started, a snapshot is written whole even if a newer one is sent
+        client.consume(3)
+        client.send_snapshot(b'snapshot 3\n')
+        self.assertEqual(b'pshot 2\n', client.take_outbound())
+
+    def test_unbuffered_clients_write_everything_through_one_method(self):
+        written = []
+        client = Client(None)
+        client.write = written.append
+        client.send(b'owner\n')
+        client.send_snapshot(b'snapshot\n')
+        self.assertEqual([b'owner\n', b'snapshot\n'], written)
@@ -0,0 +1,28 @@
+import random
+from unittest import TestCase
+
+from models.Area import Area
+from models.CollisionBackend import MaskCollisionBackend, TileCollisionBackend
+
+
+class TestCollisionBackend(TestCase):
+    def test_tiles_match_mask(self):
+        rng = random.Random(3)
+        for seed in range(3):
+            area = Area(seed)
+            mask, tiles = MaskCollisionBackend(area), TileCollisionBackend(area)
+            rects = []
+            for _ in range(3000):
+                size = rng.choice([1, 10, 30, 49, 50, 51, 120])
+                rects.append((rng.randint(-150, area.map_render_size + 50),
+                              rng.randint(-150, area.map_render_size + 50), size, rng.choice([size, 1, 10])))
+            # Rects just touching tile edges are where an off by one would show
+            rects += [(i * area.scale + dx, j * area.scale + dy, 10, 10)
+                      for i in range(0, 40, 7) for j in range(0, 40, 3) for dx in (-10, -9, 49, 50) for dy in (-10, 0, 40)]
+
+            expected = [mask.rect_hits_wall(*rect) for rect in rects]
+            self.assertTrue(any(expected))
+            self.assertFalse(all(expected))
+            self.assertEqual(expected, [tiles.rect_hits_wall(*rect) for rect in rects])
+            self.assertEqual(expected, tiles.rects_hit_walls(*zip(*rects)).tolist())
+            self.assertEqual(expected, mask.rects_hit_walls(*zip(*rects)).tolist())
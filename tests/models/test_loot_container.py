@@ -0,0 +1,50 @@
+import random
+from unittest import TestCase
+
+from models.Loot import Loot, LootType, RingLoot
+from models.LootContainer import LootContainer
+
+
+class TestLootContainer(TestCase):
+    def test_multi_cell_loot_blocks_every_cell(self):
+        container = LootContainer(4, 3)
+        body = Loot(1, 1, (0, 0), 2, 2, LootType.BODY)
+        self.assertTrue(container.try_add_loot_at_position(body, (0, 0)))
+        self.assertFalse(container.try_add_loot_at_position(RingLoot(1, 2, (0, 0)), (1, 1)))
+
+        ring = RingLoot(1, 3, (0, 0))
+        self.assertTrue(container.try_add_loot(ring))
+        self.assertEqual((2, 0), container.get_container_position(ring))
+
+        container.remove(body)
+        self.assertIsNone(container.get_container_position(body))
+        self.assertTrue(container.try_add_loot_at_position(RingLoot(1, 4, (0, 0)), (1, 1)))
+
+    def test_fills_in_scan_order(self):
+        rng = random.Random(1)
+        container = LootContainer(10, 6)
+        cells = {}
+        for loot_id in range(40):
+            loot = Loot(1, loot_id, (0, 0), rng.randint(1, 3), rng.randint(1, 3), LootType.BODY)
+            free = [(x, y) for y in range(container.height - loot.inventory_height + 1)
+                    for x in range(container.width - loot.inventory_width + 1)
+                    if not any((x + dx, y + dy) in cells
+                               for dx in range(loot.inventory_width) for dy in range(loot.inventory_height))]
+            self.assertEqual(bool(free), container.try_add_loot(loot))
+            if free:
+                x, y = free[0]
+                self.assertEqual(free[0], container.get_container_position(loot))
+                cells.update({(x + dx, y + dy): loot for dx in range(loot.inventory_width)
+                              for dy in range(loot.inventory_height)})
+        self.assertEqual(sum(loot.inventory_width * loot.inventory_height for loot in container.loot.values()),
+                         sum(container.occupied))
+
+    def test_move_to_container(self):
+        inventory, cursor = LootContainer(10, 6), LootContainer(99, 99)
+        ring = RingLoot(1, 1, (0, 0))
+        inventory.try_add_loot_at_position(ring, (3, 2))
+        inventory.move_to_container(ring, cursor)
+        self.assertEqual(0, inventory.get_loot_count())
+        self.assertEqual(0, sum(inventory.occupied))
+        self.assertIs(ring, cursor.get_loot(1, 1))
+        self.assertEqual((0, 0), cursor.get_container_position(ring))
@@ -0,0 +1,49 @@
+from unittest import TestCase
+
+from models.MessageFramer import MessageFramer
+from models.WireProtocol import MessageType, WireProtocol
+
+
+class TestMessageFramer(TestCase):
+    def test_messages_split_across_reads(self):
+        framer = MessageFramer(read_size=8)
+        data = 'owner:{"name": "Ring ♥"}\nmove:1\n'.encode()
+        lines = []
+        for i in range(0, len(data), 3):  # Splits the heart's bytes between reads
+            framer.feed(data[i:i + 3])
+            line = framer.next_line()
+            while line is not None:
+                lines.append(line.decode())
+                line = framer.next_line()
+        self.assertEqual(['owner:{"name": "Ring ♥"}', 'move:1'], lines)
+        self.assertEqual(0, len(framer))
+
+    def test_frames_larger_than_the_buffer(self):
+        framer = MessageFramer(read_size=16)
+        payload = bytes(range(256)) * 40
+        data = WireProtocol.frame(MessageType.SNAPSHOT, payload) + WireProtocol.frame(MessageType.OWNER, b'{}')
+        frames = []
+        for i in range(0, len(data), 16):
+            framer.feed(data[i:i + 16])
+            frame = framer.next_frame()
+            while frame is not None:
+                frames.append(frame)
+                frame = framer.next_frame()
+        self.assertEqual([(MessageType.SNAPSHOT, payload), (MessageType.OWNER, b'{}')], frames)
+
+    def test_oversized_messages_are_refused(self):
+        framer = MessageFramer(read_size=16, max_message_size=64)
+        framer.feed(WireProtocol.frame(MessageType.SNAPSHOT, bytes(64)))
+        self.assertEqual((MessageType.SNAPSHOT, bytes(64)), framer.next_frame())
+
+        # The length is checked as soon as the header is in, before the payload is waited for
+        framer.feed(WireProtocol.HEADER.pack(1 << 31, MessageType.SNAPSHOT))
+        with self.assertRaises(ConnectionResetError):
+            framer.next_frame()
+
+        framer = MessageFramer(read_size=16, max_message_size=64)
+        framer.feed(b'x' * 60)
+        self.assertIsNone(framer.next_line())
+        framer.feed(b'x' * 10)
+        with self.assertRaises(ConnectionResetError):
+            framer.next_line()
@@ -0,0 +1,43 @@
+from unittest import TestCase
+
+from models.Loot import GearSlot, LootType, RingLoot
+from models.Player import Player
+
+
+class TestPlayer(TestCase):
+    def test_merge_skips_unchanged_containers(self):
+        server_player = Player(1, (0, 0))
+        server_player.inventory.try_add_loot(RingLoot(1, 1, (0, 0)))
+        server_player.set_gear(GearSlot.FINGER1, RingLoot(1, 2, (0, 0)))
+        client_player = Player.from_broadcast(server_player.to_broadcast())
+        client_player.merge_owner_broadcast(server_player.owner_broadcast())
+        ring = client_player.inventory.get_loot(1, 1)
+        gear_ring = client_player.gear[GearSlot.FINGER1]
+
+        # Nothing changed, so the client keeps its loot objects
+        update = server_player.owner_broadcast()
+        self.assertIs(update['inventory'], server_player.owner_broadcast()['inventory'])
+        client_player.merge_owner_broadcast(update)
+        self.assertIs(ring, client_player.inventory.get_loot(1, 1))
+        self.assertIs(gear_ring, client_player.gear[GearSlot.FINGER1])
+
+        server_player.inventory.try_add_loot(RingLoot(1, 3, (0, 0)))
+        server_player.set_gear(GearSlot.FINGER1, None)
+        client_player.merge_owner_broadcast(server_player.owner_broadcast())
+        self.assertIs(ring, client_player.inventory.get_loot(1, 1))
+        self.assertIsNotNone(client_player.inventory.get_loot(1, 3))
+        self.assertEqual(server_player.inventory.version, client_player.inventory.version)
+        self.assertIsNone(client_player.gear[GearSlot.FINGER1])
+        self.assertEqual(server_player.gear_version, client_player.gear_version)
+
+    def test_others_only_see_equipment(self):
+        player = Player(1, (0, 0))
+        player.inventory.try_add_loot(RingLoot(1, 1, (0, 0)))
+        player.set_gear(GearSlot.FINGER1, RingLoot(1, 2, (0, 0)))
+        update = player.to_broadcast()
+        self.assertNotIn('inventory', update)
+        self.assertNotIn('gear', update)
+
+        other = Player.from_broadcast(update)
+        self.assertEqual({GearSlot.FINGER1: LootType.RING}, other.equipment)
+        self.assertEqual(0, other.inventory.get_loot_count())
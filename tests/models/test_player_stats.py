@@ -0,0 +1,35 @@
+from unittest import TestCase
+
+from models.Loot import GearSlot, RingLoot
+from models.LootModifier import LootModifier, ModifierType
+from models.Player import Player
+
+
+def make_ring(loot_id: int, modifiers: list[tuple[ModifierType, int]]) -> RingLoot:
+    ring = RingLoot(1, loot_id, (0, 0))
+    for modifier_id, (modifier_type, value) in enumerate(modifiers):
+        ring.modifiers.append(LootModifier(1, loot_id, modifier_id, modifier_type, [value]))
+    return ring
+
+
+class TestPlayerStats(TestCase):
+    def test_stats_follow_gear_changes(self):
+        player = Player(1, (0, 0))
+        self.assertEqual(3.0, player.movement_speed)
+        self.assertEqual(0, player.stats.flat_damage)
+
+        player.set_gear(GearSlot.FINGER1, make_ring(1, [(ModifierType.MOVEMENT_SPEED_PERCENT, 50),
+                                                        (ModifierType.DAMAGE_FLAT, 10)]))
+        player.set_gear(GearSlot.FINGER2, make_ring(2, [(ModifierType.DAMAGE_PERCENT, 25),
+                                                        (ModifierType.ATTACK_SPEED_PERCENT, 100)]))
+        self.assertEqual(4.5, player.movement_speed)
+        self.assertEqual(2.0, player.attacks_per_second)
+        self.assertEqual(12, player.stats.flat_damage)
+        self.assertEqual(10, player.total_from_gear(ModifierType.DAMAGE_FLAT))
+
+        player.set_gear(GearSlot.FINGER1, None)
+        self.assertEqual(3.0, player.movement_speed)
+        self.assertEqual(0, player.stats.flat_damage)
+
+        player.gear = {GearSlot.FINGER3: make_ring(3, [(ModifierType.MOVEMENT_SPEED_PERCENT, 10)])}
+        self.assertAlmostEqual(3.3, player.movement_speed)
@@ -0,0 +1,86 @@
+import random
+from unittest import TestCase
+
+from pygame import Vector2
+
+from models.Area import Area
+from models.Enemy import NormalEnemy
+from models.Projectile import Projectile
+from models.ProjectilePool import ProjectilePool
+from systems.AreaSystem import AreaSystem
+from systems.MovementSystem import MovementSystem
+
+
+class TestProjectilePool(TestCase):
+    def test_move_and_age_match_sprites(self):
+        rng = random.Random(1)
+        area = Area(1)
+        movement_system = MovementSystem(AreaSystem())
+        sprites = []
+        for _ in range(500):
+            spawn = rng.randint(-20, area.map_render_size + 20), rng.randint(-20, area.map_render_size + 20)
+            velocity = Vector2(rng.choice([0, 0.5, -1.5, 2.5, rng.uniform(-8, 8)]), rng.uniform(-8, 8))
+            sprites.append(Projectile(spawn, rng.randint(1, 40), velocity, 10, 10, 1))
+        pool = ProjectilePool(16)
+        pool.add(sprites)
+
+        for _ in range(40):
+            pool.move(area)
+            pool.age()
+            for sprite in [sprite for sprite in sprites if sprite.time_to_live > 0]:
+                velocity = movement_system.try_get_actual_velocity(sprite, area)
+                if velocity is None:
+                    sprite.time_to_live = 0
+                    continue
+                if velocity != (0, 0):
+                    sprite.move_relative(*velocity)
+                sprite.age()
+
+            expected = {sprite.entity_id: sprite.get_pixel_location() for sprite in sprites if sprite.time_to_live > 0}
+            actual = {projectile.entity_id: projectile.get_pixel_location() for projectile in pool}
+            self.assertEqual(expected, actual)
+        self.assertEqual(len(expected), len(pool))
+
+    def test_collide_matches_rects(self):
+        rng = random.Random(2)
+        enemies = [NormalEnemy((rng.randint(0, 300), rng.randint(0, 300)), 10) for _ in range(20)]
+        projectiles = [Projectile((rng.randint(0, 300), rng.randint(0, 300)), 10, Vector2(1, 0)) for _ in range(300)]
+        pool = ProjectilePool()
+        pool.add(projectiles)
+
+        expected = [(index, projectile.entity_id) for index, enemy in enumerate(enemies)
+                    for projectile in projectiles if enemy.get_rect().colliderect(projectile.get_rect())]
+        actual = [(index, projectile.entity_id) for index, projectile in pool.collide(enemies)]
+        self.assertTrue(expected)
+        self.assertEqual(expected, actual)
+
+    def test_reuses_free_slots(self):
+        pool = ProjectilePool(2)
+        pool.add(Projectile((0, 0), 10, Vector2(1, 0)), Projectile((5, 5), 10, Vector2(1, 0)))
+        first = next(iter(pool))
+        first.kill()
+        pool.add(Projectile((9, 9), 10, Vector2(1, 0)))
+        self.assertEqual(2, len(pool))
+        self.assertEqual(2, len(pool.alive))
+        self.assertEqual((9, 9), next(iter(pool)).get_pixel_location())
+
+    def test_merge_broadcast_updates_in_place(self):
+        server = ProjectilePool()
+        staying, leaving = Projectile((0, 0), 10, Vector2(1, 0)), Projectile((5, 5), 10, Vector2(1, 0))
+        server.add(staying, leaving)
+        client = ProjectilePool()
+        client.merge_broadcast(server.to_broadcast())
+        staying_slot = next(view.slot for view in client if view.entity_id == staying.entity_id)
+
+        next(view for view in server if view.entity_id == leaving.entity_id).kill()
+        entering = Projectile((7, 7), 10, Vector2(0, 1))
+        server.add(entering)
+        server.x[:] += 3
+        client.merge_broadcast(server.to_broadcast())
+
+        by_id = {view.entity_id: view for view in client}
+        self.assertEqual({staying.entity_id, entering.entity_id}, set(by_id))
+        self.assertEqual(staying_slot, by_id[staying.entity_id].slot)
+        self.assertEqual((3, 0), by_id[staying.entity_id].get_pixel_location())
+        self.assertEqual((10, 7), by_id[entering.entity_id].get_pixel_location())
+        self.assertEqual(2, len(client))
@@ -0,0 +1,81 @@
+import json
+from unittest import TestCase
+
+from models.Snapshot import Snapshot, SnapshotGrid, SnapshotView
+
+
+def snapshot(number: int, players: dict[int, int], loot: list[int] = ()) -> Snapshot:
+    groups = {group: {} for group in Snapshot.GROUPS}
+    for entity_id, x in players.items():
+        groups['players'][entity_id] = {'id': entity_id, 'client_id': entity_id * 10, 'x': x, 'y': 5, 'health': 100}
+    for entity_id in loot:
+        groups['loot'][entity_id] = {'id': entity_id, 'x': 1, 'y': 2, 'loot_type': 3}
+    return Snapshot(number, 1, {'x': 4, 'y': 5}, groups)
+
+
+def enemies(number: int, locations: dict[int, tuple[int, int]]) -> Snapshot:
+    groups = {group: {} for group in Snapshot.GROUPS}
+    for entity_id, (x, y) in locations.items():
+        groups['enemies'][entity_id] = {'id': entity_id, 'x': x, 'y': y, 'health': 10}
+    return Snapshot(number, 1, None, groups)
+
+
+def cell(column: int, row: int) -> int:
+    return column * SnapshotGrid.STRIDE + row
+
+
+class TestSnapshot(TestCase):
+    def test_delta_rebuilds_added_changed_and_removed_entities(self):
+        baseline = snapshot(1, {1: 10, 2: 20, 3: 30}, loot=[7])
+        current = snapshot(2, {1: 10, 2: 25, 4: 40}, loot=[8])
+
+        delta = json.loads(json.dumps(current.delta_from(baseline)))
+        self.assertEqual(1, delta['baseline'])
+        self.assertEqual([{'x': 25, 'id': 2}, current.groups['players'][4]], delta['players']['changed'])
+        self.assertEqual([3], delta['players']['removed'])
+
+        rebuilt = Snapshot.from_delta(delta, baseline)
+        self.assertEqual(2, rebuilt.number)
+        self.assertTrue(rebuilt.same_content(current))
+        # The baseline can still serve later deltas
+        self.assertTrue(baseline.same_content(snapshot(1, {1: 10, 2: 20, 3: 30}, loot=[7])))
+
+    def test_delta_without_baseline_is_whole(self):
+        current = snapshot(5, {1: 10}, loot=[7])
+        delta = current.delta_from(None)
+        self.assertIsNone(delta['baseline'])
+        self.assertTrue(Snapshot.from_delta(delta, None).same_content(current))
+
+    def test_views_send_changed_cells_and_remove_entities_that_left(self):
+        region = frozenset(cell(column, row) for column in range(3, 7) for row in range(3, 7))
+        first = enemies(1, {1: (1000, 1000), 2: (1200, 1000), 3: (100, 100)})
+        grid = SnapshotGrid(first, 200)
+        view = SnapshotView(1, grid, region)
+        self.assertEqual({cell(5, 5), cell(6, 5)}, view.changes_from(None)['enemies'][0])
+        self.assertEqual({1, 2}, set(view.groups['enemies']))
+
+        # 1 moves within its cell, 2 moves out of the view, 4 arrives and 3 moves outside the view
+        second = enemies(2, {1: (1050, 1000), 2: (1500, 1000), 3: (150, 100), 4: (700, 700)})
+        self.assertTrue(second.share_unchanged(first))
+        second_view = SnapshotView(2, SnapshotGrid(second, 200, grid), region)
+        self.assertEqual(({cell(5, 5), cell(3, 3)}, [2]), second_view.changes_from(view)['enemies'])
+        self.assertFalse(second_view.same_content(view))
+
+        # Nothing changed in the view when only entities outside of it did
+        third = enemies(3, {1: (1050, 1000), 2: (1500, 1000), 3: (190, 100), 4: (700, 700)})
+        third.share_unchanged(second)
+        third_view = SnapshotView(3, SnapshotGrid(third, 200, second_view.grid), region)
+        self.assertTrue(third_view.same_content(second_view))
+        self.assertEqual((set(), []), third_view.changes_from(second_view)['enemies'])
+
+        # Entities that disappear, or whose cells leave the view, are removed from it
+        fourth = enemies(4, {2: (1500, 1000), 3: (190, 100), 4: (700, 700)})
+        fourth.share_unchanged(third)
+        shifted = frozenset(cell(column, row) for column in range(4, 8) for row in range(3, 7))
+        fourth_view = SnapshotView(4, SnapshotGrid(fourth, 200, third_view.grid), shifted)
+        changed, removed = fourth_view.changes_from(view)['enemies']
+        self.assertEqual({cell(7, 5)}, changed)
+        self.assertEqual([1], removed)  # 2 is back in view, and sent whole with its cell
+        changed, removed = fourth_view.changes_from(third_view)['enemies']
+        self.assertEqual({cell(7, 5)}, changed)
+        self.assertEqual({1, 4}, set(removed))
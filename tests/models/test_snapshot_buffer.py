@@ -0,0 +1,38 @@
+from unittest import TestCase
+
+from models.Snapshot import Snapshot
+from models.SnapshotBuffer import SnapshotBuffer
+
+
+def snapshot(number: int, x: int, vx: float = 0.0, seed: int = 1) -> Snapshot:
+    groups = {group: {} for group in Snapshot.GROUPS}
+    groups['enemies'][7] = {'id': 7, 'x': x, 'y': 50, 'vx': vx, 'vy': 0.0, 'health': 10, 'type': 0}
+    return Snapshot(number, seed, None, groups)
+
+
+class TestSnapshotBuffer(TestCase):
+    def test_interpolates_between_snapshots(self):
+        buffer = SnapshotBuffer(delay=100)
+        buffer.add(1000, snapshot(1, 0))
+        buffer.add(1050, snapshot(2, 100))
+        self.assertEqual((50, 50), buffer.positions(1125)['enemies'][7])
+
+    def test_extrapolates_late_snapshots_up_to_limit(self):
+        buffer = SnapshotBuffer(delay=100, max_extrapolation=200, steps_per_second=60)
+        buffer.add(1000, snapshot(1, 0, vx=2))
+        # 100 ms past the snapshot is 6 steps
+        self.assertEqual((12, 50), buffer.positions(1200)['enemies'][7])
+        self.assertEqual((24, 50), buffer.positions(5000)['enemies'][7])
+
+    def test_does_not_interpolate_across_areas(self):
+        buffer = SnapshotBuffer(delay=100)
+        buffer.add(1000, snapshot(1, 0))
+        buffer.add(1050, snapshot(2, 100, seed=2))
+        self.assertEqual((0, 50), buffer.positions(1125)['enemies'][7])
+        self.assertEqual((100, 50), buffer.positions(1150)['enemies'][7])
+
+    def test_holds_oldest_until_render_time_reaches_it(self):
+        buffer = SnapshotBuffer(delay=100)
+        buffer.add(1000, snapshot(1, 30, vx=5))
+        self.assertEqual((30, 50), buffer.positions(1020)['enemies'][7])
+        self.assertEqual({}, SnapshotBuffer().positions(1000))
@@ -0,0 +1,22 @@
+from unittest import TestCase
+
+from pygame import Rect
+
+from models.ExitDoor import ExitDoor
+from models.SpatialGroup import SpatialGroup
+
+
+class TestSpatialGroup(TestCase):
+    def test_query_follows_moves(self):
+        group = SpatialGroup(50)
+        door = ExitDoor((40, 40))
+        group.add(door)
+        self.assertEqual({(0, 0), (0, 1), (1, 0), (1, 1)}, set(group.cells))
+        self.assertEqual([door], group.query(Rect(60, 60, 10, 10)))
+
+        door.move_absolute(200, 0)
+        self.assertEqual([], group.query(Rect(60, 60, 10, 10)))
+        self.assertEqual([door], group.query(Rect(230, 30, 1, 1)))
+
+        door.kill()
+        self.assertEqual({}, group.cells)
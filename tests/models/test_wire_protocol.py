@@ -0,0 +1,166 @@
+import socket
+from unittest import TestCase
+
+from models.Client import Client
+from models.Loot import GearSlot, RingLoot
+from models.LootModifier import LootModifier, ModifierType
+from models.Player import Player
+from models.Snapshot import Snapshot, SnapshotGrid, SnapshotView
+from models.WireProtocol import MessageType, WireProtocol, BINARY_PROTOCOL_VERSION, TEXT_PROTOCOL_VERSION
+from systems.ClientReceiverSystem import ClientReceiverSystem
+from systems.ClientSenderSystem import ClientSenderSystem
+from systems.ServerReceiverSystem import ServerReceiverSystem
+
+COMMAND_ARGS = {
+    MessageType.ACK: (70000,),
+    MessageType.MOVE: (5,),
+    MessageType.STOP: (1,),
+    MessageType.ATTACK: (90.5, 100.0),
+    MessageType.ATTACK_STOP: (),
+    MessageType.GRAB_INVENTORY: (1, 12),
+    MessageType.DROP_INVENTORY: (1, 12, 3, 4),
+    MessageType.GRAB_GEAR: (14,),
+    MessageType.DROP_GEAR: (1, 12, 14),
+    MessageType.DROP_GROUND: (1, 12, 100.5, 200.25),
+    MessageType.INPUT: (123456, 9),
+}
+
+
+def make_loot(loot_id: int) -> RingLoot:
+    loot = RingLoot(1, loot_id, (10, 20))
+    loot.modifiers.append(LootModifier(1, loot_id, loot_id * 10, ModifierType.DAMAGE_FLAT, [3]))
+    loot.modifiers.append(LootModifier(1, loot_id, loot_id * 10 + 1, ModifierType.DAMAGE_PERCENT, [2.5, -7]))
+    return loot
+
+
+def make_snapshot(number: int, x: int, equipment: list[tuple[int, int]], loot: dict) -> Snapshot:
+    groups = {
+        'players': {1: {'id': 1, 'x': x, 'y': -20, 'vx': 1.5, 'vy': -0.25, 'client_id': 2 ** 40, 'input': 9,
+                        'equipment': equipment}},
+        'projectiles': {2: {'id': 2, 'x': x, 'y': 5, 'vx': -3.0, 'vy': 0.5}},
+        'enemies': {3: {'id': 3, 'x': 7, 'y': 8, 'vx': 0.0, 'vy': 0.0, 'health': -1, 'type': 2}},
+        'loot': {loot['id']: loot},
+    }
+    return Snapshot(number, -5, {'id': 9, 'x': 1, 'y': 2, 'vx': 0.0, 'vy': 0.0}, groups)
+
+
+def decode(frame: bytes) -> tuple[MessageType, bytes]:
+    message_type, payload, length = WireProtocol.read_frame(frame)
+    assert length == len(frame)
+    return message_type, payload
+
+
+class TestWireProtocol(TestCase):
+    def test_commands_round_trip(self):
+        self.assertEqual(set(WireProtocol.COMMANDS), set(COMMAND_ARGS))
+        for message_type, args in COMMAND_ARGS.items():
+            frame_type, payload = decode(WireProtocol.encode_command(message_type, args))
+            self.assertEqual((message_type, args), (frame_type, WireProtocol.decode_command(frame_type, payload)))
+
+            line = WireProtocol.format_text_command(message_type, args)
+            self.assertEqual((message_type, args), WireProtocol.parse_text_command(line.decode().rstrip('\n')))
+
+    def test_snapshots_round_trip(self):
+        loot = make_loot(4).to_broadcast()
+        baseline = make_snapshot(1, 100, [(GearSlot.FINGER1.value, 5)], loot)
+        message_type, payload = decode(WireProtocol.encode_snapshot(baseline, None))
+        self.assertEqual(MessageType.SNAPSHOT, message_type)
+        whole = WireProtocol.decode_snapshot(payload)
+        self.assertIsNone(whole['baseline'])
+        self.assertTrue(Snapshot.from_delta(whole, None).same_content(baseline))
+
+        # Unchanged equipment is left out of the record, and kept from the baseline
+        current = make_snapshot(2, 110, [(GearSlot.FINGER1.value, 5)], loot)
+        current.groups['enemies'] = {}
+        delta = WireProtocol.decode_snapshot(decode(WireProtocol.encode_snapshot(current, baseline))[1])
+        self.assertEqual(1, delta['baseline'])
+        self.assertNotIn('equipment', delta['players']['changed'][0])
+        self.assertEqual([3], delta['enemies']['removed'])
+        self.assertEqual([], delta['loot']['changed'])
+        self.assertTrue(Snapshot.from_delta(delta, baseline).same_content(current))
+
+
+    def test_views_round_trip(self):
+        loot = make_loot(4).to_broadcast()
+        # Every entity is in the cells of the region, the players one being above the others
+        region = frozenset((-1, 0))
+        baseline = make_snapshot(1, 100, [(GearSlot.FINGER1.value, 5)], loot)
+        baseline_view = SnapshotView(1, SnapshotGrid(baseline, 1000), region)
+        whole = WireProtocol.decode_snapshot(decode(WireProtocol.encode_view(baseline_view, None))[1])
+        self.assertTrue(Snapshot.from_delta(whole, None).same_content(baseline))
+
+        current = make_snapshot(2, 110, [(GearSlot.FINGER1.value, 5)], loot)
+        del current.groups['enemies'][3]
+        current.share_unchanged(baseline)
+        view = SnapshotView(2, SnapshotGrid(current, 1000, baseline_view.grid), region)
+        frame = WireProtocol.encode_view(view, baseline_view)
+        delta = WireProtocol.decode_snapshot(decode(frame)[1])
+        self.assertEqual(1, delta['baseline'])
+        self.assertNotIn('equipment', delta['players']['changed'][0])
+        self.assertEqual([3], delta['enemies']['removed'])
+        self.assertEqual([], delta['loot']['changed'])
+        self.assertTrue(Snapshot.from_delta(delta, baseline).same_content(current))
+
+        # The packed records are kept in the grid, and come out the same for every view that shares them
+        self.assertEqual(frame, WireProtocol.encode_view(SnapshotView(2, view.grid, region), baseline_view))
+
+    def test_owner_state_round_trips_with_versions(self):
+        player = Player(7, (0, 0))
+        player.inventory.try_add_loot(make_loot(1))
+        player.cursor_loot.try_add_loot(make_loot(2))
+        player.set_gear(GearSlot.FINGER1, make_loot(3))
+        owner = player.owner_broadcast()
+        self.assertEqual((1, 1, 1), (owner['inventory']['version'], owner['cursor_loot']['version'],
+                                     owner['gear_version']))
+
+        message_type, payload = decode(WireProtocol.encode_owner(owner))
+        self.assertEqual(MessageType.OWNER, message_type)
+        self.assertEqual(owner, WireProtocol.decode_owner(payload))
+
+        # Only the parts that changed are sent, and each carries its version
+        player.inventory.try_add_loot(make_loot(4))
+        partial = {'inventory': player.owner_broadcast()['inventory']}
+        decoded = WireProtocol.decode_owner(decode(WireProtocol.encode_owner(partial))[1])
+        self.assertEqual(partial, decoded)
+        self.assertEqual(2, decoded['inventory']['version'])
+
+    def test_version_negotiation(self):
+        server_receiver = ServerReceiverSystem({}, None, None, None, sim_rate=30)
+        for message, version, answer, sim_rate in (('connect:2', BINARY_PROTOCOL_VERSION, 'connect:5:2:30', 30),
+                                                   ('connect:99', BINARY_PROTOCOL_VERSION, 'connect:5:2:30', 30),
+                                                   ('connect:1', TEXT_PROTOCOL_VERSION, 'connect:5:1:30', 30),
+                                                   ('connect', TEXT_PROTOCOL_VERSION, 'connect:5', 60)):
+            sent = []
+            client = Client(None)
+            client.client_id = 5
+            client.write = sent.append
+            server_receiver.connect(client, message)
+            self.assertEqual(version, client.protocol_version)
+            self.assertEqual([(answer + '\n').encode()], sent)
+
+            # The client uses whatever version and simulation rate the answer names, or the defaults if it names none
+            connection, server = socket.socketpair()
+            try:
+                sender = ClientSenderSystem(connection)
+                receiver = ClientReceiverSystem(connection, sender)
+                server.sendall(sent[0])
+                receiver.receive_updates()
+                self.assertEqual(5, receiver.client_id)
+                self.assertEqual(version, sender.protocol_version)
+                self.assertEqual(sim_rate, receiver.history.steps_per_second)
+            finally:
+                connection.close()
+                server.close()
+
+    def test_unknown_frame_type_disconnects(self):
+        connection, server = socket.socketpair()
+        try:
+            sender = ClientSenderSystem(connection)
+            sender.connected(BINARY_PROTOCOL_VERSION)
+            receiver = ClientReceiverSystem(connection, sender)
+            server.sendall(WireProtocol.HEADER.pack(0, 250))
+            with self.assertRaises(ConnectionResetError):
+                receiver.receive_updates()
+        finally:
+            connection.close()
+            server.close()
@@ -0,0 +1,78 @@
+from concurrent.futures import Future
+from unittest import TestCase
+
+from models.CollisionBackend import MaskCollisionBackend
+from systems.AreaPoolSystem import AreaPoolSystem, build_area, generate_area
+
+
+class InlineExecutor:
+    """
+    Runs submitted work right away, in place of the worker processes.
+    """
+
+    def __init__(self, fail: bool = False):
+        self.fail = fail
+        self.submitted: list[int] = []
+
+    def submit(self, function, seed: int) -> Future:
+        self.submitted.append(seed)
+        future = Future()
+        if self.fail:
+            future.set_exception(RuntimeError('worker died'))
+        else:
+            future.set_result(function(seed))
+        return future
+
+
+class StoppedExecutor:
+    def submit(self, *_) -> Future:
+        raise RuntimeError('cannot schedule new futures after shutdown')
+
+
+class TestAreaPoolSystem(TestCase):
+    def test_areas_built_from_workers_match_areas_generated_inline(self):
+        built = build_area(generate_area(1234))
+        inline = AreaPoolSystem.generate_inline(1234)
+
+        self.assertEqual(inline.tiles, built.tiles)
+        self.assertEqual((inline._spawn, inline._boss), (built._spawn, built._boss))
+        self.assertEqual(inline.random.getstate(), built.random.getstate())
+        self.assertEqual(sorted((type(enemy).__name__, enemy.get_pixel_location(), enemy.health)
+                                for enemy in inline.enemies),
+                         sorted((type(enemy).__name__, enemy.get_pixel_location(), enemy.health)
+                                for enemy in built.enemies))
+
+        inline_mask, built_mask = MaskCollisionBackend(inline).mask, MaskCollisionBackend(built).mask
+        self.assertEqual(inline_mask.count(), built_mask.count())
+        self.assertEqual(inline_mask.count(), inline_mask.overlap_area(built_mask, (0, 0)))
+
+    def test_pool_is_topped_up_below_the_refill_threshold(self):
+        pool = AreaPoolSystem(pool_size=3, refill_below=2, seed=1)
+        pool.executor = InlineExecutor()
+        pool.refill()
+        seeds = [seed for seed, _ in pool.pending]
+        self.assertEqual(3, len(seeds))
+
+        # Areas are handed out in the order their seeds were picked
+        self.assertEqual(seeds[0], pool.take().seed)
+        self.assertEqual(2, len(pool.pending))
+        self.assertEqual(seeds[1], pool.take().seed)
+        self.assertEqual(3, len(pool.pending))
+        self.assertEqual(5, len(pool.executor.submitted))
+        self.assertEqual(0, pool.ran_dry)
+
+    def test_broken_pools_fall_back_to_generating_inline(self):
+        pool = AreaPoolSystem(pool_size=2, seed=1)
+        pool.executor = InlineExecutor(fail=True)
+        pool.refill()
+        seed = pool.pending[0][0]
+        self.assertEqual(seed, pool.take().seed)  # Generated here instead, from the same seed
+
+        pool.executor = StoppedExecutor()
+        pool.pending.clear()
+        pool.refill()
+        self.assertIsNone(pool.executor)
+        area = pool.take()
+        self.assertIsNotNone(area.get_spawn())
+        self.assertEqual(1, pool.ran_dry)
+        self.assertEqual(2, pool.taken)
@@ -0,0 +1,32 @@
+from unittest import TestCase
+
+from models.Client import Client
+from models.Player import Player
+from models.Snapshot import SnapshotGrid
+from systems.InterestSystem import InterestSystem
+
+
+class TestInterestSystem(TestCase):
+    def test_region_only_moves_past_the_margin(self):
+        player = Player(1, (1000, 1000))
+        client = Client(None)
+        client.player = player
+        interest = InterestSystem(radius=300, margin=100, cell_size=200)
+
+        # The cells cover the radius plus the margin, (600, 600) to (1400, 1400)
+        region = interest.update(client)
+        self.assertEqual({column * SnapshotGrid.STRIDE + row for column in range(3, 8) for row in range(3, 8)}, region)
+
+        # Inside the margin, the player keeps its region
+        player.move_absolute(1090, 910)
+        self.assertIs(region, interest.update(client))
+        player.move_absolute(1210, 1000)
+        moved = interest.update(client)
+        self.assertEqual({column * SnapshotGrid.STRIDE + row for column in range(4, 9) for row in range(3, 8)}, moved)
+
+        # The margin is measured from where the region was last moved to
+        player.move_absolute(1130, 1000)
+        self.assertIs(moved, interest.update(client))
+
+        interest.forget(client)
+        self.assertNotIn(client, interest.regions)
@@ -0,0 +1,88 @@
+from unittest import TestCase
+
+from models.Area import Area
+from models.Direction import Direction
+from models.Player import Player
+from models.Snapshot import Snapshot
+from models.SnapshotBuffer import SnapshotBuffer
+from systems.AreaSystem import AreaSystem
+from systems.MovementSystem import MovementSystem
+from systems.PredictionSystem import PredictionSystem
+
+
+class RecordingSender:
+    def __init__(self):
+        self.protocol_version = 2
+        self.inputs: list[tuple[int, Direction]] = []
+
+    def input(self, sequence: int, direction: Direction) -> None:
+        self.inputs.append((sequence, direction))
+
+
+class TestPredictionSystem(TestCase):
+    def test_replays_inputs_the_server_has_not_applied(self):
+        area = Area(1)
+        server_player = Player(1, area.get_spawn())
+        area.players.add(server_player)
+        area_system = AreaSystem()
+        area_system.areas.append(area)
+        movement_system = MovementSystem(area_system)
+
+        sender = RecordingSender()
+        history = SnapshotBuffer()
+        prediction = PredictionSystem(sender, history)
+        client_area = Area.from_broadcast(area.to_broadcast())
+        client_player = next(iter(client_area.players))
+        history.add(0, Snapshot.from_broadcast(1, area.to_broadcast()))
+
+        def frame():
+            prediction.accumulator += prediction.step_seconds
+            prediction.update(client_area, client_player)
+
+        frame()
+        for direction in (Direction.RIGHT, Direction.RIGHT | Direction.DOWN, Direction.LEFT):
+            prediction.press(direction)
+            for _ in range(4):
+                frame()
+            prediction.release(direction)
+        frame()
+        self.assertEqual(13, len(sender.inputs))
+
+        # The server has only applied some of the inputs when it sends its next snapshot
+        for sequence, direction in sender.inputs[:7]:
+            movement_system.queue_input(server_player, sequence, direction)
+            movement_system.move()
+        Area.from_broadcast(area.to_broadcast(), client_area)
+        history.add(1, Snapshot.from_broadcast(2, area.to_broadcast()))
+        frame()
+
+        for sequence, direction in sender.inputs[7:]:
+            movement_system.queue_input(server_player, sequence, direction)
+            movement_system.move()
+        self.assertEqual(13, server_player.last_input)
+        self.assertNotEqual(area.get_spawn(), server_player.get_pixel_location())
+        self.assertEqual(server_player.get_pixel_location(), client_player.get_pixel_location())
+        self.assertEqual(6, len(prediction.pending))
+
+    def test_snaps_to_the_server_when_it_falls_too_far_behind(self):
+        area = Area(1)
+        area.players.add(Player(1, area.get_spawn()))
+        history = SnapshotBuffer()
+        history.add(0, Snapshot.from_broadcast(1, area.to_broadcast()))
+        client_area = Area.from_broadcast(area.to_broadcast())
+        client_player = next(iter(client_area.players))
+        prediction = PredictionSystem(RecordingSender(), history, steps_per_second=5)
+        self.assertEqual(10, prediction.max_pending)
+
+        prediction.press(Direction.RIGHT)
+        for _ in range(10):
+            prediction.accumulator += prediction.step_seconds
+            prediction.update(client_area, client_player)
+        self.assertEqual(10, len(prediction.pending))
+        ahead = client_player.get_precise_location()
+
+        # The server applied none of them, so the next input starts over from where the server has the player
+        prediction.accumulator += prediction.step_seconds
+        prediction.update(client_area, client_player)
+        self.assertEqual([11], [sequence for sequence, _ in prediction.pending])
+        self.assertLess(client_player.get_precise_location()[0], ahead[0])
@@ -0,0 +1,74 @@
+import json
+import os
+import tempfile
+from unittest import TestCase
+
+from systems.ProfilerSystem import ProfilerSystem
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestProfilerSystem(TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.profiler = ProfilerSystem(0.010, clock=self.clock)
+
+    def tick(self, movement: float, broadcast: float) -> None:
+        self.profiler.start_tick()
+        with self.profiler.measure('movement'):
+            self.clock.now += movement
+        with self.profiler.measure('broadcast'):
+            self.clock.now += broadcast
+        with self.profiler.measure('movement'):
+            self.clock.now += movement
+        self.profiler.end_tick()
+
+    def test_summary_percentiles_and_overruns(self):
+        for i in range(100):
+            self.tick(0.001 * (i + 1) / 100, 0.002 if i < 98 else 0.020)
+
+        summary = self.profiler.summary()
+        self.assertEqual(100, summary['ticks'])
+        self.assertEqual(2, summary['overruns'])
+        # Time measured twice in a tick counts once, summed
+        self.assertAlmostEqual(1.02, summary['systems']['movement']['p50_ms'])
+        self.assertAlmostEqual(2.0, summary['systems']['movement']['max_ms'])
+        self.assertAlmostEqual(2.0, summary['systems']['broadcast']['p50_ms'])
+        self.assertAlmostEqual(20.0, summary['systems']['broadcast']['p99_ms'])
+        self.assertAlmostEqual(22.0, summary['tick']['max_ms'])
+
+    def test_history_only_keeps_recent_ticks(self):
+        profiler = ProfilerSystem(0.010, history_size=10, clock=self.clock)
+        self.profiler = profiler
+        for i in range(30):
+            self.tick(0.001, 0.030 if i < 20 else 0.001)
+        summary = profiler.summary()
+        self.assertEqual(30, summary['ticks'])
+        self.assertEqual(20, summary['overruns'])
+        self.assertAlmostEqual(3.0, summary['tick']['max_ms'])
+
+    def test_export(self):
+        for _ in range(3):
+            self.tick(0.001, 0.002)
+        self.profiler.dropped_steps = 4
+        self.profiler.record_queue_depths({7: 100, 8: 2000})
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'profile.json')
+            self.profiler.export(path)
+            with open(path) as f:
+                exported = json.load(f)
+
+        self.assertEqual(3, exported['ticks'])
+        self.assertEqual(4, exported['dropped_steps'])
+        self.assertEqual(10.0, exported['budget_ms'])
+        self.assertEqual(3, len(exported['samples_ms']['tick']))
+        self.assertAlmostEqual(2.0, exported['samples_ms']['movement'][0])
+        self.assertEqual({'7': 100, '8': 2000}, exported['queue_depth']['clients'])
+        self.assertEqual(2000, exported['queue_depth']['max_bytes'])
@@ -0,0 +1,161 @@
+import json
+from unittest import TestCase
+
+from models.Area import Area
+from models.Client import Client
+from models.Player import Player
+from models.Snapshot import Snapshot
+from models.WireProtocol import BINARY_PROTOCOL_VERSION
+from systems.AreaSystem import AreaSystem
+from systems.ClientReceiverSystem import ClientReceiverSystem
+from systems.InterestSystem import InterestSystem
+from systems.ServerBroadcastSystem import ServerBroadcastSystem
+
+
+class RecordingClient(Client):
+    def __init__(self, client_id: int):
+        super().__init__(None)
+        self.client_id = client_id
+        self.frames: list[bytes] = []
+
+    def write(self, data: bytes) -> None:
+        self.frames.append(data)
+
+    def deltas(self) -> list[dict]:
+        return [json.loads(frame) for frame in self.frames if frame.startswith(b'{')]
+
+
+class RecordingSender:
+    def __init__(self):
+        self.protocol_version = 1
+        self.acks: list[int] = []
+
+    def ack(self, snapshot_number: int) -> None:
+        self.acks.append(snapshot_number)
+
+
+class TestServerBroadcastSystem(TestCase):
+    def setUp(self):
+        self.area = Area(1)
+        area_system = AreaSystem()
+        area_system.areas.append(self.area)
+        self.clients = {}
+        self.broadcaster = ServerBroadcastSystem(self.clients, area_system)
+
+    def join(self, client_id: int) -> RecordingClient:
+        client = RecordingClient(client_id)
+        client.player = Player(client_id, self.area.get_spawn())
+        self.area.players.add(client.player)
+        self.clients[client_id] = client
+        return client
+
+    def tick(self, client: RecordingClient) -> dict:
+        client.player.move_relative(1, 0)
+        self.broadcaster.send_updates()
+        return client.deltas()[-1]
+
+    def test_deltas_rebuild_the_area_on_the_client(self):
+        client = self.join(1)
+        sender = RecordingSender()
+        receiver = ClientReceiverSystem(None, sender)
+        receiver.client_id = client.client_id
+
+        for tick in range(6):
+            client.player.move_relative(3, 0)
+            if tick == 2:
+                self.join(2)
+            if tick == 4:
+                other = self.clients.pop(2)
+                other.player.kill()
+            self.broadcaster.send_updates()
+            receiver.apply_delta(client.deltas()[-1])
+            self.broadcaster.acknowledge(client, sender.acks[-1])
+
+        deltas = client.deltas()
+        self.assertIsNone(deltas[0]['baseline'])
+        self.assertTrue(all(delta['baseline'] == previous['snapshot'] for previous, delta in zip(deltas, deltas[1:])))
+
+        # The client has the same state as a full snapshot would give it, and only keeps what can still be a baseline
+        snapshot = self.broadcaster.area_snapshots[self.area]
+        whole = Snapshot.from_delta(json.loads(json.dumps(snapshot.delta_from(None))), None)
+        self.assertTrue(receiver.snapshots[snapshot.number].same_content(whole))
+        self.assertEqual([deltas[-1]['baseline'], snapshot.number], sorted(receiver.snapshots))
+
+    def test_unknown_or_expired_baselines_fall_back_to_whole_snapshots(self):
+        client = self.join(1)
+        self.broadcaster.history_size = 2
+        first = self.tick(client)
+        self.broadcaster.acknowledge(client, first['snapshot'])
+        self.assertEqual(first['snapshot'], self.tick(client)['baseline'])
+
+        # The acknowledged snapshot is pushed out of the history by the ones sent since
+        self.assertEqual(first['snapshot'], self.tick(client)['baseline'])
+        self.assertIsNone(self.tick(client)['baseline'])
+
+        # A snapshot the client never received
+        self.broadcaster.acknowledge(client, 999)
+        self.assertIsNone(self.tick(client)['baseline'])
+
+    def test_stale_acks_never_move_the_baseline_backwards(self):
+        client = self.join(1)
+        first = self.tick(client)
+        second = self.tick(client)
+        self.assertIsNone(second['baseline'])
+
+        # The client started over from the second whole snapshot, so a late ack for the first can't be a baseline
+        self.broadcaster.acknowledge(client, first['snapshot'])
+        third = self.tick(client)
+        self.assertIsNone(third['baseline'])
+
+        self.broadcaster.acknowledge(client, third['snapshot'])
+        self.broadcaster.acknowledge(client, first['snapshot'])
+        self.assertEqual(third['snapshot'], self.tick(client)['baseline'])
+
+    def test_clients_sharing_a_baseline_share_one_encode(self):
+        clients = [self.join(client_id) for client_id in range(1, 6)]
+        for client in clients:
+            client.protocol_version = BINARY_PROTOCOL_VERSION
+
+        for tick in range(4):
+            encodes = self.broadcaster.encode_count
+            clients[0].player.move_relative(1, 0)
+            self.broadcaster.send_updates()
+            self.assertEqual(1, self.broadcaster.encode_count - encodes)
+            frames = {client.frames[-1] for client in clients}
+            self.assertEqual(1, len(frames))
+            number = max(self.broadcaster.sent[clients[0]])
+            for client in clients:
+                self.broadcaster.acknowledge(client, number)
+
+        # A client that starts over is encoded a whole snapshot of its own, the others still share one
+        self.broadcaster.forget(clients[0])
+        encodes = self.broadcaster.encode_count
+        clients[1].player.move_relative(1, 0)
+        self.broadcaster.send_updates()
+        self.assertEqual(2, self.broadcaster.encode_count - encodes)
+
+        # Nothing changed, so nothing is encoded or sent
+        encodes = self.broadcaster.encode_count
+        sent = [len(client.frames) for client in clients]
+        self.broadcaster.send_updates()
+        self.assertEqual(encodes, self.broadcaster.encode_count)
+        self.assertEqual(sent, [len(client.frames) for client in clients])
+
+    def test_views_rebuild_the_entities_near_the_player(self):
+        self.broadcaster.interest_system = InterestSystem(radius=300, margin=100)
+        client = self.join(1)
+        sender = RecordingSender()
+        receiver = ClientReceiverSystem(None, sender)
+        receiver.client_id = client.client_id
+        other = self.join(2)
+        x, y = client.player.get_pixel_location()
+
+        for distance in (100, 2000, 200, 2000):
+            other.player.move_absolute(x + distance, y)
+            self.broadcaster.send_updates()
+            receiver.apply_delta(client.deltas()[-1])
+            self.broadcaster.acknowledge(client, sender.acks[-1])
+
+            view = self.broadcaster.prev_update[client]
+            self.assertEqual(set(view.groups['players']), set(receiver.snapshots[view.number].groups['players']))
+            self.assertEqual(distance < 300, other.player.entity_id in view.groups['players'])
@@ -0,0 +1,129 @@
+import socket
+import threading
+import time
+from unittest import TestCase
+
+from GameServer import GameServer
+from models.Client import Client
+from models.Direction import Direction
+from models.Player import Player
+from models.WireProtocol import MessageType
+from systems.AreaSystem import AreaSystem
+from systems.MovementSystem import MovementSystem
+from systems.ServerReceiverSystem import ServerReceiverSystem
+from systems.ShardWorker import ShardWorker
+from systems.SkillSystem import SkillSystem
+
+
+class TestServerReceiverSystem(TestCase):
+    def setUp(self):
+        area_system = AreaSystem()
+        self.movement_system = MovementSystem(area_system)
+        self.clients = {}
+        self.receiver = ServerReceiverSystem(self.clients, self.movement_system, SkillSystem(area_system), area_system)
+
+    def connect(self) -> Client:
+        client = Client(object())
+        client.player = Player(client.client_id, (100, 100))
+        self.clients[client.connection] = client
+        return client
+
+    def test_commands_are_applied_in_batches_by_the_game_thread(self):
+        client = self.connect()
+        self.receiver.queue_updates(client, b'move:1\nmo')
+        self.assertEqual({}, self.movement_system.moving)
+
+        self.receiver.process_pending()
+        self.assertEqual(Direction(1), self.movement_system.moving[client.player])
+
+        # Commands a socket thread queues while a batch is applied wait for the next one
+        handle_command = self.receiver.handle_command
+
+        def handle_and_receive(*args):
+            handle_command(*args)
+            self.receiver.queue_updates(client, b'stop:1\n')
+
+        self.receiver.handle_command = handle_and_receive
+        self.receiver.queue_updates(client, b've:2\n')
+        self.receiver.process_pending()
+        self.assertEqual(Direction(3), self.movement_system.moving[client.player])
+        self.assertEqual(1, len(self.receiver.pending))
+
+    def test_commands_of_disconnected_clients_are_dropped(self):
+        client = self.connect()
+        self.receiver.queue_updates(client, b'move:1\n')
+        del self.clients[client.connection]
+        self.receiver.process_pending()
+        self.assertEqual({}, self.movement_system.moving)
+        self.assertEqual(0, len(self.receiver.pending))
+
+    def test_inputs_without_a_player_are_dropped(self):
+        # A predicting client sends inputs from the moment it connects, before its player spawns
+        client = self.connect()
+        player, client.player = client.player, None
+        self.receiver.queue_updates(client, b'input:1:1\n')
+        self.receiver.process_pending()
+        self.assertEqual({}, self.movement_system.inputs)
+
+        client.player = player
+        self.receiver.queue_updates(client, b'input:2:1\n')
+        self.receiver.process_pending()
+        self.assertEqual([(2, Direction(1))], list(self.movement_system.inputs[player]))
+
+        # With shards, inputs for a player on its way to another shard reach the old one, which drops them
+        worker = ShardWorker(None, 1, 60, 60)
+        worker.handle(('command', client.client_id, MessageType.INPUT, (3, 1)))
+        self.assertEqual({}, worker.movement_system.inputs)
+
+    def test_bad_commands_do_not_stop_the_server(self):
+        server = GameServer(headless=True, area_pool_size=0)
+        client = Client(object(), buffered=True)
+        server.clients[client.connection] = client
+
+        # Commands for a player that hasn't spawned yet
+        server.receiver.queue_updates(client, b'grab_gear:3\ngrab_inventory:1:999\n')
+        server.receiver.process_pending()
+        server.simulate()
+        self.assertIsNotNone(client.player)
+
+        # Loot that doesn't exist, and a command that fails for any other reason
+        def fail(*_):
+            raise RuntimeError('broken')
+
+        server.skill_system.start_attacking = fail
+        server.receiver.queue_updates(client, b'grab_inventory:1:999\nattack:0,100\nmove:1\n')
+        server.receiver.process_pending()
+        self.assertEqual(0, client.player.cursor_loot.get_loot_count())
+        self.assertEqual(Direction(1), server.movement_system.moving[client.player])
+
+        simulation_time = server.simulation_time
+        server.simulate()
+        self.assertGreater(server.simulation_time, simulation_time)
+
+    def test_client_threads_only_queue_commands(self):
+        server = GameServer(headless=True, io_mode='threads', area_pool_size=0)
+        server.running = True
+        connection, remote = socket.socketpair()
+        thread = threading.Thread(target=server.client_thread, args=(connection, 'test'))
+        thread.start()
+        try:
+            remote.sendall(b'grab_gear:3\ninput:1:1\ngrab_inventory:1:999\n')
+            deadline = time.perf_counter() + 2
+            while len(server.receiver.pending) < 3 and time.perf_counter() < deadline:
+                time.sleep(0.01)
+            self.assertEqual(3, len(server.receiver.pending))
+            self.assertEqual({}, server.clients)
+
+            # The game thread adds the client, then applies its commands before the player spawns
+            server.apply_connections()
+            server.receiver.process_pending()
+            server.simulate()
+            client = server.clients[connection]
+            self.assertIsNotNone(client.player)
+        finally:
+            remote.close()
+            thread.join(2)
+            server.running = False
+
+        server.apply_connections()
+        self.assertEqual({}, server.clients)
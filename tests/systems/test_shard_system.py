@@ -0,0 +1,88 @@
+from unittest import TestCase
+
+from models.Client import Client
+from models.ExitDoor import ExitDoor
+from models.Loot import RingLoot
+from models.WireProtocol import MessageType
+from systems.ShardSystem import ShardSystem
+from systems.ShardWorker import ShardWorker
+
+
+class RecordingConnection:
+    def __init__(self):
+        self.sent: list[tuple] = []
+
+    def send(self, message: tuple) -> None:
+        self.sent.append(message)
+
+    def poll(self, timeout: float = 0) -> bool:
+        return False
+
+
+class TestShardSystem(TestCase):
+    def test_players_are_handed_to_the_next_area_through_exits(self):
+        shard_system = ShardSystem(2, 1, 60, 60, 'tiles', seed=1)
+        shard_system.connections = [RecordingConnection(), RecordingConnection()]
+        client = Client(None)
+        shard_system.run_once([client])
+        client_id = client.client_id
+        self.assertEqual(('enter', client_id, shard_system.chain[0].seed, None), shard_system.connections[0].sent[-1])
+
+        # The shard simulates the player until it reaches the exit
+        worker = ShardWorker(RecordingConnection(), 1, 60, 60)
+        worker.handle(shard_system.connections[0].sent[-1])
+        area = worker.area_system.areas[0]
+        player = worker.clients[client_id].player
+        player.inventory.try_add_loot(RingLoot(1, 5, (0, 0)))
+        area.exit = ExitDoor(player.get_pixel_location())
+        worker.simulate()
+        self.assertEqual(0, len(area.players))
+        self.assertEqual({}, worker.clients)
+
+        # The last area leads to a new one, on the shard with the fewest players
+        kind, *exit_message = worker.connection.sent[-1]
+        self.assertEqual('exit', kind)
+        shard_system.exit(*exit_message)
+        self.assertEqual(2, len(shard_system.chain))
+        _, _, next_seed, state = shard_system.connections[1].sent[-1]
+        self.assertEqual(shard_system.chain[1].seed, next_seed)
+
+        next_worker = ShardWorker(RecordingConnection(), 2, 60, 60)
+        next_worker.handle(shard_system.connections[1].sent[-1])
+        moved = next_worker.clients[client_id].player
+        self.assertEqual(player.entity_id, moved.entity_id)
+        self.assertIsNotNone(moved.inventory.get_loot(1, 5))
+        self.assertEqual(next_worker.area_system.areas[0].get_spawn(), moved.get_pixel_location())
+
+    def test_areas_are_dropped_once_empty(self):
+        shard_system = ShardSystem(1, 1, 60, 60, 'tiles', seed=1)
+        shard_system.connections = [RecordingConnection()]
+        client = Client(None)
+        shard_system.run_once([client])
+        area = shard_system.chain[0]
+
+        # A report from before the shard saw the player enter doesn't drop the area
+        shard_system.update(0, 0, [], {}, (0, 0))
+        self.assertEqual([area], shard_system.chain)
+
+        owner = {'inventory': {}, 'cursor_loot': {}, 'gear_version': 0, 'gear': []}
+        shard_system.update(0, 1, [(area.seed, {'seed': area.seed}, [client.client_id])], {client.client_id: owner},
+                            (1, 0))
+        self.assertEqual([area], shard_system.areas)
+        self.assertEqual([client.player], area.players)
+
+        shard_system.update(0, 1, [], {}, (2, 0))
+        self.assertEqual([], shard_system.chain)
+        self.assertEqual([], shard_system.areas)
+
+    def test_failing_commands_are_dropped(self):
+        worker = ShardWorker(RecordingConnection(), 1, 60, 60)
+        worker.handle(('enter', 7, 1, None))
+
+        def handle_command(client, message_type, args):
+            raise KeyError(args)
+        worker.receiver.handle_command = handle_command
+        worker.handle(('command', 7, MessageType.GRAB_GEAR, (99,)))
+        worker.handle(('leave', 7))
+        self.assertEqual(3, worker.received)
+        self.assertEqual({}, worker.clients)
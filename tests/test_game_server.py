@@ -0,0 +1,76 @@
+import os
+import subprocess
+import sys
+import textwrap
+from unittest import TestCase
+
+from GameServer import GameServer
+
+
+HEADLESS_SERVER = textwrap.dedent('''
+    import pygame
+    import models.Entity
+    from GameServer import GameServer
+    from models.Client import Client
+    from models.Enemy import BossEnemy, NormalEnemy
+    from models.Loot import RingLoot
+    from models.Projectile import Projectile
+
+    def no_surfaces(*_):
+        raise AssertionError('Surface allocated')
+
+    models.Entity.Surface = no_surfaces
+    pygame.quit = lambda: print('pygame.quit')
+
+    server = GameServer(headless=True, area_pool_size=0)
+    client = Client(object(), buffered=True)
+    server.clients[client.connection] = client
+    for _ in range(3):
+        server.simulate()
+    server.skill_system.start_attacking(client.player, pygame.Vector2(100, 0))
+    for _ in range(30):
+        server.simulate()
+    server.broadcaster.send_updates()
+    entities = [client.player, NormalEnemy((0, 0), 10), BossEnemy((0, 0), 10), RingLoot(1, 1, (0, 0)),
+                Projectile((0, 0), 60, pygame.Vector2(1, 0))]
+    assert all(entity._image is None for entity in entities)
+    assert not pygame.display.get_init()
+
+    server.clients.clear()
+    server.game_thread()  # Not running, so this only shuts down
+    print('stopped')
+''')
+
+
+class TestGameServer(TestCase):
+    def test_headless_server_needs_no_display(self):
+        environment = {key: value for key, value in os.environ.items() if not key.startswith('SDL_')}
+        result = subprocess.run([sys.executable, '-c', HEADLESS_SERVER], env=environment, capture_output=True,
+                                text=True, timeout=60, cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        self.assertEqual(0, result.returncode, result.stderr)
+        self.assertIn('stopped', result.stdout)
+        self.assertNotIn('pygame.quit', result.stdout)
+
+    def test_catch_up_is_limited_and_dropped_time_counted(self):
+        now = [0.0]
+        server = GameServer(headless=True, area_pool_size=0)
+        server.clock = lambda: now[0]
+        steps = []
+        server.simulate = lambda: steps.append(now[0])
+
+        for seconds, total_steps in ((0.5 / 60, 0), (1.5 / 60, 1), (2.5 / 60, 2)):
+            now[0] = seconds
+            server.advance()
+            self.assertEqual(total_steps, len(steps))
+
+        # A second behind: five steps are caught up and the rest of the time is dropped
+        now[0] = 62.5 / 60
+        server.advance()
+        self.assertEqual(7, len(steps))
+        self.assertEqual(55, server.profiler.dropped_steps)
+        self.assertEqual(0.0, server.accumulator)
+
+        now[0] = 64.9 / 60
+        server.advance()
+        self.assertEqual(9, len(steps))
+        self.assertEqual(55, server.profiler.dropped_steps)